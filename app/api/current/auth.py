@@ -6,9 +6,11 @@ from services.auth import Auth_Utils
 from services.users import (fetch_user_using_specify_id, )
 from models.auth import CsrfType
 from models.users import UserInfo
+from middlewares.server_timing import TimedRoute
 
 router = APIRouter(
-    prefix="/api/auth"
+    prefix="/api/auth",
+    route_class=TimedRoute
 )
 auth = Auth_Utils()
 
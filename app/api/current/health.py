@@ -0,0 +1,58 @@
+# 標準モジュール
+import os
+import asyncio
+# サードパーティ製モジュール
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+import anyio.to_thread
+# プロジェクトモジュール
+from db.engine import get_workload_db_engine
+from services.health import (
+    READINESS_DB_TIMEOUT_SECONDS, cache_warm_state,
+    workload_db_pool_status, threadpool_status, check_workload_db, build_readiness_report)
+from models.health import Liveness, Readiness
+from middlewares.server_timing import TimedRoute
+
+
+# 初期化処理
+router = APIRouter(prefix="/health", route_class=TimedRoute)
+
+
+@router.get("/live", response_model=Liveness, include_in_schema=False)
+async def api_liveness():
+    """
+    liveness (イベントループが応答できるか)
+    DB等の外部要因で再起動されないよう、外部への接続は確認しない。
+    """
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@router.get("/ready", response_model=Readiness, include_in_schema=False,
+            responses={503: {"model": Readiness}})
+async def api_readiness(response: Response):
+    """
+    readiness (このワーカーにリクエストを振り分けてよいか)
+    DB接続の失敗・コネクションプールまたはスレッドプールの飽和・キャッシュの事前読み込み未完了の場合は503を返す。
+    """
+    db_pool = workload_db_pool_status(get_workload_db_engine())
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    threadpool = threadpool_status(int(limiter.total_tokens), int(limiter.borrowed_tokens))
+
+    if db_pool["saturated"] or threadpool["saturated"]:
+        # 接続・スレッドの空き待ちで応答が遅れるため、DBへの接続確認は行わない
+        database = { "status": "skipped", "latency_ms": None, "detail": None }
+    else:
+        try:
+            database = await asyncio.wait_for(
+                run_in_threadpool(check_workload_db, READINESS_DB_TIMEOUT_SECONDS), READINESS_DB_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            database = { "status": "timeout", "latency_ms": None, "detail": None }
+
+    # 起動時の事前読み込みに失敗していた場合、DBに接続できれば再実行する
+    if database["status"] == "ok":
+        cache_warm_state.warm_in_background()
+
+    report = build_readiness_report(database, db_pool, threadpool)
+    if report["status"] != "ready":
+        response.status_code = 503
+    return report
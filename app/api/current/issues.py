@@ -1,7 +1,8 @@
 # 標準モジュール
 import datetime as dt
+from typing import Literal, Optional
 # サードパーティ製モジュール
-from fastapi import APIRouter, Depends, Request, Response
+from fastapi import APIRouter, Depends, Request, Response, Header, HTTPException
 from fastapi.encoders import jsonable_encoder
 from fastapi_csrf_protect import CsrfProtect
 # プロジェクトモジュール
@@ -9,37 +10,79 @@ from services.auth import Auth_Utils
 from services.jira_contents import (
     fetch_all_main_issues_from_db, fetch_all_subtasks_from_db,
     fetch_all_subtasks_with_parents_from_db, fetch_all_subtasks_with_path_from_db,
+    create_project_issue_hierarchical_structure_df,
 )
+from services.columnar_formats import (
+    negotiate_columnar_format, is_columnar_format_available,
+    dataframe_to_arrow_table, serialize_arrow_table, COLUMNAR_MEDIA_TYPES,
+)
+from services.reference_etags import compute_reference_etag, is_not_modified, reference_cache_headers
 from models.auth import ResponseMessage
 from models.jira_contents import (
     IssueInfoFromDB,
     SubtaskWithParents, SubtaskWithPath
 )
+from middlewares.server_timing import TimedRoute
 
 
 # 初期化処理
-router = APIRouter(prefix="/api/issue")
+router = APIRouter(prefix="/api/issue", route_class=TimedRoute)
 
 
 @router.get("/main-task/db/all", response_model=list[IssueInfoFromDB])
-async def api_fetch_all_main_tasks():
+async def api_fetch_all_main_tasks(response: Response, if_none_match: Optional[str] = Header(default=None)):
+    etag = compute_reference_etag("issues")
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
     issues = fetch_all_main_issues_from_db()
+    response.headers.update(reference_cache_headers(etag))
     return issues
 
 
 @router.get("/subtask/db/all", response_model=list[IssueInfoFromDB])
-async def api_fetch_all_main_tasks():
+async def api_fetch_all_main_tasks(response: Response, if_none_match: Optional[str] = Header(default=None)):
+    etag = compute_reference_etag("issues")
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
     subtasks = fetch_all_subtasks_from_db()
+    response.headers.update(reference_cache_headers(etag))
     return subtasks
 
 
 @router.get("/subtask_with_parents/db/all", response_model=list[SubtaskWithParents])
-async def api_fetch_all_subtask_with_parents_from_db():
+async def api_fetch_all_subtask_with_parents_from_db(request: Request, response: Response,
+                                                     if_none_match: Optional[str] = Header(default=None),
+                                                     file_format: Optional[Literal["json", "arrow", "parquet"]] = None):
+    """
+    project, issue(第1, 第2階層)を含めたsubtask一覧を返却する
+    (Accept: application/vnd.apache.arrow.stream / application/vnd.apache.parquet または?file_format=で列指向形式を返却)
+    """
+    fmt = negotiate_columnar_format(request.headers.get("accept"), file_format)
+    if fmt is not None and not is_columnar_format_available():
+        raise HTTPException(status_code=400, detail="Arrow/Parquet出力は利用できません。JSONを指定してください。")
+
+    etag = compute_reference_etag("issues", representation=fmt)
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
+    if fmt is not None:
+        table = dataframe_to_arrow_table(create_project_issue_hierarchical_structure_df())
+        return Response(content=serialize_arrow_table(table, fmt), media_type=COLUMNAR_MEDIA_TYPES[fmt],
+                        headers={**reference_cache_headers(etag), "Vary": "Accept"})
+
     subtasks = fetch_all_subtasks_with_parents_from_db()
+    response.headers.update(reference_cache_headers(etag))
     return subtasks
 
 
 @router.get("/subtask_with_path/db/all", response_model=list[SubtaskWithPath])
-async def api_fetch_all_main_tasks():
+async def api_fetch_all_main_tasks(response: Response, if_none_match: Optional[str] = Header(default=None)):
+    etag = compute_reference_etag("issues")
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
     subtasks = fetch_all_subtasks_with_path_from_db()
+    response.headers.update(reference_cache_headers(etag))
     return subtasks
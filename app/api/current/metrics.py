@@ -0,0 +1,38 @@
+# サードパーティ製モジュール
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+# プロジェクトモジュール
+from services.auth import Auth_Utils
+from services.users import fetch_user_using_specify_id
+from services.metrics import render_metrics
+from services.slow_queries import slow_query_log
+from models.metrics import SlowQuery
+from middlewares.server_timing import TimedRoute
+
+
+# 初期化処理
+router = APIRouter(route_class=TimedRoute)
+auth = Auth_Utils()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def api_metrics():
+    """
+    Prometheus形式のメトリクスを返却する
+    (METRICS_MULTIPROC_DIRを指定した場合は全ワーカーの合算値)
+    """
+    content = await run_in_threadpool(render_metrics)
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/metrics/slow-queries", response_model=list[SlowQuery])
+def api_slow_queries(request: Request):
+    """
+    管理者機能 このワーカーで検出した遅いSQLを新しい順に返却する
+    (EXPLAIN (ANALYZE, BUFFERS)を実行したものは実行計画を含む)
+    """
+    user_id = auth.verify_jwt(request)
+    if not fetch_user_using_specify_id(user_id)["is_superuser"]:
+        raise HTTPException(status_code=403, detail="管理者のみ実行できます。")
+    return slow_query_log.recent()
@@ -1,7 +1,8 @@
 # 標準モジュール
 import datetime as dt
+from typing import Optional
 # サードパーティ製モジュール
-from fastapi import APIRouter, Depends, Request, Response
+from fastapi import APIRouter, Depends, Request, Response, Header
 from fastapi.encoders import jsonable_encoder
 from fastapi_csrf_protect import CsrfProtect
 # プロジェクトモジュール
@@ -12,20 +13,31 @@ from services.jira_contents import (
     fetch_all_issues_related_project_ids_from_jira,
     fetch_all_projects_from_db, generate_projects_for_upsert,
     upsert_jira_project_info_into_db, upsert_jira_issues_into_app_db,
+    record_jira_sync_success,
 )
+from services.reference_etags import compute_reference_etag, is_not_modified, reference_cache_headers
 from models.auth import ResponseMessage
 from models.jira_contents import (
     ProjectInfoFromDB, ProjectInfoFromJira, ProjectForm,
 )
+from middlewares.server_timing import TimedRoute
 
 
 # 初期化処理
-router = APIRouter(prefix="/api/project")
+router = APIRouter(prefix="/api/project", route_class=TimedRoute)
 
 
 @router.get("/db/all", response_model=list[ProjectInfoFromDB])
-async def api_fetch_all_projects():
+async def api_fetch_all_projects(response: Response, if_none_match: Optional[str] = Header(default=None)):
+    """
+    DBに登録されたプロジェクト一覧を返却する (前回取得時から変更がなければ304を返却)
+    """
+    etag = compute_reference_etag("projects")
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
     projects = fetch_all_projects_from_db()
+    response.headers.update(reference_cache_headers(etag))
     return projects
 
 
@@ -44,6 +56,8 @@ async def api_update_all_projects_and_issues():
     issues = fetch_all_issues_related_project_ids_from_jira(project_ids)
     # issueのupsert
     _ = upsert_jira_issues_into_app_db(issues)
+    # readinessで同期からの経過時間を返却するため、成功日時を記録
+    record_jira_sync_success(len(projects), len(issues))
 
     return {"message": "projectとissueの全更新が成功しました。"}
 
@@ -1,19 +1,28 @@
+# 標準モジュール
+import csv
+from typing import Optional
 # サードパーティ製モジュール
-from fastapi import APIRouter, Depends, Request, Response
+from fastapi import APIRouter, Depends, Request, Response, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi_csrf_protect import CsrfProtect
 # プロジェクトモジュール
 from services.auth import Auth_Utils
 from services.users import (
     convert_password_to_hashed_one, verify_password_and_hashed_one,
-    fetch_active_user_list,
-    insert_new_user_into_app_db, verify_user_info_for_login )
+    fetch_active_user_list, fetch_user_using_specify_id,
+    insert_new_user_into_app_db, verify_user_info_for_login,
+    parse_user_import_csv, import_users_into_app_db )
+from services.password_hashing import run_in_password_hash_pool
+from services.login_throttle import login_throttle
+from services.reference_etags import compute_reference_etag, is_not_modified, reference_cache_headers
 from models.auth import CsrfType, ResponseMessage
-from models.users import UserInfo, UserFormBody, LoginForm, UserListModel
+from models.users import UserInfo, UserFormBody, LoginForm, UserListModel, UserImportResult
+from middlewares.server_timing import TimedRoute
 
 
 # 初期化処理
-router = APIRouter(prefix="/api/user")
+router = APIRouter(prefix="/api/user", route_class=TimedRoute)
 auth = Auth_Utils()
 
 
@@ -27,8 +36,8 @@ async def api_user_signup(request: Request, user_form_value: UserFormBody, respo
     # csrf_protect.validate_csrf(csrf_token)
     # フロントからの情報のデコード (Pydanticモデル → JSON)
     new_user = jsonable_encoder(user_form_value)
-    # DB登録処理
-    message, jwt_token = insert_new_user_into_app_db(new_user)
+    # DB登録処理 (パスワードのハッシュ化を含むため専用スレッドプールで実行)
+    message, jwt_token = await run_in_password_hash_pool(insert_new_user_into_app_db, new_user)
     response.set_cookie(
         key="access_token", value=f"Bearer {jwt_token}",
         httponly=True, samesite="none", secure=True
@@ -43,7 +52,13 @@ async def api_user_signin(request: Request, login_form_value: LoginForm, respons
     サインイン用エンドポイント
     """
     form_value = jsonable_encoder(login_form_value)
-    user_info, jwt_token = verify_user_info_for_login(form_value["email"], form_value["password"])
+    # 試行回数制限 (上限超過時はパスワード検証を行わずに429を返却する)
+    if login_throttle is not None:
+        client_ip = request.client.host if request.client else None
+        await login_throttle.check_async(form_value["email"], client_ip)
+    # パスワードの検証を含むため専用スレッドプールで実行
+    user_info, jwt_token = await run_in_password_hash_pool(
+        verify_user_info_for_login, form_value["email"], form_value["password"])
     response.set_cookie(
         key="access_token", value=f"Bearer {jwt_token}",
         httponly=True, samesite="none", secure=True
@@ -52,11 +67,17 @@ async def api_user_signin(request: Request, login_form_value: LoginForm, respons
 
 
 @router.get("/active/all", response_model=list[UserListModel])
-async def api_fetch_active_user_list(request: Request, response: Response):
+async def api_fetch_active_user_list(request: Request, response: Response,
+                                     if_none_match: Optional[str] = Header(default=None)):
     """
-    有効なユーザ一覧を返却するエンドポイント
+    有効なユーザ一覧を返却するエンドポイント (前回取得時から変更がなければ304を返却)
     """
+    etag = compute_reference_etag("users")
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=304, headers=reference_cache_headers(etag))
+
     user_list = fetch_active_user_list()
+    response.headers.update(reference_cache_headers(etag))
     return user_list
 
 
@@ -87,6 +108,37 @@ def api_deactivate_user_account(response: Response):
     return
 
 
+@router.post("/root/import", response_model=UserImportResult)
+async def api_import_users(request: Request):
+    """
+    管理者機能 ユーザ一括登録用のエンドポイント
+    (JSON: ユーザ情報のリスト, CSV(Content-Type: text/csv): ヘッダ行 name,family_name,first_name,email,password)
+    """
+    # JWT検証と管理者権限の確認
+    user_id = auth.verify_jwt(request)
+    if not fetch_user_using_specify_id(user_id)["is_superuser"]:
+        raise HTTPException(status_code=403, detail="管理者のみ実行できます。")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "text/csv":
+        body = await request.body()
+        try:
+            users = parse_user_import_csv(body.decode("utf-8"))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"CSVの読み込みに失敗しました。: {e}")
+    else:
+        try:
+            users = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSONの読み込みに失敗しました。")
+        if not isinstance(users, list):
+            raise HTTPException(status_code=400, detail="ユーザ情報のリストを指定してください。")
+
+    # ハッシュ化専用スレッドプールを内部で使用するため、通常のスレッドプールで実行する
+    result = await run_in_threadpool(import_users_into_app_db, users)
+    return result
+
+
 @router.get("/root/delete", response_model=ResponseMessage)
 def api_delete_user_account_from_db(user_id: int):
     """
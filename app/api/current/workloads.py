@@ -1,7 +1,14 @@
 # 標準モジュール
+import asyncio
+import logging
 import datetime as dt
+from contextlib import AsyncExitStack
+from typing import Literal, Optional
 # サードパーティ製モジュール
-from fastapi import APIRouter, Depends, Request, Response
+from fastapi import (
+    APIRouter, Depends, Request, Response, HTTPException, Header, Query, WebSocket, WebSocketDisconnect)
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.encoders import jsonable_encoder
 from fastapi_csrf_protect import CsrfProtect
 # プロジェクトモジュール
@@ -11,25 +18,64 @@ from services.workloads import (
     update_specify_workload,
     delete_workload,
     fetch_specify_condition_workloads_from_db,
+    save_workload_batch,
+    workload_etag, parse_workload_if_match,
+    fetch_specify_condition_workload_columns_from_db,
+)
+from services.workload_aggregations import aggregate_workloads_from_db, fetch_workload_matrix_from_db
+from services.workload_exports import export_workloads, is_xlsx_export_available, EXPORT_MEDIA_TYPES
+from services.workload_events import workload_event_broker
+from services.columnar_formats import (
+    negotiate_columnar_format, is_columnar_format_available,
+    rows_to_arrow_table, serialize_arrow_table, COLUMNAR_MEDIA_TYPES,
 )
 from models.auth import CsrfType, ResponseMessage
-from models.workloads import WorkloadInfoFromDB, WorkloadForm, WorkloadCondition, RegisteredWorkload
+from models.workloads import (
+    WorkloadInfoFromDB, WorkloadForm, WorkloadCondition, RegisteredWorkload,
+    WorkloadBatchForm, WorkloadBatchResult,
+    WorkloadAggregateCondition, WorkloadAggregateResult,
+    WorkloadMatrixCondition, WorkloadMatrix,
+)
+from middlewares.server_timing import TimedRoute
 
 
 # 初期化処理
-router = APIRouter(prefix="/api/workload")
+router = APIRouter(prefix="/api/workload", route_class=TimedRoute)
 auth = Auth_Utils()
+# SSEの接続維持用コメントを送信する間隔(秒)
+SSE_KEEPALIVE_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_columnar_format(request: Request, file_format: str | None) -> str | None:
+    """
+    Acceptヘッダ・クエリパラメータからレスポンス形式(arrow, parquet, JSONの場合はNone)を決定する。
+    """
+    fmt = negotiate_columnar_format(request.headers.get("accept"), file_format)
+    if fmt is not None and not is_columnar_format_available():
+        raise HTTPException(status_code=400, detail="Arrow/Parquet出力は利用できません。JSONを指定してください。")
+    return fmt
+
+
+def columnar_response(table, fmt: str) -> Response:
+    """
+    Arrowのテーブルを指定形式(arrow, parquet)のレスポンスにする。
+    """
+    return Response(content=serialize_arrow_table(table, fmt), media_type=COLUMNAR_MEDIA_TYPES[fmt],
+                    headers={"Vary": "Accept"})
 
 
 @router.get("/db/{workload_id}", response_model=WorkloadInfoFromDB)
-def api_fetch_workload_using_workload_id(request: Request, workload_id: int):
+def api_fetch_workload_using_workload_id(request: Request, response: Response, workload_id: int):
     """
-    idを指定した工数情報レコードの取得
+    idを指定した工数情報レコードの取得 (ETagに工数のバージョンを付与)
     """
     # JWT検証処理を入れる
     _ = auth.verify_jwt(request)
 
     workload = fetch_specify_workload(workload_id)
+    response.headers["ETag"] = workload_etag(workload_id, workload["version"])
     return workload
 
 
@@ -51,41 +97,193 @@ def api_insert_workload(request: Request, input_form_value: WorkloadForm):
     return message
 
 
+@router.post("/db/batch", response_model=WorkloadBatchResult)
+def api_save_workload_batch(request: Request, batch_form_value: WorkloadBatchForm):
+    """
+    1ユーザ・1期間(週など)分の工数の登録、編集、削除を一括で保存する
+    """
+    # JWT検証処理を入れる
+    user_id = auth.verify_jwt(request)
+    # [TODO] CSRF検証処理を入れる
+
+    # form値をdictに直し、一括保存用メソッドに渡す
+    batch = jsonable_encoder(batch_form_value)
+    result = save_workload_batch(batch, user_id)
+    return result
+
+
 @router.put("/db/update/{workload_id}", response_model=ResponseMessage)
-def api_update_workload(request: Request, workload_id: int, form_value: WorkloadForm):
+def api_update_workload(request: Request, response: Response, workload_id: int, form_value: WorkloadForm,
+                        if_match: Optional[str] = Header(default=None)):
     """
-    登録工数の編集
+    登録工数の編集 (If-Match指定時は、取得時から他で更新されていれば412を返却)
     """
     # JWT検証処理を入れる
-    _ = auth.verify_jwt(request)
+    user_id = auth.verify_jwt(request)
     # [TODO] CSRF検証処理を入れる
-    # [TODO] rootユーザかどうかの判定
 
     # form値をdictに直し、データを更新用メソッドに渡す
     decoded_form_value = jsonable_encoder(form_value)
-    message: dict = update_specify_workload(workload_id, decoded_form_value)
+    expected_version = parse_workload_if_match(if_match, workload_id)
+    message: dict = update_specify_workload(workload_id, decoded_form_value, user_id, expected_version)
+    if message.get("version") is not None:
+        response.headers["ETag"] = workload_etag(workload_id, message["version"])
     return message
 
 
 @router.delete("/db/delete/{workload_id}", response_model=ResponseMessage)
-def api_delete_workload(request: Request, workload_id: int):
+def api_delete_workload(request: Request, workload_id: int, if_match: Optional[str] = Header(default=None)):
     """
-    登録工数の編集
+    登録工数の削除 (If-Match指定時は、取得時から他で更新されていれば412を返却)
     """
     # JWT検証処理を入れる
     user_id = auth.verify_jwt(request)
     # [TODO] CSRF検証処理を入れる
 
-    # form値をdictに直し、データを更新用メソッドに渡す
-    message: dict = delete_workload(workload_id, user_id)
+    # データを削除用メソッドに渡す
+    expected_version = parse_workload_if_match(if_match, workload_id)
+    message: dict = delete_workload(workload_id, user_id, expected_version)
     return message
 
 
 @router.post("/db/search", response_model=list[RegisteredWorkload])
-def api_fetch_workloads_using_specify_condition(condition: WorkloadCondition):
+def api_fetch_workloads_using_specify_condition(request: Request, condition: WorkloadCondition,
+                                                file_format: Optional[Literal["json", "arrow", "parquet"]] = None):
     """
     指定条件の登録工数情報取得
+    (Accept: application/vnd.apache.arrow.stream / application/vnd.apache.parquet または?file_format=で列指向形式を返却)
     """
     condition = jsonable_encoder(condition)
+    fmt = resolve_columnar_format(request, file_format)
+    if fmt is not None:
+        columns, rows = fetch_specify_condition_workload_columns_from_db(condition)
+        return columnar_response(rows_to_arrow_table(columns, rows), fmt)
+
     workloads = fetch_specify_condition_workloads_from_db(condition)
     return workloads
+
+
+@router.post("/db/export")
+def api_export_workloads(request: Request, condition: WorkloadCondition, file_format: Literal["csv", "xlsx"] = "csv"):
+    """
+    指定条件の登録工数情報をCSV(またはXLSX)でストリーミング出力する
+    """
+    # JWT検証処理を入れる
+    _ = auth.verify_jwt(request)
+    if file_format == "xlsx" and not is_xlsx_export_available():
+        raise HTTPException(status_code=400, detail="XLSX出力は利用できません。CSVを指定してください。")
+
+    condition = jsonable_encoder(condition)
+    file_name = f"workloads_{dt.datetime.now():%Y%m%d%H%M%S}.{file_format}"
+    return StreamingResponse(
+        export_workloads(condition, file_format),
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
+    )
+
+
+@router.post("/db/aggregate", response_model=WorkloadAggregateResult)
+def api_aggregate_workloads(request: Request, condition: WorkloadAggregateCondition,
+                            file_format: Optional[Literal["json", "arrow", "parquet"]] = None):
+    """
+    指定期間の工数を指定した集約軸で集計した結果の取得
+    (Accept: application/vnd.apache.arrow.stream / application/vnd.apache.parquet または?file_format=で列指向形式を返却)
+    """
+    # JWT検証処理を入れる
+    _ = auth.verify_jwt(request)
+
+    condition = jsonable_encoder(condition)
+    fmt = resolve_columnar_format(request, file_format)
+    result = aggregate_workloads_from_db(condition)
+    if fmt is not None:
+        return columnar_response(rows_to_arrow_table(result["columns"], result["rows"]), fmt)
+    return result
+
+
+@router.post("/db/matrix", response_model=WorkloadMatrix)
+def api_fetch_workload_matrix(request: Request, condition: WorkloadMatrixCondition):
+    """
+    指定期間のユーザ × 日 (× プロジェクト)の工数行列の取得 (期間が不正な場合は400を返却)
+    """
+    # JWT検証処理を入れる
+    _ = auth.verify_jwt(request)
+
+    condition = jsonable_encoder(condition)
+    try:
+        matrix = fetch_workload_matrix_from_db(condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return matrix
+
+
+@router.websocket("/ws/changes")
+async def api_workload_change_feed(websocket: WebSocket,
+                                   user_id: list[int] = Query(default=[]),
+                                   project_id: list[int] = Query(default=[])):
+    """
+    工数の登録/編集/削除イベントをWebSocketで配信する (user_id, project_idで絞り込み。複数指定可)
+    """
+    # JWT検証処理を入れる
+    try:
+        _ = auth.verify_jwt(websocket)
+    except Exception:
+        await websocket.close(code=1008)
+        return
+
+    async with AsyncExitStack() as stack:
+        # 購読(LISTEN用の接続)に失敗した場合はハンドシェイク前に切断する
+        try:
+            subscription = await stack.enter_async_context(workload_event_broker.subscribe(user_id, project_id))
+        except Exception as e:
+            logger.warning(f"工数変更通知の購読に失敗しました。: {e}")
+            await websocket.close(code=1011)
+            return
+        await websocket.accept()
+
+        async def forward():
+            while True:
+                await websocket.send_text(await subscription.get())
+        forward_task = asyncio.create_task(forward())
+        # クライアントからの切断を検知するまで受信待ちする
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            forward_task.cancel()
+
+
+@router.get("/events")
+async def api_workload_change_events(request: Request,
+                                     user_id: list[int] = Query(default=[]),
+                                     project_id: list[int] = Query(default=[])):
+    """
+    工数の登録/編集/削除イベントをServer-Sent Eventsで配信する (user_id, project_idで絞り込み。複数指定可)
+    """
+    # JWT検証処理を入れる
+    _ = auth.verify_jwt(request)
+
+    # 購読(LISTEN用の接続)に失敗した場合はストリーム開始前に503を返す
+    stack = AsyncExitStack()
+    try:
+        subscription = await stack.enter_async_context(workload_event_broker.subscribe(user_id, project_id))
+    except Exception as e:
+        logger.warning(f"工数変更通知の購読に失敗しました。: {e}")
+        raise HTTPException(status_code=503, detail="工数変更通知を購読できません。")
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                    yield f"event: workload\ndata: {payload}\n\n"
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            await stack.aclose()
+
+    # クライアントの切断でストリームが中断された場合も購読を解除する
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(stack.aclose))
@@ -0,0 +1,70 @@
+"""
+DB処理の性能計測コマンド
+
+規模ごとに合成データ(commands.synthetic_data)をローカルのDBに登録し、主要な処理の実行時間を計測する。
+計測結果はリポジトリ直下のbenchmarks/results/{日時}_{コミット}.jsonに保存し、コミット間で比較できる。
+
+usage (appディレクトリで実行):
+    $ python -m commands.benchmark run --scales small medium --repeat 5
+    $ python -m commands.benchmark compare ../benchmarks/results/<base>.json ../benchmarks/results/<head>.json
+"""
+# 標準モジュール
+import os
+import sys
+import json
+import argparse
+import datetime as dt
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.synthetic_data import SYNTHETIC_SCALES, is_local_database_url
+from services.benchmarks import (
+    BENCHMARK_RESULTS_DIR, BENCHMARK_REGRESSION_RATIO,
+    run_benchmarks, save_benchmark_result, compare_benchmark_results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB処理の性能計測コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="合成データを登録して各処理の実行時間を計測する")
+    run_parser.add_argument("--scales", nargs="+", choices=SYNTHETIC_SCALES.keys(), default=["small", "medium"])
+    run_parser.add_argument("--repeat", type=int, default=5, help="各処理の実行回数")
+    run_parser.add_argument("--seed", type=int, default=0, help="合成データの乱数のシード")
+    run_parser.add_argument("--end-date", type=dt.date.fromisoformat,
+                            help="工数を登録する最終日 (コミット間で比較する場合は固定する)")
+    run_parser.add_argument("--output-dir", default=BENCHMARK_RESULTS_DIR)
+    run_parser.add_argument("--allow-remote", action="store_true", help="ローカル以外のDBでも実行する")
+    compare_parser = subparsers.add_parser("compare", help="2つの計測結果を比較する")
+    compare_parser.add_argument("base", help="比較元の計測結果(JSON)")
+    compare_parser.add_argument("head", help="比較先の計測結果(JSON)")
+    compare_parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_RATIO,
+                                help="遅くなったとみなす比率")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if not args.allow_remote and not is_local_database_url(os.environ["WORKLOAD_DATABASE_URI"]):
+            sys.exit("ローカル以外のDBが指定されています。実行する場合は--allow-remoteを指定してください。")
+        result = run_benchmarks(args.scales, repeat=args.repeat, seed=args.seed, end_date=args.end_date)
+        print(f"計測結果を保存しました。: {save_benchmark_result(result, args.output_dir)}")
+    elif args.command == "compare":
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.head, encoding="utf-8") as f:
+            head = json.load(f)
+        rows = compare_benchmark_results(base, head, args.threshold)
+        print(f"{base['revision']} -> {head['revision']}")
+        for row in rows:
+            mark = " (遅延)" if row["is_regression"] else ""
+            print(f"[{row['scale']}] {row['case']}: {row['base_ms']}ms -> {row['head_ms']}ms "
+                  f"x{row['ratio']}{mark}")
+        # 遅くなった処理がある場合は終了コード1 (CIでの検知用)
+        if any(row["is_regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+負荷試験コマンド
+
+起動中のサーバに対し、仮想ユーザが下記のシナリオを繰り返し実行し、
+シナリオ・処理ごとのスループット・レスポンス時間のパーセンタイル・エラー率を出力する。
+    - member: サインイン → subtask一覧 → 当月の工数検索 → 1週間分の工数の一括保存
+    - viewer: サインイン → subtask一覧 → 当月の工数検索
+    - admin_sync: 管理者でサインイン → Jiraからproject, issueを全更新
+
+事前に合成データ(commands.synthetic_data)を登録し、Jira連携はjira-stand-inで起動した代替アプリを使用する。
+(サーバはJIRA_BASE_URL=http://127.0.0.1:8099, LOGIN_THROTTLE_BACKEND=noneで起動する)
+
+usage (appディレクトリで実行):
+    $ python -m commands.synthetic_data generate --scale small
+    $ python -m commands.load_testing jira-stand-in --scale small --latency-ms 200
+    $ python -m commands.load_testing run --base-url http://127.0.0.1:8000 --concurrency 20 --duration 60
+    # シナリオの比率の変更と、結果のJSON出力
+    $ python -m commands.load_testing run --mix member=90,viewer=10 --json result.json
+"""
+# 標準モジュール
+import json
+import asyncio
+import argparse
+import datetime as dt
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+import uvicorn
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.synthetic_data import SYNTHETIC_SCALES
+from services.jira_stand_in import create_jira_stand_in_app
+from services.load_testing import LOAD_TEST_SCENARIOS, LOAD_TEST_SCENARIO_WEIGHTS, run_load_test
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """
+    シナリオの比率の指定(member=70,viewer=30)を解析する。
+    """
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in LOAD_TEST_SCENARIOS:
+            raise argparse.ArgumentTypeError(f"不明なシナリオです。: {name}")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+def format_summary(rows: list[dict]) -> str:
+    header = f"{'scenario':<12}{'step':<14}{'requests':>9}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'errors':>9}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['scenario']:<12}{row['step']:<14}{row['requests']:>9}{row['throughput_rps']:>9.2f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            f"{row['error_rate']:>8.1%} {row['errors_by_kind'] or ''}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="負荷試験コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="起動中のサーバに負荷をかける")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--concurrency", type=int, default=10, help="同時に実行する仮想ユーザ数")
+    run_parser.add_argument("--duration", type=float, default=60, help="実行時間(秒)")
+    run_parser.add_argument("--users", type=int, default=SYNTHETIC_SCALES["small"]["users"],
+                            help="合成データのユーザ数 (generate時の--usersと同じ値)")
+    run_parser.add_argument("--think-time", type=float, default=1.0, help="シナリオ間の平均待ち時間(秒)")
+    run_parser.add_argument("--mix", type=parse_mix, default=LOAD_TEST_SCENARIO_WEIGHTS,
+                            help="シナリオごとの比率 (例: member=70,viewer=25,admin_sync=5)")
+    run_parser.add_argument("--month", type=lambda value: dt.date.fromisoformat(f"{value}-01"),
+                            help="工数を検索・保存する月 (YYYY-MM。既定値は当月)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", help="結果を保存するJSONファイル")
+    stand_in_parser = subparsers.add_parser("jira-stand-in", help="合成データを返すJira APIの代替アプリを起動する")
+    stand_in_parser.add_argument("--scale", choices=SYNTHETIC_SCALES.keys(), default="small",
+                                 help="合成データの規模 (generate時と同じ値)")
+    stand_in_parser.add_argument("--seed", type=int, default=0, help="合成データの乱数のシード (generate時と同じ値)")
+    stand_in_parser.add_argument("--latency-ms", type=float, default=0.0, help="各レスポンスに加える遅延(ミリ秒)")
+    stand_in_parser.add_argument("--host", default="127.0.0.1")
+    stand_in_parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        stats = asyncio.run(run_load_test(
+            args.base_url, args.concurrency, args.duration, weights=args.mix, num_of_users=args.users,
+            think_time_seconds=args.think_time, month=args.month, seed=args.seed))
+        rows = stats.summary()
+        print(format_summary(rows))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({ "args": { key: str(value) for key, value in vars(args).items() }, "results": rows },
+                          f, ensure_ascii=False, indent=2)
+    elif args.command == "jira-stand-in":
+        app = create_jira_stand_in_app(SYNTHETIC_SCALES[args.scale], seed=args.seed, latency_ms=args.latency_ms)
+        uvicorn.run(app, host=args.host, port=args.port, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
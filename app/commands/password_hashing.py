@@ -0,0 +1,40 @@
+"""
+パスワードハッシュ化(Argon2)のパラメータ校正コマンド
+
+実行環境で1回のハッシュ化が目標時間に収まるパラメータを算出し、.envに設定する値を出力する。
+(変更後、既存ユーザのハッシュはログイン時に新しいパラメータで再ハッシュ化される)
+
+usage (appディレクトリで実行):
+    $ python -m commands.password_hashing calibrate --target-ms 250
+"""
+# 標準モジュール
+import argparse
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.password_hashing import ARGON2_MEMORY_COST, ARGON2_PARALLELISM, calibrate_password_hasher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パスワードハッシュ化のパラメータ校正コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = subparsers.add_parser("calibrate", help="目標時間に収まるArgon2のパラメータを算出する")
+    calibrate_parser.add_argument("--target-ms", type=float, default=250, help="1回のハッシュ化の目標時間(ミリ秒)")
+    calibrate_parser.add_argument("--memory-cost", type=int, default=ARGON2_MEMORY_COST, help="メモリ使用量(KiB)の上限")
+    calibrate_parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM)
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        params = calibrate_password_hasher(args.target_ms, args.memory_cost, args.parallelism)
+        print(f"# ハッシュ化時間: {params['elapsed_ms']:.1f}ms (目標: {args.target_ms:.0f}ms)")
+        print(f"ARGON2_TIME_COST={params['time_cost']}")
+        print(f"ARGON2_MEMORY_COST={params['memory_cost']}")
+        print(f"ARGON2_PARALLELISM={params['parallelism']}")
+
+
+if __name__ == "__main__":
+    main()
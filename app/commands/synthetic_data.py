@@ -0,0 +1,56 @@
+"""
+性能検証用の合成データ管理コマンド
+
+プロジェクト・issue(階層構造)・ユーザ・工数の合成データをローカルのDBに登録する。
+合成データはIDがSYNTHETIC_ID_BASE以上の範囲に登録するため、既存のデータは変更しない。
+
+usage (appディレクトリで実行):
+    $ python -m commands.synthetic_data generate --scale medium
+    # 規模の一部を変更する場合
+    $ python -m commands.synthetic_data generate --scale small --users 50 --years 3
+    $ python -m commands.synthetic_data clear
+"""
+# 標準モジュール
+import os
+import sys
+import argparse
+import datetime as dt
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.synthetic_data import (
+    SYNTHETIC_SCALES, is_local_database_url, load_synthetic_dataset, clear_synthetic_dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能検証用の合成データ管理コマンド")
+    parser.add_argument("--allow-remote", action="store_true", help="ローカル以外のDBでも実行する")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="合成データを登録する (登録済みの合成データは置き換える)")
+    generate_parser.add_argument("--scale", choices=SYNTHETIC_SCALES.keys(), default="small")
+    for key in SYNTHETIC_SCALES["small"]:
+        generate_parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, help="規模の上書き")
+    generate_parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    generate_parser.add_argument("--end-date", type=dt.date.fromisoformat, help="工数を登録する最終日 (既定値は今日)")
+    subparsers.add_parser("clear", help="合成データを削除する")
+    args = parser.parse_args()
+
+    if not args.allow_remote and not is_local_database_url(os.environ["WORKLOAD_DATABASE_URI"]):
+        sys.exit("ローカル以外のDBが指定されています。実行する場合は--allow-remoteを指定してください。")
+
+    if args.command == "generate":
+        scale = { key: getattr(args, key) if getattr(args, key) is not None else value
+                  for key, value in SYNTHETIC_SCALES[args.scale].items() }
+        counts = load_synthetic_dataset(scale, seed=args.seed, end_date=args.end_date)
+        print("合成データを登録しました。 " + ", ".join(f"{key}: {value}" for key, value in counts.items()))
+    elif args.command == "clear":
+        clear_synthetic_dataset()
+        print("合成データを削除しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+工数検索用テーブル(workload_fact)の管理コマンド
+
+usage (appディレクトリで実行):
+    $ python -m commands.workload_facts rebuild
+"""
+# 標準モジュール
+import argparse
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.workload_facts import rebuild_workload_facts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工数検索用テーブルの管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="工数テーブルから工数検索用テーブルを再作成する")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        message = rebuild_workload_facts()
+        print(message["message"])
+
+
+if __name__ == "__main__":
+    main()
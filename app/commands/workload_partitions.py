@@ -0,0 +1,48 @@
+"""
+工数テーブル(workload)のパーティション管理コマンド
+
+usage (appディレクトリで実行):
+    $ python -m commands.workload_partitions create --months-ahead 3
+    $ python -m commands.workload_partitions explain --lower-date 2025-03-01 --upper-date 2025-03-31
+"""
+# 標準モジュール
+import argparse
+import datetime as dt
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.workload_partitions import (
+    WORKLOAD_PARTITION_MONTHS_AHEAD,
+    create_future_workload_partitions, explain_workload_fact_source_partitions,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工数テーブルのパーティション管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    create_parser = subparsers.add_parser("create", help="現在月から指定月数先までのパーティションを作成する")
+    create_parser.add_argument("--months-ahead", type=int, default=WORKLOAD_PARTITION_MONTHS_AHEAD,
+                               help="現在月から何か月先まで作成するか")
+    explain_parser = subparsers.add_parser("explain", help="workload_factの再作成時に参照されるパーティションを表示する")
+    explain_parser.add_argument("--target-date", type=dt.date.fromisoformat, default=None)
+    explain_parser.add_argument("--lower-date", type=dt.date.fromisoformat, default=None)
+    explain_parser.add_argument("--upper-date", type=dt.date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    if args.command == "create":
+        partition_names = create_future_workload_partitions(args.months_ahead)
+        print("\n".join(partition_names))
+    elif args.command == "explain":
+        condition = { "target_date": args.target_date,
+                      "lower_date": args.lower_date, "upper_date": args.upper_date }
+        partition_names = explain_workload_fact_source_partitions(condition)
+        print(f"参照パーティション数: {len(partition_names)}")
+        print("\n".join(partition_names))
+
+
+if __name__ == "__main__":
+    main()
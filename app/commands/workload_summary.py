@@ -0,0 +1,37 @@
+"""
+日次工数集計テーブル(workload_daily_summary)の管理コマンド
+
+usage (appディレクトリで実行):
+    $ python -m commands.workload_summary rebuild
+    $ python -m commands.workload_summary rebuild --lower-date 2025-01-01 --upper-date 2025-01-31
+"""
+# 標準モジュール
+import argparse
+import datetime as dt
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+
+# .env記載情報をロード (サービスモジュールのimport前に行う)
+load_dotenv()
+
+# プロジェクトモジュール
+from services.workload_summaries import rebuild_workload_daily_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日次工数集計テーブルの管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="工数テーブルから集計テーブルを再作成する")
+    rebuild_parser.add_argument("--lower-date", type=dt.date.fromisoformat, default=None,
+                                help="再作成する期間の開始日 (YYYY-MM-DD)")
+    rebuild_parser.add_argument("--upper-date", type=dt.date.fromisoformat, default=None,
+                                help="再作成する期間の終了日 (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        message = rebuild_workload_daily_summary(args.lower_date, args.upper_date)
+        print(message["message"])
+
+
+if __name__ == "__main__":
+    main()
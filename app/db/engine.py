@@ -0,0 +1,83 @@
+# 標準モジュール
+import os
+import logging
+import threading
+# サードパーティ製モジュール
+from sqlalchemy import create_engine, text, Engine
+# プロジェクトモジュール
+from services.metrics import MeasuredQueuePool, instrument_engine
+from services.slow_queries import instrument_slow_queries
+
+# ref:
+#    - https://docs.sqlalchemy.org/en/20/core/pooling.html
+
+logger = logging.getLogger(__name__)
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_workload_db_engine() -> Engine:
+    """
+    アプリ全体で共有するSQLAlchemyのエンジンを返す。(初回呼び出し時に環境変数から作成する)
+
+    コネクションプールの設定は下記の環境変数で指定する。
+        - DB_POOL_SIZE: 常時保持する接続数 (既定値5)
+        - DB_MAX_OVERFLOW: 一時的に追加で作成する接続数 (既定値10)
+        - DB_POOL_RECYCLE: 接続を作り直すまでの秒数 (既定値1800)
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    os.environ["WORKLOAD_DATABASE_URI"],
+                    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+                    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+                    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+                    pool_pre_ping=True,
+                    poolclass=MeasuredQueuePool,
+                )
+                instrument_engine(_engine)
+                instrument_slow_queries(_engine)
+    return _engine
+
+
+def warm_up_workload_db_pool(size: int) -> int:
+    """
+    コネクションプールに指定数の接続を事前に作成する。(起動直後のリクエストで接続を待たないようにする)
+
+    Attributes
+    ----------
+    size: int
+        作成する接続数 (DB_POOL_SIZEを超える分はプールに残らない)
+
+    Returns
+    -------
+    num_of_connections: int
+        作成できた接続数
+    """
+    engine = get_workload_db_engine()
+    connections = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning(f"DB接続の事前作成に失敗しました。: {e}")
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def dispose_workload_db_engine() -> None:
+    """
+    コネクションプールの接続を全て閉じる。(終了時に使用)
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
@@ -4,7 +4,7 @@ from decimal import Decimal
 import datetime as dt
 # サードパーティ製モジュール
 from typing_extensions import Annotated
-from sqlalchemy import ForeignKey, String, Numeric, BigInteger, Text
+from sqlalchemy import ForeignKey, String, Numeric, BigInteger, Text, Index
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, registry
 
 # ref:
@@ -84,17 +84,96 @@ class Issue(Base):
 class Workload(Base):
     """
     JIRA Subtaskに紐づく各人の工数情報を格納するテーブル
+    (work_dateで月毎にレンジパーティショニング。パーティションはworkload_YYYYMM)
     """
     __tablename__ = "workload"
+    __table_args__ = (
+        Index("ix_workload_user_id_work_date", "user_id", "work_date"),
+        {"postgresql_partition_by": "RANGE (work_date)"},
+    )
 
-    id: Mapped[bigint_type] = mapped_column(primary_key=True, index=True)
+    # パーティションキーを主キーに含める必要があるため、主キーは(id, work_date)
+    id: Mapped[bigint_type] = mapped_column(primary_key=True, autoincrement=True, index=True)
     subtask_id: Mapped[bigint_type] = mapped_column(ForeignKey("issue.id"))
     user_id: Mapped[bigint_type] = mapped_column(ForeignKey("user.id"))
-    work_date: Mapped[dt.date] = mapped_column(index=True)
+    work_date: Mapped[dt.date] = mapped_column(primary_key=True, index=True)
     workload_minute: Mapped[int]
     detail: Mapped[text_type]
     update_timestamp: Mapped[dt.datetime] = mapped_column(nullable=False, onupdate=dt.datetime.now)
     create_timestamp: Mapped[dt.datetime] = mapped_column(nullable=False, default=dt.datetime.now)
+    # 楽観的排他制御用のバージョン (更新ごとに+1。ETag/If-Matchで使用)
+    version: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")
+
+
+class WorkloadDailySummary(Base):
+    """
+    ユーザ・subtask・作業日ごとに工数を集計したテーブル (workload登録/更新/削除時に同一トランザクションで更新)
+    """
+    __tablename__ = "workload_daily_summary"
+
+    user_id: Mapped[bigint_type] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    subtask_id: Mapped[bigint_type] = mapped_column(ForeignKey("issue.id"), primary_key=True)
+    work_date: Mapped[dt.date] = mapped_column(primary_key=True, index=True)
+    workload_minute: Mapped[bigint_type] = mapped_column(nullable=False, default=0)
+    workload_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    update_timestamp: Mapped[dt.datetime] = mapped_column(nullable=False, default=dt.datetime.now, onupdate=dt.datetime.now)
+
+
+class WorkloadFact(Base):
+    """
+    工数検索用に、工数とproject, issue(第1, 第2階層), subtask, userの情報を非正規化したテーブル
+    (工数の登録/更新/削除時およびJira情報の同期時に更新)
+    """
+    __tablename__ = "workload_fact"
+    __table_args__ = (
+        Index("ix_workload_fact_user_id_work_date", "user_id", "work_date"),
+    )
+
+    workload_id: Mapped[bigint_type] = mapped_column(primary_key=True, autoincrement=False)
+    work_date: Mapped[dt.date] = mapped_column(index=True)
+    workload_minute: Mapped[int]
+    detail: Mapped[text_type]
+    user_id: Mapped[bigint_type] = mapped_column()
+    user_name: Mapped[Optional[str]] = mapped_column(String(60))
+    subtask_id: Mapped[bigint_type] = mapped_column()
+    subtask_name: Mapped[Optional[str]] = mapped_column(String(50))
+    path: Mapped[Optional[str]]
+    project_id: Mapped[bigint_type] = mapped_column(nullable=True)
+    project_name: Mapped[Optional[str]] = mapped_column(String(100))
+    project_is_target: Mapped[Optional[bool]]
+    issue_id_1: Mapped[bigint_type] = mapped_column(nullable=True)
+    issue_name_1: Mapped[Optional[str]] = mapped_column(String(50))
+    issue_id_2: Mapped[bigint_type] = mapped_column(nullable=True)
+    issue_name_2: Mapped[Optional[str]] = mapped_column(String(50))
+    update_timestamp: Mapped[dt.datetime]
+    create_timestamp: Mapped[dt.datetime]
+
+
+class LoginThrottleBucket(Base):
+    """
+    ログイン試行回数制限(トークンバケット)の状態を複数ワーカーで共有するテーブル
+    (消えても制限がリセットされるだけのため、WALを出力しないUNLOGGEDテーブルとする)
+    """
+    __tablename__ = "login_throttle_bucket"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    tokens: Mapped[float]
+    capacity: Mapped[float]
+    refill_per_second: Mapped[float]
+    updated_at: Mapped[dt.datetime] = mapped_column(index=True)
+
+
+class JiraSyncStatus(Base):
+    """
+    Jira情報の全更新が最後に成功した日時 (全ワーカーのreadinessで同期からの経過時間を返却するため)
+    """
+    __tablename__ = "jira_sync_status"
+
+    target: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_succeeded_at: Mapped[dt.datetime]
+    num_of_projects: Mapped[int]
+    num_of_issues: Mapped[int]
 
 
 # マイグレーション時はコメントアウトすること
@@ -1,5 +1,7 @@
 # 標準モジュール
 import os
+import logging
+from contextlib import asynccontextmanager
 # サードパーティ製モジュール
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Depends
@@ -7,18 +9,38 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_csrf_protect import CsrfProtect
 from fastapi_csrf_protect.exceptions import CsrfProtectError
+from starlette.concurrency import run_in_threadpool
 from argon2.exceptions import VerifyMismatchError
 import uvicorn
+import anyio.to_thread
 # プロジェクトモジュール
 from api.current import (
-    auth, users, projects, issues, workloads)
+    auth, users, projects, issues, workloads, metrics, health)
+from middlewares.compression import CompressionMiddleware
+from middlewares.metrics import MetricsMiddleware
+from middlewares.server_timing import ServerTimingMiddleware, TimedJSONResponse
 from models.auth import CsrfSettings
-from services.custom_exceptions import LoginError, SignupError, JwtTokenError
+from db.engine import warm_up_workload_db_pool, dispose_workload_db_engine
+from services.health import cache_warm_state
+from services.user_cache import user_cache
+from services.metrics import metrics_store
+from services.custom_exceptions import (
+    LoginError, SignupError, JwtTokenError, WorkloadConflictError, WorkloadDateOutOfRangeError,
+    LoginThrottledError)
 
 
 # .env記載情報をロード
 load_dotenv()
 
+# 同期エンドポイント(def)を実行するスレッドプールのサイズ (anyioの既定値は40)
+SYNC_THREADPOOL_SIZE = int(os.getenv("SYNC_THREADPOOL_SIZE", "40"))
+# 起動時に事前作成するDB接続数 (0の場合は作成しない)
+DB_POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", os.getenv("DB_POOL_SIZE", "5")))
+# 起動時にユーザ情報・参照系データを事前に読み込むか
+STARTUP_PRIME_CACHES = os.getenv("STARTUP_PRIME_CACHES", "true").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
 # csrf-protect設定
 @CsrfProtect.load_config
 def get_csrf_config():
@@ -32,21 +54,59 @@ user_router = users.router
 project_router = projects.router
 issue_router = issues.router
 workload_router = workloads.router
+metrics_router = metrics.router
+health_router = health.router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    ワーカー起動・終了時の処理
+    DB接続の事前作成とキャッシュの事前読み込みが完了してからリクエストを受け付ける。
+    (DBに接続できない場合も起動は継続し、最初のリクエスト時に接続する)
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = SYNC_THREADPOOL_SIZE
+    if metrics_store is not None:
+        metrics_store.start()
+    if DB_POOL_WARM_SIZE > 0:
+        num_of_connections = await run_in_threadpool(warm_up_workload_db_pool, DB_POOL_WARM_SIZE)
+        logger.info(f"DB接続を{num_of_connections}件事前に作成しました。")
+    if STARTUP_PRIME_CACHES:
+        # 失敗した場合はreadinessで503を返し、DBに接続できた時点で再実行する
+        try:
+            await run_in_threadpool(cache_warm_state.warm)
+            logger.info(f"ユーザ情報を{len(user_cache)}件事前に読み込みました。")
+        except Exception as e:
+            logger.warning(f"キャッシュの事前読み込みに失敗しました。: {e}")
+    else:
+        cache_warm_state.disable()
+    yield
+    dispose_workload_db_engine()
+
 
 # FastAPIインスタンス
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 工数の楽観的排他制御でETag、ログイン試行回数制限でRetry-After、処理時間の内訳でServer-Timingを参照するため
+    expose_headers=["ETag", "Retry-After", "Server-Timing"],
 )
+# レスポンス圧縮 (br, zstd, gzip)
+app.add_middleware(CompressionMiddleware)
+# ルートごとのリクエスト数・処理時間の計測 (圧縮を含めて計測するため最後に追加する)
+app.add_middleware(MetricsMiddleware)
+# 処理段階ごとの所要時間をServer-Timingヘッダで返却 (圧縮を含めた全体時間とするため最後に追加する)
+app.add_middleware(ServerTimingMiddleware)
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(project_router)
 app.include_router(issue_router)
 app.include_router(workload_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 
 # Exception Handler
@@ -66,6 +126,13 @@ async def login_exception_handler(request: Request, exc: LoginError):
         status_code=403,
         content={"message": f"ログイン失敗しました。\nError message: {str(exc)}"},)
 
+@app.exception_handler(LoginThrottledError)
+async def login_throttled_exception_handler(request: Request, exc: LoginThrottledError):
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"message": f"ログイン失敗しました。\nError message: {str(exc)}"},)
+
 @app.exception_handler(SignupError)
 async def signup_exception_handler(request: Request, exc: SignupError):
     return JSONResponse(
@@ -78,6 +145,18 @@ async def jwt_exception_handler(request: Request, exc: JwtTokenError):
         status_code=403,
         content={"message": f"Error message: {str(exc)}"},)
 
+@app.exception_handler(WorkloadConflictError)
+async def workload_conflict_exception_handler(request: Request, exc: WorkloadConflictError):
+    return JSONResponse(
+        status_code=412,
+        content={"message": f"工数情報の更新に失敗しました。\nError message: {str(exc)}"},)
+
+@app.exception_handler(WorkloadDateOutOfRangeError)
+async def workload_date_out_of_range_exception_handler(request: Request, exc: WorkloadDateOutOfRangeError):
+    return JSONResponse(
+        status_code=400,
+        content={"message": f"工数情報の登録に失敗しました。\nError message: {str(exc)}"},)
+
 @app.exception_handler(Exception)
 async def signup_exception_handler(request: Request, exc: Exception):
     return JSONResponse(
@@ -87,7 +166,8 @@ async def signup_exception_handler(request: Request, exc: Exception):
 
 
 
-# メイン処理の場合はuvicornを立ち上げる。 ref: https://www.uvicorn.org/#running-programmatically
+# メイン処理の場合はuvicornを立ち上げる。(開発用。本番環境はserver.pyを使用する)
+# ref: https://www.uvicorn.org/#running-programmatically
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
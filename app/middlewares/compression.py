@@ -0,0 +1,217 @@
+# 標準モジュール
+import os
+import zlib
+# サードパーティ製モジュール
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+# brotli, zstdは任意 (pip install brotli / pip install zstandard)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 圧縮する最小サイズ(byte) (ストリーミングレスポンスは常に圧縮する)
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+# 圧縮レベル
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6"))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "4"))
+RESPONSE_COMPRESSION_ZSTD_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", "3"))
+
+# 圧縮対象のContent-Type (SSEは1イベントが小さく、遅延を避けるため対象外)
+COMPRESSIBLE_CONTENT_TYPES: list[str] = [
+    "application/json", "text/csv", "text/plain", "text/html", "application/xml", "application/javascript",
+    "application/vnd.apache.arrow.stream" ]
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> list[str]:
+    """
+    利用可能な圧縮方式を優先順で返す。
+    """
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def select_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """
+    Accept-Encodingヘッダから使用する圧縮方式を選択する。
+    q値が最も大きいものを選択し、同じ場合はサーバ側の優先順(encodings)とする。
+
+    Attributes
+    ----------
+    accept_encoding: str
+        Accept-Encodingヘッダの値
+    encodings: list[str]
+        利用可能な圧縮方式 (優先順)
+
+    Returns
+    -------
+    encoding: str | None
+        圧縮しない場合はNone
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = [ (qualities.get(encoding, wildcard), -idx, encoding)
+                   for idx, encoding in enumerate(encodings) ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encodingに応じてレスポンスをbrotli, zstd, gzipで圧縮するASGIミドルウェア
+    (starlette.middleware.gzip.GZipMiddlewareをbrotli, zstdに対応させたもの)
+
+    ボディが1回で送信されるレスポンスは最小サイズ以上の場合のみ圧縮する。
+    ストリーミングレスポンス(CSV出力など)はチャンクごとに圧縮してフラッシュする。
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE,
+                 gzip_level: int = RESPONSE_COMPRESSION_GZIP_LEVEL,
+                 brotli_quality: int = RESPONSE_COMPRESSION_BROTLI_QUALITY,
+                 zstd_level: int = RESPONSE_COMPRESSION_ZSTD_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+        self.compressor_factories = {
+            "gzip": lambda: GzipCompressor(gzip_level),
+            "br": lambda: BrotliCompressor(brotli_quality),
+            "zstd": lambda: ZstdCompressor(zstd_level),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(send, encoding, self.compressor_factories[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """
+    1リクエスト分のレスポンスを圧縮して送信する。
+    """
+    def __init__(self, send: Send, encoding: str, compressor_factory, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+        self.initial_message: Message | None = None
+        self.compressor = None
+        self.passthrough = False
+
+    def is_compressible(self, headers: MutableHeaders) -> bool:
+        if self.initial_message["status"] < 200 or self.initial_message["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in COMPRESSIBLE_CONTENT_TYPES
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.initial_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        # 最初のボディ送信時に圧縮するかどうかを決定する
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if not self.is_compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                if self.is_compressible(headers):
+                    headers.add_vary_header("Accept-Encoding")
+                self.passthrough = True
+                await self._send(self.initial_message)
+                await self._send(message)
+                return
+
+            self.compressor = self.compressor_factory()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.initial_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self._send(self.initial_message)
+
+        if more_body:
+            body = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            body = self.compressor.compress(body) + self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
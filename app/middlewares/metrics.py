@@ -0,0 +1,41 @@
+# 標準モジュール
+import time
+# サードパーティ製モジュール
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+# プロジェクトモジュール
+from services.metrics import metrics_registry
+
+
+class MetricsMiddleware:
+    """
+    ルートごとのリクエスト数(ステータス別)と処理時間を記録するASGIミドルウェア
+
+    ラベルにはパスのテンプレート(例: /api/workload/{workload_id})を使用し、
+    どのルートにも一致しないリクエストはunmatchedとして集計する。
+    処理時間はレスポンスのボディを送信し終えるまで(ストリーミングを含む)とする。
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            metrics_registry.observe("http_request_duration_seconds", (method, route_path), time.perf_counter() - start)
+            metrics_registry.inc("http_requests_total", (method, route_path, str(status_code)))
@@ -0,0 +1,133 @@
+# 標準モジュール
+import os
+import json
+import time
+import asyncio
+import logging
+import functools
+from collections.abc import Callable
+# サードパーティ製モジュール
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+# プロジェクトモジュール
+from services.request_timing import RequestTiming, current_request_timing, add_stage_time, measure_stage
+
+# Server-Timingヘッダを付与するか
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# リクエストごとの所要時間をJSON形式でログ出力するか
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    リクエストの処理段階(JWT検証, SQL実行, 変換, レスポンスモデルの検証, JSONエンコード)ごとの
+    所要時間をServer-Timingヘッダで返すASGIミドルウェア
+
+    各段階の時間はservices.request_timingのcurrent_request_timingに加算されたものを出力する。
+    ヘッダはレスポンス開始時点の値のため、ストリーミングレスポンスのボディ送信中の時間は含まない。
+    """
+    def __init__(self, app: ASGIApp, enabled: bool = SERVER_TIMING_ENABLED, log: bool = SERVER_TIMING_LOG):
+        self.app = app
+        self.enabled = enabled
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (self.enabled or self.log):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_request_timing.set(timing)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.enabled:
+                    MutableHeaders(scope=message).append("Server-Timing", timing.to_server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_timing.reset(token)
+            if self.log:
+                route = scope.get("route")
+                logger.info(json.dumps({
+                    "method": scope["method"], "path": scope["path"],
+                    "route": getattr(route, "path", None), "status": status_code,
+                    **timing.to_dict() }, ensure_ascii=False))
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONエンコードの所要時間をencodeとして計測するJSONResponse (アプリの既定のレスポンスクラス)
+    """
+    def render(self, content) -> bytes:
+        with measure_stage("encode"):
+            return super().render(content)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """
+    エンドポイント関数の所要時間をendpointとして計測し、終了時刻を記録する。
+    (FastAPIが引数を解析できるよう、シグネチャと同期/非同期の別は元の関数に合わせる)
+    """
+    def finish(start: float) -> None:
+        add_stage_time("endpoint", time.perf_counter() - start)
+        timing = current_request_timing.get()
+        if timing is not None:
+            timing.endpoint_finished_at = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finish(start)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            finish(start)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    エンドポイントの所要時間と、その後のレスポンスモデルの検証時間(validate)を計測するルート
+    (各routerのroute_classに指定する)
+
+    validateはエンドポイント終了からレスポンス作成までの時間から、JSONエンコード(encode)の時間を除いたもの。
+    """
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            encode_before = 0.0
+            timing = current_request_timing.get()
+            if timing is not None:
+                encode_before = timing.durations.get("encode", 0.0)
+            response = await handler(request)
+            if timing is not None and timing.endpoint_finished_at is not None:
+                serialize = time.perf_counter() - timing.endpoint_finished_at
+                encode = timing.durations.get("encode", 0.0) - encode_before
+                timing.add("validate", max(serialize - encode, 0.0))
+            return response
+
+        return timed_handler
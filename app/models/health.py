@@ -0,0 +1,56 @@
+# 標準モジュール
+import datetime as dt
+from typing import Optional
+# サードパーティ製モジュール
+from pydantic import BaseModel
+
+
+class Liveness(BaseModel):
+    status: str
+    pid: int
+
+
+class DatabaseHealth(BaseModel):
+    status: str
+    latency_ms: Optional[float]
+    detail: Optional[str]
+
+
+class DbPoolHealth(BaseModel):
+    size: int
+    max_overflow: int
+    in_use: int
+    idle: int
+    waiting: int
+    utilization: float
+    saturated: bool
+
+
+class ThreadpoolHealth(BaseModel):
+    size: int
+    in_use: int
+    saturated: bool
+
+
+class JiraSyncHealth(BaseModel):
+    last_succeeded_at: Optional[dt.datetime]
+    age_seconds: Optional[float]
+
+
+class CacheHealth(BaseModel):
+    status: str
+    warmed_at: Optional[dt.datetime]
+    detail: Optional[str]
+    users: int
+    workload_searches: int
+
+
+class Readiness(BaseModel):
+    status: str
+    reasons: list[str]
+    pid: int
+    database: DatabaseHealth
+    db_pool: DbPoolHealth
+    threadpool: ThreadpoolHealth
+    jira_sync: JiraSyncHealth
+    caches: CacheHealth
@@ -0,0 +1,14 @@
+# 標準モジュール
+import datetime as dt
+from typing import Any, Optional
+# サードパーティ製モジュール
+from pydantic import BaseModel
+
+
+class SlowQuery(BaseModel):
+    timestamp: dt.datetime
+    duration_ms: float
+    sql: str
+    parameters: Optional[Any]
+    call_site: Optional[str]
+    explain: Optional[str]
@@ -1,5 +1,6 @@
 # 標準モジュール
 import datetime as dt
+from typing import Literal, Optional
 # サードパーティ製モジュール
 from pydantic import BaseModel
 
@@ -32,3 +33,17 @@ class UserFormBody(BaseModel):
     first_name: str
     email: str
     password: str
+
+
+class UserImportRowResult(BaseModel):
+    row: int
+    email: Optional[str]
+    status: Literal["created", "duplicate", "invalid"]
+    message: Optional[str]
+    user_id: Optional[int]
+
+
+class UserImportResult(BaseModel):
+    created: int
+    skipped: int
+    results: list[UserImportRowResult]
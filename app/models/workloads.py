@@ -1,5 +1,5 @@
 # 標準モジュール
-from typing import Optional
+from typing import Any, Literal, Optional
 import datetime as dt
 # サードパーティ製モジュール
 from pydantic import BaseModel
@@ -14,6 +14,7 @@ class WorkloadInfoFromDB(BaseModel):
     detail: str
     update_timestamp: dt.datetime
     create_timestamp: dt.datetime
+    version: int
 
 
 class WorkloadForm(BaseModel):
@@ -52,3 +53,83 @@ class RegisteredWorkload(BaseModel):
     detail: str
     update_timestamp: dt.datetime
     create_timestamp: dt.datetime
+
+
+class WorkloadBatchEntry(BaseModel):
+    subtask_id: int
+    work_date: dt.date
+    workload_minute: int
+    detail: str
+
+
+class WorkloadBatchUpdateEntry(WorkloadBatchEntry):
+    id: int
+    # 取得時のバージョン (指定した場合、他で更新されていれば失敗とする)
+    version: Optional[int] = None
+
+
+class WorkloadBatchForm(BaseModel):
+    user_id: int
+    lower_date: dt.date
+    upper_date: dt.date
+    inserts: list[WorkloadBatchEntry] = []
+    updates: list[WorkloadBatchUpdateEntry] = []
+    deletes: list[int] = []
+
+
+class WorkloadBatchItemResult(BaseModel):
+    operation: str # insert, update, delete
+    index: int     # リクエスト内の各リストでの位置
+    workload_id: int | None
+    status: str    # inserted, updated, unchanged, deleted, failed
+    message: str | None = None
+
+
+class WorkloadBatchResult(BaseModel):
+    message: str
+    results: list[WorkloadBatchItemResult]
+
+
+# 工数集計の集約軸
+AggregateDimension = Literal["user", "project", "root_issue", "subtask", "day", "week", "month"]
+
+
+class WorkloadAggregateCondition(BaseModel):
+    lower_date: dt.date
+    upper_date: dt.date
+    group_by: list[AggregateDimension]
+    specify_user_id: Optional[int] = None
+    project_id: Optional[int] = None
+    is_target_project: Optional[bool] = None
+    workload_id: Optional[int] = None
+    detail: Optional[str] = None
+    with_rollup: bool = False
+
+
+class WorkloadAggregateResult(BaseModel):
+    group_by: list[AggregateDimension]
+    columns: list[str]
+    rows: list[list[Any]]
+
+
+class WorkloadMatrixCondition(BaseModel):
+    lower_date: dt.date
+    upper_date: dt.date
+    by_project: bool = False
+    project_id: Optional[int] = None
+    is_target_project: Optional[bool] = None
+
+
+class MatrixLabel(BaseModel):
+    id: int
+    name: str
+
+
+class WorkloadMatrix(BaseModel):
+    lower_date: dt.date
+    upper_date: dt.date
+    shape: list[int]                        # [ユーザ数, 日数] or [ユーザ数, 日数, プロジェクト数]
+    users: list[MatrixLabel]
+    days: list[dt.date]
+    projects: list[MatrixLabel] | None
+    values: list[int]                       # 工数(分)を行優先(C order)で平坦化したもの
@@ -0,0 +1,96 @@
+"""
+本番環境用の起動スクリプト (開発時はmain.pyを使用する)
+
+CPU数に応じた数のワーカープロセスを起動し、uvloop/httptoolsで処理する。
+設定は環境変数(.env)で行う。
+
+usage (appディレクトリで実行):
+    $ python server.py
+    # ワーカーを1つずつ再起動する (リクエストを受け付けたままコードや設定を反映する)
+    $ kill -HUP <server.pyのPID>
+    # ワーカー数の増減
+    $ kill -TTIN <server.pyのPID>
+    $ kill -TTOU <server.pyのPID>
+"""
+# 標準モジュール
+import os
+import shutil
+import logging
+import tempfile
+import importlib.util
+# サードパーティ製モジュール
+from dotenv import load_dotenv
+import uvicorn
+
+# .env記載情報をロード
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpu_count() -> int:
+    """
+    このプロセスが使用できるCPU数を返す。(コンテナ等でCPUを制限している場合はその数)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def build_server_config() -> dict:
+    """
+    環境変数からuvicornの起動設定を作成する。
+
+    Returns
+    -------
+    config: dict
+        uvicorn.runの引数
+    """
+    workers = int(os.getenv("WEB_CONCURRENCY", str(available_cpu_count())))
+    graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    max_requests = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+    return {
+        "host": os.getenv("SERVER_HOST", os.getenv("FAST_API_HOST", "0.0.0.0")),
+        "port": int(os.getenv("SERVER_PORT", "8000")),
+        "workers": workers,
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        # 接続待ちキューの長さ
+        "backlog": int(os.getenv("SERVER_BACKLOG", "2048")),
+        # Keep-Aliveの待機時間(秒) (リバースプロキシのタイムアウトより長くする)
+        "timeout_keep_alive": int(os.getenv("SERVER_KEEP_ALIVE", "65")),
+        # 終了・再起動時に処理中のリクエストを待つ時間(秒)
+        "timeout_graceful_shutdown": graceful_timeout,
+        # 指定リクエスト数を処理したワーカーを再起動する (0の場合は再起動しない)
+        "limit_max_requests": max_requests or None,
+        # リバースプロキシのX-Forwarded-For等を信頼する接続元
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "access_log": os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true",
+    }
+
+
+def main():
+    config = build_server_config()
+    if config["workers"] > 1:
+        # プロセス内のキャッシュは他ワーカーの更新で無効化されず(有効期限も無い)、古い検索結果を返し続けるため、
+        # .env等で指定されていても無効にする
+        if os.getenv("WORKLOAD_SEARCH_CACHE_SIZE", "0") not in ("", "0"):
+            logger.warning("複数ワーカーで起動するため、WORKLOAD_SEARCH_CACHE_SIZEを0(キャッシュ無効)にします。")
+        os.environ["WORKLOAD_SEARCH_CACHE_SIZE"] = "0"
+        if os.getenv("LOGIN_THROTTLE_BACKEND", "memory") == "memory":
+            logger.warning("LOGIN_THROTTLE_BACKEND=memoryのため、ログイン試行回数はワーカーごとに制限されます。")
+        # /metricsで全ワーカーの合算値を返すため、ワーカー間で共有するディレクトリを指定する
+        # (.envで空文字が指定された場合も未指定として扱う)
+        if not os.getenv("METRICS_MULTIPROC_DIR"):
+            os.environ["METRICS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), "workload_metrics")
+    # 前回起動時のワーカーのメトリクスを破棄する
+    metrics_dir = os.getenv("METRICS_MULTIPROC_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+    uvicorn.run("main:app", **config)
+
+
+if __name__ == "__main__":
+    main()
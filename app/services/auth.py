@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 import jwt
 # プロジェクトモジュール
 from services.custom_exceptions import JwtTokenError
+from services.user_cache import jwt_claims_cache
+from services.request_timing import timed_stage
 
 # 環境変数の読み込み
 load_dotenv()
@@ -39,9 +41,14 @@ class Auth_Utils():
     def decode_jwt(self, token) -> str:
         """
         jwtトークンをデコードし、適切なものだった場合subキーに格納されている文字列(user_id)を返す。
+        (検証済みのトークンは有効期限(exp)までキャッシュし、署名検証を省略する)
         """
+        subject = jwt_claims_cache.get(token)
+        if subject is not None:
+            return subject
         try:
             payload = jwt.decode(token, SECRET_KEY_JWT_TOKEN, algorithms=["HS256"])
+            jwt_claims_cache.set(token, payload["sub"], payload["exp"])
             return payload["sub"]
         except jwt.ExpiredSignatureError:
             raise JwtTokenError(
@@ -50,6 +57,7 @@ class Auth_Utils():
             raise JwtTokenError(status_code=401, detail=f"不正なJWTトークンです。\nError message: {e}")
 
 
+    @timed_stage("auth")
     def verify_jwt(self, request) -> int:
         """
         jwtトークンを検証し、適切な場合emailを返す。
@@ -0,0 +1,204 @@
+# 標準モジュール
+import os
+import json
+import time
+import random
+import platform
+import statistics
+import subprocess
+import datetime as dt
+from collections.abc import Callable
+# プロジェクトモジュール
+from services.jira_contents import (
+    create_project_issue_hierarchical_structure_df, fetch_all_subtasks_with_path_from_db,
+    upsert_jira_issues_into_app_db)
+from services.workloads import fetch_specify_condition_workloads_from_db
+from services.workload_search_cache import workload_search_cache
+from services.synthetic_data import (
+    SYNTHETIC_ID_BASE, SYNTHETIC_SCALES, generate_projects, generate_issues, load_synthetic_dataset)
+
+# 計測結果の保存先 (リポジトリ直下のbenchmarks/results)
+BENCHMARK_RESULTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "benchmarks", "results")
+# 比較時に遅くなったとみなす比率 (head / base)
+BENCHMARK_REGRESSION_RATIO = 1.2
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict:
+    """
+    関数をrepeat回実行し、実行時間(ミリ秒)の統計値を返す。(setupの実行時間は含めない)
+
+    Returns
+    -------
+    stats: dict
+        key: runs, min_ms, median_ms, p95_ms, max_ms
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(durations[0], 3),
+        "median_ms": round(statistics.median(durations), 3),
+        "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+        "max_ms": round(durations[-1], 3),
+    }
+
+
+def build_benchmark_cases(scale: dict, end_date: dt.date,
+                          seed: int = 0) -> dict[str, tuple[Callable | None, Callable]]:
+    """
+    計測対象の処理を返す。
+
+    Attributes
+    ----------
+    scale: dict
+    end_date: date
+        工数を登録した最終日
+    seed: int
+        合成データ登録時(load_synthetic_dataset)の乱数のシード
+        (同じシードで登録済みのissueを再作成し、同期時の変更を名称変更の1割のみにする)
+
+    Returns
+    -------
+    cases: dict[str, tuple[setup, func]]
+        key: 計測名
+    """
+    now = dt.datetime.now()
+    issues = generate_issues(scale, generate_projects(scale, now), random.Random(seed), now)
+    num_of_runs = 0
+
+    def prepare_issue_changes():
+        # Jiraからの同期を想定し、毎回1割のissueの名称を変更する
+        nonlocal num_of_runs
+        num_of_runs += 1
+        for idx, issue in enumerate(issues):
+            if idx % 10 == num_of_runs % 10:
+                issue["name"] = f"{issue['type']}{issue['id'] - SYNTHETIC_ID_BASE}-{num_of_runs}"
+
+    month_condition = { "lower_date": end_date.replace(day=1), "upper_date": end_date }
+    user_year_condition = { "specify_user_id": SYNTHETIC_ID_BASE, "lower_date": end_date - dt.timedelta(days=365),
+                            "upper_date": end_date }
+    return {
+        "create_project_issue_hierarchical_structure_df": (None, create_project_issue_hierarchical_structure_df),
+        "fetch_specify_condition_workloads_from_db[month]": (
+            workload_search_cache.clear, lambda: fetch_specify_condition_workloads_from_db(month_condition)),
+        "fetch_specify_condition_workloads_from_db[user_year]": (
+            workload_search_cache.clear, lambda: fetch_specify_condition_workloads_from_db(user_year_condition)),
+        "upsert_jira_issues_into_app_db": (prepare_issue_changes, lambda: upsert_jira_issues_into_app_db(issues)),
+        "fetch_all_subtasks_with_path_from_db": (None, fetch_all_subtasks_with_path_from_db),
+    }
+
+
+def current_git_revision() -> str:
+    """
+    計測したコードのコミット(短縮形)を返す。(未コミットの変更がある場合は-dirtyを付与)
+    """
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(scale_names: list[str], repeat: int = 5, seed: int = 0,
+                   end_date: dt.date | None = None, log: Callable[[str], None] = print) -> dict:
+    """
+    規模ごとに合成データを登録し、各処理の実行時間を計測する。
+
+    Attributes
+    ----------
+    scale_names: list[str]
+        SYNTHETIC_SCALESのキー
+    repeat: int
+        各処理の実行回数
+    seed: int
+        合成データの乱数のシード
+    end_date: date | None
+        工数を登録する最終日 (既定値は今日)
+    log: Callable[[str], None]
+        進捗の出力先
+
+    Returns
+    -------
+    result: dict
+        key: revision, created_at, python, repeat, seed, scales (規模ごとのデータ件数と計測結果)
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    end_date = end_date or dt.date.today()
+    result = {
+        "revision": current_git_revision(), "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "repeat": repeat, "seed": seed, "scales": {},
+    }
+    for scale_name in scale_names:
+        scale = SYNTHETIC_SCALES[scale_name]
+        log(f"[{scale_name}] 合成データを登録しています。")
+        counts = load_synthetic_dataset(scale, seed=seed, end_date=end_date)
+        cases = {}
+        for case_name, (setup, func) in build_benchmark_cases(scale, end_date, seed).items():
+            # 1回目はプランキャッシュ・接続作成の影響を除くため計測しない
+            if setup is not None:
+                setup()
+            func()
+            cases[case_name] = measure(func, repeat, setup)
+            log(f"[{scale_name}] {case_name}: median {cases[case_name]['median_ms']}ms")
+        result["scales"][scale_name] = { "scale": scale, "counts": counts, "cases": cases }
+    return result
+
+
+def save_benchmark_result(result: dict, directory: str = BENCHMARK_RESULTS_DIR) -> str:
+    """
+    計測結果を{日時}_{コミット}.jsonとして保存し、パスを返す。
+    """
+    os.makedirs(directory, exist_ok=True)
+    created_at = result["created_at"].replace(":", "").replace("-", "")
+    path = os.path.join(directory, f"{created_at}_{result['revision']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def compare_benchmark_results(base: dict, head: dict, threshold: float = BENCHMARK_REGRESSION_RATIO) -> list[dict]:
+    """
+    2つの計測結果の中央値を比較する。(両方に存在する規模・処理のみ)
+
+    Attributes
+    ----------
+    base: dict
+        比較元の計測結果
+    head: dict
+        比較先の計測結果
+    threshold: float
+        遅くなったとみなす比率
+
+    Returns
+    -------
+    rows: list[dict]
+        key: scale, case, base_ms, head_ms, ratio, is_regression
+    """
+    rows = []
+    for scale_name, head_scale in head["scales"].items():
+        base_scale = base["scales"].get(scale_name)
+        if base_scale is None:
+            continue
+        for case_name, head_stats in head_scale["cases"].items():
+            base_stats = base_scale["cases"].get(case_name)
+            if base_stats is None:
+                continue
+            ratio = head_stats["median_ms"] / base_stats["median_ms"] if base_stats["median_ms"] > 0 else 1.0
+            rows.append({
+                "scale": scale_name, "case": case_name,
+                "base_ms": base_stats["median_ms"], "head_ms": head_stats["median_ms"],
+                "ratio": round(ratio, 3), "is_regression": ratio >= threshold })
+    return rows
@@ -0,0 +1,126 @@
+# 標準モジュール
+from collections.abc import Sequence
+# サードパーティ製モジュール
+import pandas as pd
+# Arrow/Parquet出力は任意 (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 列指向形式のMIMEタイプ
+COLUMNAR_MEDIA_TYPES: dict[str, str] = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def is_columnar_format_available() -> bool:
+    """
+    Arrow/Parquet出力が可能か(pyarrowがインストールされているか)を返す。
+    """
+    return pa is not None
+
+
+def negotiate_columnar_format(accept: str | None, requested: str | None = None) -> str | None:
+    """
+    レスポンス形式を決定する。クエリパラメータ(file_format)の指定を優先し、無ければAcceptヘッダから判定する。
+    (pyarrow未インストールの場合、Acceptヘッダによる指定はJSONとして扱う)
+
+    Attributes
+    ----------
+    accept: str | None
+        Acceptヘッダの値
+    requested: str | None
+        クエリパラメータで指定された形式 (json, arrow, parquet)
+
+    Returns
+    -------
+    format: str | None
+        arrow, parquet (JSONの場合はNone)
+    """
+    if requested is not None:
+        return None if requested == "json" else requested
+    if accept is None or not is_columnar_format_available():
+        return None
+
+    # q値の大きい順(同じ場合は*/*より具体的な指定を優先し、その次は記載順)に判定する
+    candidates = []
+    for idx, item in enumerate(accept.split(",")):
+        media_type, *params = [ part.strip() for part in item.split(";") ]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            media_type = media_type.lower()
+            candidates.append((-quality, media_type == "*/*", idx, media_type))
+
+    formats = { media_type: fmt for fmt, media_type in COLUMNAR_MEDIA_TYPES.items() }
+    for *_, media_type in sorted(candidates):
+        if media_type in formats:
+            return formats[media_type]
+        if media_type in ("application/json", "*/*"):
+            return None
+    return None
+
+
+def rows_to_arrow_table(columns: list[str], rows: Sequence[Sequence]):
+    """
+    クエリ結果(カラム名と行のタプル)から、行ごとのdictを作らずに列単位でArrowのテーブルを作成する。
+
+    Attributes
+    ----------
+    columns: list[str]
+    rows: Sequence[Sequence]
+
+    Returns
+    -------
+    table: pyarrow.Table
+    """
+    if len(rows) == 0:
+        return pa.table({ column: pa.array([], type=pa.null()) for column in columns })
+    values = list(zip(*rows))
+    return pa.table({ column: pa.array(values[idx]) for idx, column in enumerate(columns) })
+
+
+def dataframe_to_arrow_table(df: pd.DataFrame):
+    """
+    DataFrameからArrowのテーブルを作成する。
+    """
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def serialize_arrow_table(table, fmt: str) -> bytes:
+    """
+    Arrowのテーブルを指定形式(arrow: IPCストリーム, parquet)のbytesに変換する。
+
+    Attributes
+    ----------
+    table: pyarrow.Table
+    fmt: str
+        arrow, parquet
+
+    Returns
+    -------
+    content: bytes
+
+    Exception
+    ---------
+    - pyarrowが未インストール
+    """
+    if pa is None:
+        raise RuntimeError("Arrow/Parquet出力にはpyarrowのインストールが必要です。")
+
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -18,3 +18,26 @@ class JwtTokenError(Exception):
     JWTトークンに関わるException
     """
     pass
+
+
+class WorkloadConflictError(Exception):
+    """
+    工数の更新時に、指定したバージョン(If-Match)が登録済みのバージョンと一致しない場合のException
+    """
+    pass
+
+
+class WorkloadDateOutOfRangeError(Exception):
+    """
+    工数の作業日が、パーティションを自動作成できる期間外で、かつパーティションが未作成の場合のException
+    """
+    pass
+
+
+class LoginThrottledError(Exception):
+    """
+    ログイン試行回数が上限を超えた場合のException (retry_after: 再試行可能になるまでの秒数)
+    """
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
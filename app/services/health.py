@@ -0,0 +1,218 @@
+# 標準モジュール
+import os
+import time
+import logging
+import threading
+import datetime as dt
+from collections.abc import Callable
+# サードパーティ製モジュール
+from sqlalchemy import select, text, Engine
+# プロジェクトモジュール
+from db.models import JiraSyncStatus
+from db.engine import get_workload_db_engine
+from services.users import prime_user_cache
+from services.reference_etags import warm_reference_etags
+from services.user_cache import user_cache
+from services.workload_search_cache import workload_search_cache
+
+# readinessでのDB接続確認の待ち時間の上限(秒)
+READINESS_DB_TIMEOUT_SECONDS = float(os.getenv("READINESS_DB_TIMEOUT_SECONDS", "1"))
+# 使用中の接続数がプールの上限(DB_POOL_SIZE + DB_MAX_OVERFLOW)に対してこの比率以上の場合に飽和とみなす
+READINESS_POOL_SATURATION_RATIO = float(os.getenv("READINESS_POOL_SATURATION_RATIO", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+# DB接続確認の多重実行防止 (DBが応答しない場合に確認用のスレッドが溜まらないようにする)
+_db_check_lock = threading.Lock()
+
+
+def first_line_of(e: Exception) -> str:
+    """
+    例外メッセージの1行目を返す。(認証なしで参照できるreadinessのレスポンスにSQL・パラメータを含めないため)
+    """
+    return (str(e).splitlines() or [type(e).__name__])[0]
+
+
+class CacheWarmState:
+    """
+    起動時のキャッシュ(ユーザ情報, 参照系APIのETag)の事前読み込みの状態
+
+    status: pending (未実行), warming (実行中), warm (完了), failed (失敗), disabled (事前読み込みしない)
+    """
+    def __init__(self, steps: list[Callable[[], object]]):
+        self.steps = steps
+        self.status = "pending"
+        self.warmed_at: dt.datetime | None = None
+        self.detail: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self.status in ("warm", "disabled")
+
+    def warm(self) -> None:
+        """
+        事前読み込みを実行する。(他のスレッドで実行中の場合は何もしない)
+
+        Exception
+        ---------
+        - DB接続失敗
+        """
+        with self._lock:
+            if self.status == "warming":
+                return
+            self.status = "warming"
+        try:
+            for step in self.steps:
+                step()
+        except Exception as e:
+            self.status, self.detail = "failed", first_line_of(e)
+            raise Exception(e)
+        self.status, self.warmed_at, self.detail = "warm", dt.datetime.now(), None
+
+    def warm_in_background(self) -> None:
+        """
+        失敗した事前読み込みを別スレッドで再実行する。(readinessでDBへの接続を確認できた場合に使用)
+        """
+        if self.status != "failed":
+            return
+
+        def run():
+            try:
+                self.warm()
+                logger.info("キャッシュの事前読み込みを再実行しました。")
+            except Exception as e:
+                logger.warning(f"キャッシュの事前読み込みの再実行に失敗しました。: {e}")
+
+        threading.Thread(target=run, name="cache-warm-up", daemon=True).start()
+
+    def disable(self) -> None:
+        self.status = "disabled"
+
+
+def workload_db_pool_status(engine: Engine, saturation_ratio: float = READINESS_POOL_SATURATION_RATIO) -> dict:
+    """
+    コネクションプールの使用状況を返す。
+
+    Returns
+    -------
+    status: dict
+        key: size, max_overflow, in_use, idle, waiting (接続を取得中のスレッド数), utilization, saturated
+    """
+    pool = engine.pool
+    size = pool.size()
+    max_overflow = getattr(pool, "max_overflow", 0)
+    in_use = pool.checkedout()
+    # max_overflowが負の場合は上限なし
+    capacity = size + max_overflow if max_overflow >= 0 else None
+    utilization = round(in_use / capacity, 3) if capacity else 0.0
+    return {
+        "size": size, "max_overflow": max_overflow, "in_use": in_use, "idle": pool.checkedin(),
+        "waiting": getattr(pool, "waiting", 0), "utilization": utilization,
+        "saturated": capacity is not None and in_use >= capacity * saturation_ratio,
+    }
+
+
+def threadpool_status(total: int, in_use: int) -> dict:
+    """
+    同期エンドポイントを実行するスレッドプールの使用状況を返す。
+    """
+    return { "size": total, "in_use": in_use, "saturated": in_use >= total }
+
+
+def check_workload_db(timeout_seconds: float = READINESS_DB_TIMEOUT_SECONDS) -> dict:
+    """
+    共有のコネクションプールから接続を取得してSELECT 1を実行し、Jira情報の全更新の最終成功日時を取得する。
+    前回の確認が完了していない(DBが応答しない)場合は新たに実行しない。
+
+    Attributes
+    ----------
+    timeout_seconds: float
+        SQLの実行時間の上限(秒)
+
+    Returns
+    -------
+    result: dict
+        key: status (ok, error, busy), latency_ms, detail, jira_last_synced_at
+    """
+    if not _db_check_lock.acquire(blocking=False):
+        return { "status": "busy", "latency_ms": None, "detail": "前回の接続確認が完了していません。",
+                 "jira_last_synced_at": None }
+    start = time.perf_counter()
+    try:
+        engine = get_workload_db_engine()
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(timeout_seconds * 1000)}"))
+            conn.execute(text("SELECT 1"))
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            try:
+                jira_last_synced_at = conn.execute(
+                    select(JiraSyncStatus.last_succeeded_at).where(JiraSyncStatus.target == "all")).scalar()
+            except Exception as e:
+                # 同期の記録用テーブルが未作成の場合もDBへの接続は成功とする
+                logger.debug(f"Jira情報の同期日時の取得に失敗しました。: {e}")
+                jira_last_synced_at = None
+        return { "status": "ok", "latency_ms": latency_ms, "detail": None,
+                 "jira_last_synced_at": jira_last_synced_at }
+    except Exception as e:
+        return { "status": "error", "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                 "detail": first_line_of(e), "jira_last_synced_at": None }
+    finally:
+        _db_check_lock.release()
+
+
+def build_readiness_report(database: dict, db_pool: dict, threadpool: dict,
+                           warm_state: CacheWarmState | None = None, now: dt.datetime | None = None) -> dict:
+    """
+    readinessのレスポンスを作成する。
+    DB接続の失敗・コネクションプールまたはスレッドプールの飽和・キャッシュの事前読み込み未完了の場合はnot_readyとする。
+    (Jira情報の同期からの経過時間は返却のみ行い、判定には使用しない)
+
+    Attributes
+    ----------
+    database: dict
+        check_workload_dbの結果 (プールが飽和している場合はstatusをskippedとする)
+    db_pool: dict
+        workload_db_pool_statusの結果
+    threadpool: dict
+        threadpool_statusの結果
+    warm_state: CacheWarmState | None
+        既定値はアプリ全体のcache_warm_state
+
+    Returns
+    -------
+    report: dict
+        key: status (ready, not_ready), reasons, pid, database, db_pool, threadpool, jira_sync, caches
+    """
+    warm_state = warm_state or cache_warm_state
+    now = now or dt.datetime.now()
+    reasons = []
+    if database["status"] != "ok":
+        reasons.append(f"database_{database['status']}")
+    if db_pool["saturated"]:
+        reasons.append("db_pool_saturated")
+    if threadpool["saturated"]:
+        reasons.append("threadpool_saturated")
+    if not warm_state.is_warm:
+        reasons.append(f"caches_{warm_state.status}")
+
+    last_synced_at = database.get("jira_last_synced_at")
+    return {
+        "status": "not_ready" if reasons else "ready",
+        "reasons": reasons,
+        "pid": os.getpid(),
+        "database": { key: database.get(key) for key in ("status", "latency_ms", "detail") },
+        "db_pool": db_pool,
+        "threadpool": threadpool,
+        "jira_sync": {
+            "last_succeeded_at": last_synced_at,
+            "age_seconds": round((now - last_synced_at).total_seconds(), 1) if last_synced_at else None },
+        "caches": {
+            "status": warm_state.status, "warmed_at": warm_state.warmed_at, "detail": warm_state.detail,
+            "users": len(user_cache), "workload_searches": len(workload_search_cache) },
+    }
+
+
+# アプリ全体で共有する事前読み込みの状態
+cache_warm_state = CacheWarmState([prime_user_cache, warm_reference_etags])
@@ -1,24 +1,82 @@
 # 標準モジュール
 import os
 import json
+import time
 import requests
 import datetime as dt
 from requests.auth import HTTPBasicAuth
 # サードパーティ製モジュール
 import pandas as pd
-from sqlalchemy import create_engine, select
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert
 # プロジェクトモジュール
-from db.models import Project, Issue, SubtaskWithPathView
+from db.models import Project, Issue, JiraSyncStatus, SubtaskWithPathView
+from db.engine import get_workload_db_engine
+from services.workload_facts import refresh_workload_facts
+from services.workload_search_cache import workload_search_cache
+from services.metrics import metrics_registry
+from services.request_timing import measure_stage, timed_stage
 
+# Jira APIの再試行回数 (429, 502, 503, 504と接続エラーの場合に再試行する)
+JIRA_API_MAX_RETRIES = int(os.getenv("JIRA_API_MAX_RETRIES", "2"))
+JIRA_API_RETRY_STATUSES = (429, 502, 503, 504)
+# 再試行までの待ち時間の上限(秒)
+JIRA_API_MAX_RETRY_WAIT = 30
 
-# 環境変数からJIRAのAPIへのアクセス情報を取得
-jira_base_url = os.environ["JIRA_BASE_URL"]
-jira_user = os.environ["JIRA_MANAGER_EMAIL"]
-jira_api_token = os.environ["JIRA_WORKLOAD_API_TOKEN"]
-# SQLAlchemyのエンジン
-workload_db_engine = create_engine(os.environ["WORKLOAD_DATABASE_URI"])
+
+def jira_api_settings() -> tuple[str, HTTPBasicAuth]:
+    """
+    環境変数からJIRAのAPIへのアクセス情報(ベースURL, 認証情報)を取得する。
+    (import時ではなくAPI呼び出し時に参照するため、Jira連携を使用しない処理では設定不要)
+    """
+    auth = HTTPBasicAuth(os.environ["JIRA_MANAGER_EMAIL"], os.environ["JIRA_WORKLOAD_API_TOKEN"])
+    return os.environ["JIRA_BASE_URL"], auth
+
+
+def jira_request(method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+    """
+    Jira APIを呼び出し、呼び出し数・応答時間・再試行数をメトリクスに記録する。
+
+    Attributes
+    ----------
+    method: str
+    url: str
+    endpoint: str
+        メトリクスのラベルとするエンドポイント (IDを含まない形式 例: /rest/api/3/project/{id})
+    kwargs
+        requests.requestの引数
+
+    Returns
+    -------
+    response: requests.Response
+
+    Exception
+    ---------
+    - 再試行回数を超えて接続に失敗した場合は最後の例外を発報する
+    """
+    for attempt in range(JIRA_API_MAX_RETRIES + 1):
+        if attempt > 0:
+            metrics_registry.inc("jira_retries_total", (endpoint,))
+        start = time.perf_counter()
+        try:
+            response = requests.request(method, url, **kwargs)
+        except requests.ConnectionError:
+            metrics_registry.observe("jira_request_duration_seconds", (endpoint,), time.perf_counter() - start)
+            metrics_registry.inc("jira_requests_total", (endpoint, "error"))
+            if attempt == JIRA_API_MAX_RETRIES:
+                raise
+            time.sleep(2 ** attempt)
+            continue
+        metrics_registry.observe("jira_request_duration_seconds", (endpoint,), time.perf_counter() - start)
+        metrics_registry.inc("jira_requests_total", (endpoint, str(response.status_code)))
+        if response.status_code not in JIRA_API_RETRY_STATUSES or attempt == JIRA_API_MAX_RETRIES:
+            return response
+        # Retry-After(秒)の指定があればそれに従う
+        retry_after = response.headers.get("Retry-After", "")
+        wait = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+        time.sleep(min(wait, JIRA_API_MAX_RETRY_WAIT))
+    return response
 
 
 def fetch_all_projects_from_jira() -> list[dict | None]:
@@ -35,7 +93,7 @@ def fetch_all_projects_from_jira() -> list[dict | None]:
         key: id, name, jira_key, description
     """
     # APIアクセス用情報の宣言
-    auth = HTTPBasicAuth(jira_user, jira_api_token)
+    jira_base_url, auth = jira_api_settings()
     headers = { "Accept": "application/json" }
     jira_endpoint = f"{jira_base_url}/rest/api/3/project?expand=description"
 
@@ -46,8 +104,8 @@ def fetch_all_projects_from_jira() -> list[dict | None]:
         for p in projects_in_db }
 
     # APIからのデータ取得とデータのデコード
-    response = requests.request(
-        "GET", jira_endpoint, headers=headers, auth=auth )
+    response = jira_request(
+        "GET", jira_endpoint, "/rest/api/3/project", headers=headers, auth=auth )
     decoded_res = json.loads(response.text)
     # レスポンスから必要な情報を抽出して、規定のフォーマットに直す
     projects = [
@@ -72,7 +130,7 @@ def put_jira_target_status(project):
     None
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
     # 登録用のSQL作成 (https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#insert-on-conflict-upsert)
@@ -82,10 +140,12 @@ def put_jira_target_status(project):
             set_= { "is_target": insert_stmt.excluded.is_target,
                     "update_timestamp": dt.datetime.now() }
     )
-    # DBへの登録処理
+    # DBへの登録処理 (工数検索用テーブルのproject情報も同一トランザクションで更新)
     try:
         session.execute(upsert_stmt)
+        refresh_workload_facts(session, project_ids=[int(project["id"])])
         session.commit()
+        workload_search_cache.clear()
         session.close()
         return { "message": "projectの更新に成功しました" }
     except Exception as e:
@@ -107,7 +167,7 @@ def fetch_all_projects_from_db() -> list[dict | None]:
         key: id, name, jira_key, description, is_target
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # project取得用のSQL作成 (https://docs.sqlalchemy.org/en/20/tutorial/data_select.html#using-select-statements)
     stmt = select(Project).where(Project.is_target == True).order_by(Project.id)
@@ -144,7 +204,7 @@ def generate_projects_for_upsert() -> list[dict]:
     # DBから有効projectを取得
     projects_from_db = fetch_all_projects_from_db()
     # Jiraから有効プロジェクト取得
-    auth = HTTPBasicAuth(jira_user, jira_api_token)
+    jira_base_url, auth = jira_api_settings()
     headers = { "Accept": "application/json" }
     # レスポンス格納用リスト
     projects = []
@@ -156,8 +216,8 @@ def generate_projects_for_upsert() -> list[dict]:
         jira_endpoint = f"{jira_base_url}/rest/api/3/project/{target_id}?expand=description,projectKeys"
 
         # APIからのデータ取得とデータのデコード
-        response = requests.request(
-            "GET", jira_endpoint, headers=headers, auth=auth )
+        response = jira_request(
+            "GET", jira_endpoint, "/rest/api/3/project/{id}", headers=headers, auth=auth )
         decoded_res = json.loads(response.text)
 
         project = {
@@ -189,7 +249,7 @@ def upsert_jira_project_info_into_db(project_info: dict | list[dict]) -> bool:
         成功失敗のメッセージ。
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
     # 登録用のSQL作成 (https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#insert-on-conflict-upsert)
@@ -200,12 +260,21 @@ def upsert_jira_project_info_into_db(project_info: dict | list[dict]) -> bool:
                     "jira_key": insert_stmt.excluded.jira_key,
                     "description": insert_stmt.excluded.description,
                     "is_target": insert_stmt.excluded.is_target,
-                    "update_timestamp": dt.datetime.now() }
+                    "update_timestamp": dt.datetime.now() },
+            # 内容に変更がない場合は更新しない (update_timestampを参照系APIのETagに使用するため)
+            where=tuple_(Project.name, Project.jira_key, Project.description, Project.is_target)
+                    .is_distinct_from(tuple_(insert_stmt.excluded.name, insert_stmt.excluded.jira_key,
+                                             insert_stmt.excluded.description, insert_stmt.excluded.is_target))
     )
-    # DBへの登録処理
+    # 工数検索用テーブルの更新対象
+    projects = project_info if isinstance(project_info, list) else [project_info]
+    project_ids = [ int(project["id"]) for project in projects ]
+    # DBへの登録処理 (工数検索用テーブルのproject情報も同一トランザクションで更新)
     try:
         session.execute(upsert_stmt)
+        refresh_workload_facts(session, project_ids=project_ids)
         session.commit()
+        workload_search_cache.clear()
         session.close()
         return {"message": "projectの登録に成功しました"}
     except Exception as e:
@@ -213,6 +282,41 @@ def upsert_jira_project_info_into_db(project_info: dict | list[dict]) -> bool:
         raise Exception(e)
 
 
+def record_jira_sync_success(num_of_projects: int, num_of_issues: int, target: str = "all") -> None:
+    """
+    Jira情報の全更新が成功した日時と件数をDBに記録する。
+
+    Attributes
+    ----------
+    num_of_projects: int
+    num_of_issues: int
+    target: str
+        同期の種類 (全更新はall)
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    values = { "target": target, "last_succeeded_at": dt.datetime.now(),
+               "num_of_projects": num_of_projects, "num_of_issues": num_of_issues }
+    insert_stmt = insert(JiraSyncStatus).values(values)
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=['target'],
+            set_= { "last_succeeded_at": insert_stmt.excluded.last_succeeded_at,
+                    "num_of_projects": insert_stmt.excluded.num_of_projects,
+                    "num_of_issues": insert_stmt.excluded.num_of_issues })
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        session.execute(upsert_stmt)
+        session.commit()
+        session.close()
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
+
+
 def fetch_all_issues_related_project_ids_from_jira(project_ids: list):
     """
     Project IDを用いてそれに紐づくissues, subtasksを取得して返却する。
@@ -234,7 +338,7 @@ def fetch_all_issues_related_project_ids_from_jira(project_ids: list):
     # 結果格納用リスト
     issues = []
     # API Endpoint  -->  https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-issue-search/#api-rest-api-3-search-jql-get
-    auth = HTTPBasicAuth(jira_user, jira_api_token)
+    jira_base_url, auth = jira_api_settings()
     api_endpoint = f"{jira_base_url}/rest/api/3/search/jql"
 
     # 各project idを走査してissue, subtaskを振り分け
@@ -244,8 +348,8 @@ def fetch_all_issues_related_project_ids_from_jira(project_ids: list):
         params = { "jql": f"project={project_id}", "fields": fields,
                    "maxResults": 5000,  "startAt": 0, }
         # リクエストの送信
-        response = requests.get(
-            api_endpoint, headers={ "Accept": "application/json" },
+        response = jira_request(
+            "GET", api_endpoint, "/rest/api/3/search/jql", headers={ "Accept": "application/json" },
             params=params, auth=auth )
 
         # レスポンスの確認
@@ -323,8 +427,10 @@ def upsert_jira_issues_into_app_db(issues: list[dict]):
     message: str
         成功失敗のメッセージ。
     """
+    if len(issues) == 0:
+        return
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # 登録用のSQL作成 (https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#insert-on-conflict-upsert)
     insert_stmt = insert(Issue).values(issues)
@@ -338,11 +444,25 @@ def upsert_jira_issues_into_app_db(issues: list[dict]):
                "status": insert_stmt.excluded.status,
                "limit_date": insert_stmt.excluded.limit_date,
                "description": insert_stmt.excluded.description,
-               "update_timestamp": dt.datetime.now() }
+               "update_timestamp": dt.datetime.now() },
+        # 内容に変更がない場合は更新しない (update_timestampを参照系APIのETagに使用するため)
+        where=tuple_(Issue.name, Issue.project_id, Issue.parent_issue_id, Issue.type,
+                     Issue.status, Issue.limit_date, Issue.description)
+                .is_distinct_from(tuple_(insert_stmt.excluded.name, insert_stmt.excluded.project_id,
+                                         insert_stmt.excluded.parent_issue_id, insert_stmt.excluded.type,
+                                         insert_stmt.excluded.status, insert_stmt.excluded.limit_date,
+                                         insert_stmt.excluded.description))
     )
     try:
-        session.execute(upsert_stmt)
+        # 登録・変更されたissueのみ返される (内容に変更がない行は更新しないため)
+        changed = session.execute(upsert_stmt.returning(Issue.id, Issue.project_id)).all()
+        if len(changed) > 0:
+            # issueの階層、名称の変更を工数検索用テーブルへ反映
+            # (親issueの変更は配下の全subtaskのpathに影響するため、変更があったprojectの工数を対象とする)
+            refresh_workload_facts(session, project_ids=sorted({ row.project_id for row in changed }))
         session.commit()
+        if len(changed) > 0:
+            workload_search_cache.clear()
         session.close()
     except Exception as e:
         session.close()
@@ -365,7 +485,7 @@ def fetch_all_main_issues_from_db() -> list[dict]:
              update_timestamp, create_timestamp
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # 取得用のSQL作成
     stmt = select(Issue).where(Issue.is_subtask == False)\
@@ -406,7 +526,7 @@ def fetch_all_subtasks_from_db() -> list[dict]:
              update_timestamp, create_timestamp
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # 取得用のSQL作成
     stmt = select(Issue).where(Issue.is_subtask == True)\
@@ -447,7 +567,7 @@ def fetch_all_issues_from_db() -> list[dict]:
              update_timestamp, create_timestamp
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # 取得用のSQL作成
     stmt = select(Issue).order_by(Issue.project_id, Issue.parent_issue_id, Issue.id)
@@ -488,7 +608,8 @@ def fetch_all_subtasks_with_parents_from_db() -> list[dict]:
     """
     subtasks = create_project_issue_hierarchical_structure_df()
 
-    return subtasks.to_dict(orient="records")
+    with measure_stage("convert"):
+        return subtasks.to_dict(orient="records")
 
 
 def fetch_all_subtasks_with_path_from_db():
@@ -507,7 +628,7 @@ def fetch_all_subtasks_with_path_from_db():
              update_timestamp, create_timestamp
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     # 取得用のSQL作成
     stmt = select(
@@ -548,6 +669,14 @@ def create_project_issue_hierarchical_structure_df() -> list[dict]:
     projects = fetch_all_projects_from_db()
     issues = fetch_all_issues_from_db()
 
+    return build_project_issue_hierarchical_structure_df(projects, issues)
+
+
+@timed_stage("convert")
+def build_project_issue_hierarchical_structure_df(projects: list[dict], issues: list[dict]) -> pd.DataFrame:
+    """
+    Project, Issue情報からsubtaskごとの階層構造のDFを作成する。(Server-Timingではconvertとして計測)
+    """
     # project, issueデータをDataFrameに変換
     project_df = pd.DataFrame(projects)
     issue_df = pd.DataFrame(issues)
@@ -0,0 +1,85 @@
+# 標準モジュール
+import re
+import random
+import asyncio
+import datetime as dt
+# サードパーティ製モジュール
+from fastapi import FastAPI, HTTPException
+# プロジェクトモジュール
+from services.synthetic_data import generate_projects, generate_issues
+
+# ref:
+#    - https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-projects/
+#    - https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-issue-search/
+
+
+def to_jira_issue(issue: dict) -> dict:
+    """
+    合成データのissueをJira API(search/jql)のレスポンス形式に変換する。
+    """
+    fields = {
+        "summary": issue["name"], "description": issue["description"],
+        "issuetype": { "name": issue["type"], "subtask": issue["is_subtask"] },
+        "status": { "name": issue["status"] },
+        "duedate": issue["limit_date"].isoformat() if issue["limit_date"] else None,
+        "project": { "id": str(issue["project_id"]) },
+    }
+    if issue["parent_issue_id"] is not None:
+        fields["parent"] = { "id": str(issue["parent_issue_id"]) }
+    return { "id": str(issue["id"]), "fields": fields }
+
+
+def create_jira_stand_in_app(scale: dict, seed: int = 0, latency_ms: float = 0.0) -> FastAPI:
+    """
+    負荷試験用に、合成データ(commands.synthetic_data)と同じプロジェクト・issueを返すJira APIの代替アプリを作成する。
+    (本アプリが使用するエンドポイントのみ。認証は行わない)
+
+    Attributes
+    ----------
+    scale: dict
+        合成データの規模 (DBに登録した合成データと同じ値を指定する)
+    seed: int
+        合成データの乱数のシード (DBに登録した合成データと同じ値を指定する)
+    latency_ms: float
+        各レスポンスに加える遅延(ミリ秒) (実際のJiraの応答時間を模擬する)
+
+    Returns
+    -------
+    app: FastAPI
+    """
+    now = dt.datetime.now()
+    projects = generate_projects(scale, now)
+    issues_by_project: dict[str, list[dict]] = {}
+    for issue in generate_issues(scale, projects, random.Random(seed), now):
+        issues_by_project.setdefault(str(issue["project_id"]), []).append(to_jira_issue(issue))
+    jira_projects = {
+        str(project["id"]): { "id": str(project["id"]), "key": project["jira_key"], "name": project["name"],
+                              "description": project["description"] }
+        for project in projects }
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def simulate_latency(request, call_next):
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        return await call_next(request)
+
+    @app.get("/rest/api/3/project")
+    async def all_projects():
+        return list(jira_projects.values())
+
+    @app.get("/rest/api/3/project/{project_id}")
+    async def project(project_id: str):
+        if project_id not in jira_projects:
+            raise HTTPException(status_code=404)
+        return jira_projects[project_id]
+
+    @app.get("/rest/api/3/search/jql")
+    async def search(jql: str, startAt: int = 0, maxResults: int = 50):
+        matched = re.fullmatch(r"\s*project\s*=\s*(\d+)\s*", jql)
+        issues = issues_by_project.get(matched.group(1), []) if matched else []
+        return { "startAt": startAt, "maxResults": maxResults, "total": len(issues),
+                 "issues": issues[startAt:startAt + maxResults] }
+
+    return app
@@ -0,0 +1,260 @@
+# 標準モジュール
+import time
+import random
+import asyncio
+import calendar
+import datetime as dt
+from collections.abc import Awaitable, Callable
+# サードパーティ製モジュール
+import httpx
+# プロジェクトモジュール
+from services.synthetic_data import SYNTHETIC_USER_PASSWORD, synthetic_user_email
+
+# シナリオごとの実行比率の既定値
+LOAD_TEST_SCENARIO_WEIGHTS: dict[str, int] = { "member": 70, "viewer": 25, "admin_sync": 5 }
+# レスポンスの待ち時間の上限(秒)
+LOAD_TEST_TIMEOUT_SECONDS = 60.0
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    ソート済みの値のq(0〜100)パーセンタイルを返す。(nearest-rank法)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(-(-q * len(sorted_values) // 100))))
+    return sorted_values[rank - 1]
+
+
+class LoadTestStats:
+    """
+    シナリオ・処理ごとのレスポンス時間とエラー数
+
+    各シナリオの1回分(サインインから最後の処理まで)はstepを"(session)"として記録する。
+    """
+    SESSION_STEP = "(session)"
+
+    def __init__(self):
+        self.durations: dict[tuple[str, str], list[float]] = {}
+        self.errors: dict[tuple[str, str], dict[str, int]] = {}
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+
+    def record(self, scenario: str, step: str, seconds: float, error: str | None = None) -> None:
+        """
+        1回分の結果を記録する。
+
+        Attributes
+        ----------
+        scenario: str
+        step: str
+        seconds: float
+            レスポンス時間(秒)
+        error: str | None
+            エラーの種類 (ステータスコードまたは例外名。成功時はNone)
+        """
+        key = (scenario, step)
+        self.durations.setdefault(key, []).append(seconds)
+        errors = self.errors.setdefault(key, {})
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+
+    def summary(self) -> list[dict]:
+        """
+        シナリオ・処理ごとのスループット・レスポンス時間のパーセンタイル(ミリ秒)・エラー率を返す。
+
+        Returns
+        -------
+        rows: list[dict]
+            key: scenario, step, requests, errors, error_rate, throughput_rps,
+                 p50_ms, p90_ms, p95_ms, p99_ms, max_ms, errors_by_kind
+        """
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        rows = []
+        for (scenario, step), durations in sorted(self.durations.items()):
+            values = sorted(seconds * 1000 for seconds in durations)
+            errors_by_kind = self.errors.get((scenario, step), {})
+            num_of_errors = sum(errors_by_kind.values())
+            rows.append({
+                "scenario": scenario, "step": step, "requests": len(values), "errors": num_of_errors,
+                "error_rate": round(num_of_errors / len(values), 4),
+                "throughput_rps": round(len(values) / elapsed, 3) if elapsed > 0 else 0.0,
+                **{ f"p{q}_ms": round(percentile(values, q), 1) for q in (50, 90, 95, 99) },
+                "max_ms": round(values[-1], 1), "errors_by_kind": errors_by_kind })
+        return rows
+
+
+class LoadTestSession:
+    """
+    1ユーザ分のセッション (サインインで取得したJWTのCookieを以降のリクエストに付与する)
+    """
+    def __init__(self, client: httpx.AsyncClient, stats: LoadTestStats, scenario: str, rnd: random.Random):
+        self.client = client
+        self.stats = stats
+        self.scenario = scenario
+        self.rnd = rnd
+        self.cookie: str | None = None
+        self.user_id: int | None = None
+
+    async def request(self, step: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        """
+        リクエストを送信して結果を記録する。(4xx, 5xx・接続エラーはエラーとして記録し、Noneを返す)
+        """
+        headers = kwargs.pop("headers", {})
+        if self.cookie is not None:
+            # Cookieはsecure属性付きのため、httpのローカルサーバには明示的に送信する
+            headers["Cookie"] = self.cookie
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(self.scenario, step, time.perf_counter() - start, type(e).__name__)
+            return None
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            self.stats.record(self.scenario, step, elapsed, str(response.status_code))
+            return None
+        self.stats.record(self.scenario, step, elapsed)
+        return response
+
+    async def sign_in(self, email: str) -> bool:
+        response = await self.request("signin", "POST", "/api/user/signin",
+                                      json={ "email": email, "password": SYNTHETIC_USER_PASSWORD })
+        if response is None:
+            return False
+        set_cookie = response.headers.get("set-cookie", "")
+        self.cookie = set_cookie.split(";")[0] if set_cookie.startswith("access_token=") else None
+        self.user_id = response.json()["id"]
+        return self.cookie is not None
+
+
+def month_range(month: dt.date) -> tuple[dt.date, dt.date]:
+    """
+    月の初日と最終日を返す。
+    """
+    first = month.replace(day=1)
+    return first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+
+def build_week_batch(user_id: int, week_start: dt.date, month_workloads: list[dict], subtask_ids: list[int],
+                     rnd: random.Random) -> dict:
+    """
+    1週間(月〜金)分の工数の一括保存リクエストを作成する。
+    登録済みの工数は作業時間を変更して更新し、工数が無い日は1件登録する。(繰り返しても件数が増え続けない)
+    """
+    week_end = week_start + dt.timedelta(days=4)
+    existing = [ workload for workload in month_workloads
+                 if week_start.isoformat() <= workload["work_date"] <= week_end.isoformat() ]
+    registered_dates = { workload["work_date"] for workload in existing }
+    updates = [
+        { "id": workload["workload_id"], "subtask_id": workload["subtask_id"], "work_date": workload["work_date"],
+          "workload_minute": rnd.randrange(15, 481, 15), "detail": workload["detail"] }
+        for workload in existing ]
+    inserts = [
+        { "subtask_id": rnd.choice(subtask_ids), "work_date": work_date.isoformat(),
+          "workload_minute": rnd.randrange(15, 481, 15), "detail": "負荷試験" }
+        for work_date in (week_start + dt.timedelta(days=offset) for offset in range(5))
+        if work_date.isoformat() not in registered_dates ]
+    return { "user_id": user_id, "lower_date": week_start.isoformat(), "upper_date": week_end.isoformat(),
+             "inserts": inserts, "updates": updates, "deletes": [] }
+
+
+async def viewer_scenario(session: LoadTestSession, email: str, month: dt.date) -> dict | None:
+    """
+    サインイン → subtask一覧の取得 → 当月の自分の工数の検索
+    """
+    if not await session.sign_in(email):
+        return None
+    response = await session.request("subtask_tree", "GET", "/api/issue/subtask_with_parents/db/all")
+    subtasks = response.json() if response is not None else []
+    lower_date, upper_date = month_range(month)
+    response = await session.request("search_month", "POST", "/api/workload/db/search", json={
+        "specify_user_id": session.user_id, "lower_date": lower_date.isoformat(), "upper_date": upper_date.isoformat() })
+    return { "subtasks": subtasks, "workloads": response.json() if response is not None else [] }
+
+
+async def member_scenario(session: LoadTestSession, email: str, month: dt.date) -> None:
+    """
+    viewer_scenarioの後、当月のいずれかの週の工数を一括保存する
+    """
+    loaded = await viewer_scenario(session, email, month)
+    if loaded is None or not loaded["subtasks"]:
+        return
+    subtask_ids = [ subtask["subtask_id"] for subtask in loaded["subtasks"] ]
+    lower_date, upper_date = month_range(month)
+    mondays = [ lower_date + dt.timedelta(days=offset) for offset in range((upper_date - lower_date).days - 3)
+                if (lower_date + dt.timedelta(days=offset)).weekday() == 0 ]
+    if not mondays:
+        return
+    batch = build_week_batch(session.user_id, session.rnd.choice(mondays), loaded["workloads"], subtask_ids,
+                             session.rnd)
+    await session.request("save_week", "POST", "/api/workload/db/batch", json=batch)
+
+
+async def admin_sync_scenario(session: LoadTestSession, email: str, month: dt.date) -> None:
+    """
+    管理者でサインイン → Jira(代替アプリ)からproject, issueを全更新する
+    """
+    if not await session.sign_in(email):
+        return
+    await session.request("jira_sync", "GET", "/api/project/db/update/all")
+
+
+LOAD_TEST_SCENARIOS: dict[str, Callable[[LoadTestSession, str, dt.date], Awaitable]] = {
+    "member": member_scenario,
+    "viewer": viewer_scenario,
+    "admin_sync": admin_sync_scenario,
+}
+
+
+async def run_load_test(base_url: str, concurrency: int, duration_seconds: float,
+                        weights: dict[str, int] | None = None, num_of_users: int = 20,
+                        think_time_seconds: float = 1.0, month: dt.date | None = None, seed: int = 0,
+                        timeout_seconds: float = LOAD_TEST_TIMEOUT_SECONDS) -> LoadTestStats:
+    """
+    起動中のサーバに対し、concurrency人の仮想ユーザがduration_seconds秒間シナリオを繰り返し実行する。
+
+    Attributes
+    ----------
+    base_url: str
+        サーバのURL
+    concurrency: int
+        同時に実行する仮想ユーザ数
+    duration_seconds: float
+        実行時間(秒) (終了時に実行中のシナリオは最後まで実行する)
+    weights: dict[str, int] | None
+        シナリオごとの実行比率
+    num_of_users: int
+        合成データのユーザ数 (先頭のユーザは管理者としてadmin_syncで使用し、以降を一般ユーザとする)
+    think_time_seconds: float
+        シナリオ間の平均待ち時間(秒)
+    month: date | None
+        工数を検索・保存する月 (既定値は当月)
+    seed: int
+        乱数のシード
+
+    Returns
+    -------
+    stats: LoadTestStats
+    """
+    weights = weights or LOAD_TEST_SCENARIO_WEIGHTS
+    month = month or dt.date.today()
+    stats = LoadTestStats()
+    deadline = time.perf_counter() + duration_seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def virtual_user(client: httpx.AsyncClient, idx: int):
+        rnd = random.Random(seed * 100003 + idx)
+        while time.perf_counter() < deadline:
+            scenario = rnd.choices(list(weights), weights=list(weights.values()))[0]
+            user_idx = 0 if scenario == "admin_sync" else 1 + idx % max(num_of_users - 1, 1)
+            session = LoadTestSession(client, stats, scenario, rnd)
+            start = time.perf_counter()
+            await LOAD_TEST_SCENARIOS[scenario](session, synthetic_user_email(user_idx), month)
+            stats.record(scenario, LoadTestStats.SESSION_STEP, time.perf_counter() - start)
+            await asyncio.sleep(rnd.uniform(0, 2 * think_time_seconds))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout_seconds) as client:
+        await asyncio.gather(*(virtual_user(client, idx) for idx in range(concurrency)))
+    stats.finished_at = time.perf_counter()
+    return stats
@@ -0,0 +1,229 @@
+# 標準モジュール
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+# サードパーティ製モジュール
+from sqlalchemy import delete, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+# プロジェクトモジュール
+from db.models import LoginThrottleBucket
+from db.engine import get_workload_db_engine
+from services.custom_exceptions import LoginThrottledError
+
+# 試行回数制限の状態の保存先 (memory: プロセス内, postgres: 全ワーカーで共有, none: 制限しない)
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+# emailごとの連続試行可能回数と、1分あたりの回復回数
+LOGIN_THROTTLE_EMAIL_BURST = float(os.getenv("LOGIN_THROTTLE_EMAIL_BURST", "5"))
+LOGIN_THROTTLE_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_EMAIL_PER_MINUTE", "5"))
+# 接続元IPごとの連続試行可能回数と、1分あたりの回復回数
+LOGIN_THROTTLE_IP_BURST = float(os.getenv("LOGIN_THROTTLE_IP_BURST", "20"))
+LOGIN_THROTTLE_IP_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "30"))
+# メモリ上に保持するバケット数の上限 (超えた場合は最も古いものから破棄する)
+LOGIN_THROTTLE_MEMORY_MAX_KEYS = 100000
+# postgresの場合に、回復済みのバケットを削除する間隔(試行回数)
+LOGIN_THROTTLE_PRUNE_INTERVAL = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def take_token(tokens: float, elapsed: float, capacity: float, refill_per_second: float) -> float:
+    """
+    トークンバケットを経過時間分回復させ、1回分のトークンを消費した後のトークン数を返す。
+    (0以上の場合は試行可能。拒否された試行も消費するが、不足分は1回分までとする)
+
+    Attributes
+    ----------
+    tokens: float
+        前回のトークン数
+    elapsed: float
+        前回からの経過時間(秒)
+    capacity: float
+        連続試行可能回数
+    refill_per_second: float
+        1秒あたりの回復回数
+
+    Returns
+    -------
+    tokens: float
+    """
+    refilled = min(capacity, tokens + max(elapsed, 0.0) * refill_per_second)
+    return max(refilled - 1, -1.0)
+
+
+def retry_after_seconds(tokens: float, refill_per_second: float) -> int:
+    """
+    拒否されたバケットが再度試行可能になるまでの秒数を返す。
+    """
+    return max(1, math.ceil((1 - tokens) / refill_per_second))
+
+
+class MemoryLoginThrottleBackend:
+    """
+    プロセス内で試行回数制限の状態を保持する。(ワーカーごとに独立して制限される)
+    """
+    blocking = False
+
+    def __init__(self, max_keys: int = LOGIN_THROTTLE_MEMORY_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: list[tuple[str, float, float]]) -> dict[str, float]:
+        """
+        各バケットのトークンを1回分消費し、消費後のトークン数を返す。
+
+        Attributes
+        ----------
+        buckets: list[tuple[str, float, float]]
+            (キー, 連続試行可能回数, 1秒あたりの回復回数)
+
+        Returns
+        -------
+        tokens: dict[str, float]
+            key: バケットのキー
+        """
+        now = self.clock()
+        result = {}
+        with self._lock:
+            for key, capacity, refill_per_second in buckets:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                tokens = take_token(tokens, now - updated_at, capacity, refill_per_second)
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                result[key] = tokens
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return result
+
+
+class PostgresLoginThrottleBackend:
+    """
+    試行回数制限の状態をlogin_throttle_bucketテーブルで全ワーカー共有する。
+    email, IPのバケットを1回のINSERT ... ON CONFLICT DO UPDATE ... RETURNINGで更新する。
+    """
+    blocking = True
+
+    def __init__(self, prune_interval: int = LOGIN_THROTTLE_PRUNE_INTERVAL):
+        self.prune_interval = prune_interval
+        self._num_of_calls = 0
+
+    @staticmethod
+    def build_take_stmt(buckets: list[tuple[str, float, float]]):
+        """
+        バケットを回復・消費して消費後のトークン数を返すSQLを作成する。
+        """
+        table = LoginThrottleBucket.__table__
+        insert_stmt = insert(LoginThrottleBucket).values([
+            { "key": key, "tokens": capacity - 1, "capacity": capacity,
+              "refill_per_second": refill_per_second, "updated_at": func.now() }
+            for key, capacity, refill_per_second in buckets ])
+        excluded = insert_stmt.excluded
+        elapsed = func.extract("epoch", func.now() - table.c.updated_at)
+        refilled = func.least(excluded.capacity,
+                              table.c.tokens + func.greatest(elapsed, 0) * excluded.refill_per_second)
+        return insert_stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={ "tokens": func.greatest(refilled - 1, -1), "capacity": excluded.capacity,
+                   "refill_per_second": excluded.refill_per_second, "updated_at": func.now() }
+        ).returning(table.c.key, table.c.tokens)
+
+    @staticmethod
+    def build_prune_stmt():
+        """
+        満タンまで回復済み(=行が無い状態と同じ)のバケットを削除するSQLを作成する。
+        """
+        elapsed = func.extract("epoch", func.now() - LoginThrottleBucket.updated_at)
+        return delete(LoginThrottleBucket)\
+            .where(LoginThrottleBucket.tokens + elapsed * LoginThrottleBucket.refill_per_second
+                   >= LoginThrottleBucket.capacity)
+
+    def take(self, buckets: list[tuple[str, float, float]]) -> dict[str, float]:
+        Session = sessionmaker(bind=get_workload_db_engine())
+        session = Session()
+        # 同一キーの行ロック順を揃えてデッドロックを避ける
+        stmt = self.build_take_stmt(sorted(buckets))
+        try:
+            result = { row.key: row.tokens for row in session.execute(stmt) }
+            self._num_of_calls += 1
+            if self._num_of_calls % self.prune_interval == 0:
+                session.execute(self.build_prune_stmt())
+            session.commit()
+            session.close()
+            return result
+        except Exception as e:
+            session.rollback()
+            session.close()
+            raise Exception(e)
+
+
+class LoginThrottle:
+    """
+    email・接続元IPごとのトークンバケットでログイン試行回数を制限する。
+    パスワード検証(Argon2)の前に呼び出し、上限を超えた試行はハッシュ計算をせずに拒否する。
+    """
+    def __init__(self, backend,
+                 email_rule: tuple[float, float] = (LOGIN_THROTTLE_EMAIL_BURST, LOGIN_THROTTLE_EMAIL_PER_MINUTE),
+                 ip_rule: tuple[float, float] = (LOGIN_THROTTLE_IP_BURST, LOGIN_THROTTLE_IP_PER_MINUTE)):
+        self.backend = backend
+        self.rules = { "email": email_rule, "ip": ip_rule }
+
+    def check(self, email: str, client_ip: str | None) -> None:
+        """
+        試行可能かを判定し、上限を超えている場合はLoginThrottledErrorを発報する。
+
+        Attributes
+        ----------
+        email: str
+        client_ip: str | None
+
+        Exception
+        ---------
+        - LoginThrottledError: email, IPいずれかの上限を超えた場合
+        - 状態の保存先(DB)への接続失敗時は制限せずに通す (ログイン処理自体で失敗するため)
+        """
+        targets = { "email": email.strip().lower(), "ip": client_ip }
+        buckets = [ (f"{kind}:{value}", capacity, per_minute / 60)
+                    for kind, (capacity, per_minute) in self.rules.items()
+                    if (value := targets[kind]) ]
+        try:
+            tokens = self.backend.take(buckets)
+        except Exception as e:
+            logger.warning(f"ログイン試行回数の確認に失敗しました。: {e}")
+            return
+
+        retry_after = max([ retry_after_seconds(tokens[key], refill_per_second)
+                            for key, _, refill_per_second in buckets if tokens[key] < 0 ], default=0)
+        if retry_after > 0:
+            raise LoginThrottledError(
+                f"ログイン試行回数が上限を超えました。{retry_after}秒後に再試行してください。", retry_after)
+
+    async def check_async(self, email: str, client_ip: str | None) -> None:
+        """
+        checkをイベントループを止めずに実行する。(DBを使用する場合のみスレッドで実行)
+        """
+        if self.backend.blocking:
+            await run_in_threadpool(self.check, email, client_ip)
+        else:
+            self.check(email, client_ip)
+
+
+def create_login_throttle(backend: str = LOGIN_THROTTLE_BACKEND) -> LoginThrottle | None:
+    """
+    環境変数LOGIN_THROTTLE_BACKENDに応じたLoginThrottleを作成する。(noneの場合はNone)
+    """
+    if backend == "none":
+        return None
+    if backend == "postgres":
+        return LoginThrottle(PostgresLoginThrottleBackend())
+    return LoginThrottle(MemoryLoginThrottleBackend())
+
+
+# アプリ全体で共有する試行回数制限
+login_throttle = create_login_throttle()
@@ -0,0 +1,335 @@
+# 標準モジュール
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from collections.abc import Callable, Iterable
+# サードパーティ製モジュール
+from sqlalchemy import event, Engine
+from sqlalchemy.pool import QueuePool
+# プロジェクトモジュール
+from services.request_timing import add_stage_time
+
+# ref:
+#    - https://prometheus.io/docs/instrumenting/exposition_formats/
+
+# 複数ワーカーの値を集約するためのディレクトリ (未指定の場合はワーカー単位の値を返す)
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+# 複数ワーカー時に各ワーカーの値をファイルへ書き出す間隔(秒)
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# レイテンシのヒストグラムのバケット(秒)
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsShard:
+    """
+    1スレッド分の計測値 (所有するスレッドのみが更新するため、更新時にロックを取らない)
+    """
+    def __init__(self):
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, list[float]] = {}
+
+
+class MetricsRegistry:
+    """
+    カウンタ・ヒストグラム・ゲージを保持し、Prometheusのテキスト形式で出力する。
+
+    計測値はスレッドごとのシャードに記録し、出力時に合算する。
+    ゲージは出力時にコールバックで値を取得する。
+    """
+    def __init__(self):
+        self.definitions: dict[str, tuple[str, str, tuple[str, ...], tuple[float, ...] | None]] = {}
+        self.gauge_callbacks: dict[str, Callable[[], Iterable[tuple[tuple, float]]]] = {}
+        self._shards: list[MetricsShard] = []
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        self.definitions[name] = ("counter", help_text, labels, None)
+
+    def histogram(self, name: str, help_text: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.definitions[name] = ("histogram", help_text, labels, buckets)
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...],
+              callback: Callable[[], Iterable[tuple[tuple, float]]]) -> None:
+        """
+        ゲージを登録する。callbackは(ラベル値のタプル, 値)のリストを返す。
+        """
+        self.definitions[name] = ("gauge", help_text, labels, None)
+        self.gauge_callbacks[name] = callback
+
+    def _shard(self) -> MetricsShard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = MetricsShard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        histograms = self._shard().histograms
+        key = (name, labels)
+        buckets = self.definitions[name][3]
+        values = histograms.get(key)
+        if values is None:
+            # [バケットごとの件数..., 最大のバケットを超えた件数, 合計, 件数]
+            values = histograms[key] = [0.0] * (len(buckets) + 3)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def snapshot(self) -> dict:
+        """
+        全シャードの計測値とゲージの現在値を合算して返す。
+
+        Returns
+        -------
+        snapshot: dict
+            key: counters, histograms, gauges (値は[[名前, ラベル値], 値]のリスト)
+        """
+        counters: dict[tuple, float] = {}
+        histograms: dict[tuple, list[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dictのコピーはGILにより他スレッドの更新と競合しない
+            for key, value in dict(shard.counters).items():
+                counters[key] = counters.get(key, 0) + value
+            for key, values in dict(shard.histograms).items():
+                merged = histograms.setdefault(key, [0.0] * len(values))
+                for idx, value in enumerate(list(values)):
+                    merged[idx] += value
+        gauges = {}
+        for name, callback in self.gauge_callbacks.items():
+            try:
+                for labels, value in callback():
+                    gauges[(name, tuple(labels))] = value
+            except Exception as e:
+                logger.warning(f"メトリクス({name})の取得に失敗しました。: {e}")
+        return {
+            "counters": [ [[name, list(labels)], value] for (name, labels), value in counters.items() ],
+            "histograms": [ [[name, list(labels)], values] for (name, labels), values in histograms.items() ],
+            "gauges": [ [[name, list(labels)], value] for (name, labels), value in gauges.items() ],
+        }
+
+    def render(self, snapshots: list[dict]) -> str:
+        """
+        スナップショット(複数ワーカー分)を合算し、Prometheusのテキスト形式に変換する。
+        """
+        merged: dict[str, dict[tuple, float | list[float]]] = {}
+        for snapshot in snapshots:
+            for kind in ("counters", "histograms", "gauges"):
+                for (name, labels), value in snapshot.get(kind, []):
+                    series = merged.setdefault(name, {})
+                    key = tuple(labels)
+                    if isinstance(value, list):
+                        current = series.setdefault(key, [0.0] * len(value))
+                        for idx, v in enumerate(value):
+                            current[idx] += v
+                    else:
+                        series[key] = series.get(key, 0) + value
+
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in self.definitions.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(merged.get(name, {}).items()):
+                label_pairs = [ f'{label}="{escape_label_value(str(v))}"' for label, v in zip(label_names, labels) ]
+                if kind != "histogram":
+                    lines.append(f"{name}{format_labels(label_pairs)} {format_value(value)}")
+                    continue
+                cumulative = 0.0
+                for bound, count in [ *zip(buckets, value), ("+Inf", value[len(buckets)]) ]:
+                    cumulative += count
+                    bucket_labels = format_labels(label_pairs + [ 'le="%s"' % bound ])
+                    lines.append(f"{name}_bucket{bucket_labels} {format_value(cumulative)}")
+                lines.append(f"{name}_sum{format_labels(label_pairs)} {format_value(value[-2])}")
+                lines.append(f"{name}_count{format_labels(label_pairs)} {format_value(value[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(label_pairs: list[str]) -> str:
+    return "{" + ",".join(label_pairs) + "}" if label_pairs else ""
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MultiprocessMetricsStore:
+    """
+    ワーカーごとのスナップショットをディレクトリ内のファイル({pid}.json)で共有する。
+
+    カウンタ・ヒストグラムは終了したワーカーの値も合算し(単調増加を保つ)、
+    ゲージは稼働中のワーカーの値のみを合算する。
+    ディレクトリはserver.pyの起動時に空にする。
+    """
+    def __init__(self, directory: str, registry: MetricsRegistry, flush_seconds: float = METRICS_FLUSH_SECONDS):
+        self.directory = directory
+        self.registry = registry
+        self.flush_seconds = flush_seconds
+        self._thread: threading.Thread | None = None
+
+    def flush(self) -> None:
+        """
+        このワーカーのスナップショットをファイルへ書き出す。
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> list[dict]:
+        """
+        全ワーカーのスナップショットを読み込む。(このワーカーの分は最新の値を書き出してから読み込む)
+        """
+        self.flush()
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not is_process_alive(int(filename.removesuffix(".json"))):
+                snapshot["gauges"] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    def start(self) -> None:
+        """
+        定期的にスナップショットを書き出すスレッドを開始する。
+        """
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.flush_seconds)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning(f"メトリクスの書き出しに失敗しました。: {e}")
+
+        self._thread = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+# アプリ全体で共有するレジストリ
+metrics_registry = MetricsRegistry()
+metrics_registry.counter("http_requests_total", "HTTPリクエスト数", ("method", "route", "status"))
+metrics_registry.histogram("http_request_duration_seconds", "HTTPリクエストの処理時間(秒)", ("method", "route"))
+metrics_registry.histogram("db_pool_checkout_wait_seconds", "コネクションプールからの接続取得待ち時間(秒)")
+metrics_registry.histogram("db_statement_duration_seconds", "SQLの実行時間(秒)", ("kind",))
+metrics_registry.counter("db_statement_errors_total", "SQLの実行エラー数", ("kind",))
+metrics_registry.counter("jira_requests_total", "Jira APIの呼び出し数", ("endpoint", "status"))
+metrics_registry.histogram("jira_request_duration_seconds", "Jira APIの応答時間(秒)", ("endpoint",))
+metrics_registry.counter("jira_retries_total", "Jira APIの再試行数", ("endpoint",))
+
+metrics_store = MultiprocessMetricsStore(METRICS_MULTIPROC_DIR, metrics_registry) if METRICS_MULTIPROC_DIR else None
+
+
+def render_metrics() -> str:
+    """
+    /metricsのレスポンス(Prometheusのテキスト形式)を作成する。
+    """
+    if metrics_store is not None:
+        return metrics_registry.render(metrics_store.collect())
+    return metrics_registry.render([metrics_registry.snapshot()])
+
+
+def statement_kind(statement: str) -> str:
+    """
+    SQLの種類(SELECT, INSERT, UPDATE, DELETE, OTHER)を返す。(WITH句で始まる場合もSELECT等の種類とする)
+    """
+    keyword = statement.lstrip()[:6].upper()
+    if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return keyword
+    if keyword.startswith("WITH"):
+        for kind in ("INSERT", "UPDATE", "DELETE"):
+            if f"{kind} " in statement.upper():
+                return kind
+        return "SELECT"
+    return "OTHER"
+
+
+class MeasuredQueuePool(QueuePool):
+    """
+    接続の取得待ち時間と、接続を取得中(待機・新規接続中)のスレッド数を計測するコネクションプール
+    """
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        with self._waiting_lock:
+            self.waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            with self._waiting_lock:
+                self.waiting -= 1
+            metrics_registry.observe("db_pool_checkout_wait_seconds", (), time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    エンジンにSQLの実行時間の計測と、コネクションプールの使用状況のゲージを設定する。
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        metrics_registry.observe("db_statement_duration_seconds", (statement_kind(statement),), elapsed)
+        # リクエストごとのServer-Timing用
+        add_stage_time("db", elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        start_times = context.connection.info.get("query_start_time") if context.connection is not None else None
+        if start_times:
+            start_times.pop()
+        metrics_registry.inc("db_statement_errors_total", (statement_kind(context.statement or ""),))
+
+    # dispose時にプールが作り直されるため、参照はエンジン経由で行う
+    metrics_registry.gauge(
+        "db_pool_connections", "コネクションプールの接続数 (in_use: 使用中, idle: 待機中)", ("state",),
+        lambda: [ (("in_use",), engine.pool.checkedout()), (("idle",), engine.pool.checkedin()) ])
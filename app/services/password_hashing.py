@@ -0,0 +1,100 @@
+# 標準モジュール
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+# サードパーティ製モジュール
+from argon2 import PasswordHasher
+from argon2.profiles import RFC_9106_LOW_MEMORY
+
+# ref
+#   - https://argon2-cffi.readthedocs.io/en/stable/parameters.html
+
+# Argon2のパラメータ (python -m commands.password_hashing calibrateで算出した値を設定する)
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", str(RFC_9106_LOW_MEMORY.time_cost)))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", str(RFC_9106_LOW_MEMORY.memory_cost)))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", str(RFC_9106_LOW_MEMORY.parallelism)))
+# ハッシュ化を行うスレッド数 (同時に実行するハッシュ化の上限)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# ユーザ一括登録時のハッシュ化を行うスレッド数 (サインイン用のスレッドとは別に確保する)
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+# 校正時のメモリ使用量(KiB)の下限 (OWASP推奨の最小値)
+ARGON2_MIN_MEMORY_COST = 19 * 1024
+
+# アプリ全体で共有するパスワードハッシャー
+password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM)
+
+# ハッシュ化専用のスレッドプール
+# (argon2-cffiはハッシュ計算中にGILを解放するため、スレッドで並列に実行できる)
+password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+# ユーザ一括登録用のスレッドプール
+# (大量のハッシュ化でpassword_hash_executorが埋まり、サインイン・サインアップが待たされないよう分ける)
+user_import_hash_executor = ThreadPoolExecutor(
+    max_workers=USER_IMPORT_HASH_WORKERS, thread_name_prefix="user-import-hash")
+
+
+async def run_in_password_hash_pool(func: Callable, *args):
+    """
+    パスワードのハッシュ化・検証を含む処理を専用スレッドプールで実行する。
+    (イベントループを止めず、同時実行数をPASSWORD_HASH_WORKERSに制限する)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, func, *args)
+
+
+def measure_hash_time(time_cost: int, memory_cost: int, parallelism: int, repeat: int = 3) -> float:
+    """
+    指定パラメータでのハッシュ化に要する時間(ミリ秒, repeat回の最小値)を計測する。
+    """
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return min(elapsed)
+
+
+def calibrate_password_hasher(target_ms: float, memory_cost: int = ARGON2_MEMORY_COST,
+                              parallelism: int = ARGON2_PARALLELISM, max_time_cost: int = 20,
+                              measure: Callable[[int, int, int], float] = measure_hash_time) -> dict:
+    """
+    1回のハッシュ化が目標時間以内に収まる最大のパラメータを算出する。
+
+    メモリ使用量を固定してtime_costを1から増やし、目標時間を超える直前の値を採用する。
+    time_cost=1でも目標時間を超える場合はメモリ使用量を半分ずつ減らす。(下限: ARGON2_MIN_MEMORY_COST)
+
+    Attributes
+    ----------
+    target_ms: float
+        目標時間(ミリ秒)
+    memory_cost: int
+        メモリ使用量(KiB)の上限
+    parallelism: int
+    max_time_cost: int
+        time_costの上限
+    measure: Callable[[int, int, int], float]
+        (time_cost, memory_cost, parallelism)からハッシュ化時間(ミリ秒)を計測する関数
+
+    Returns
+    -------
+    params: dict
+        key: time_cost, memory_cost, parallelism, elapsed_ms
+    """
+    elapsed_ms = measure(1, memory_cost, parallelism)
+    while elapsed_ms > target_ms and memory_cost // 2 >= ARGON2_MIN_MEMORY_COST:
+        memory_cost //= 2
+        elapsed_ms = measure(1, memory_cost, parallelism)
+
+    time_cost = 1
+    while time_cost < max_time_cost:
+        next_elapsed_ms = measure(time_cost + 1, memory_cost, parallelism)
+        if next_elapsed_ms > target_ms:
+            break
+        time_cost += 1
+        elapsed_ms = next_elapsed_ms
+
+    return { "time_cost": time_cost, "memory_cost": memory_cost,
+             "parallelism": parallelism, "elapsed_ms": elapsed_ms }
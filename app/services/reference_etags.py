@@ -0,0 +1,88 @@
+# 標準モジュール
+# サードパーティ製モジュール
+from sqlalchemy import select, func, union_all, literal
+from sqlalchemy.orm import sessionmaker
+# プロジェクトモジュール
+from db.models import Project, Issue, User
+from db.engine import get_workload_db_engine
+
+
+# 参照系APIごとに、レスポンスの内容が依存するテーブル
+REFERENCE_SOURCES: dict[str, list] = {
+    "projects": [Project],
+    "issues": [Project, Issue],
+    "users": [User],
+}
+# 参照系APIのキャッシュ制御 (ブラウザには保持させるが、利用時は毎回ETagで再検証させる)
+REFERENCE_CACHE_CONTROL = "private, no-cache"
+
+
+def compute_reference_etag(resource: str, representation: str | None = None) -> str:
+    """
+    参照系API(project, issue, user一覧)のETagを作成する。
+    依存するテーブルの件数と最終更新日時のみを1回のクエリで取得するため、一覧の取得よりも軽量。
+
+    Attributes
+    ----------
+    resource: str
+        projects, issues, users
+    representation: str | None
+        JSON以外の形式で返却する場合の形式名 (arrow, parquet)
+
+    Returns
+    -------
+    etag: str
+        W/"{resource}-{件数}-{最終更新日時}-...[-{形式名}]"
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    stmt = union_all(*[
+        select(literal(idx).label("idx"), func.count().label("num_of_rows"),
+               func.max(model.update_timestamp).label("last_updated"))
+        .select_from(model)
+        for idx, model in enumerate(REFERENCE_SOURCES[resource]) ])
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        rows = sorted(session.execute(stmt).all())
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
+
+    validators = [ f"{row.num_of_rows}-{row.last_updated.timestamp() if row.last_updated else 0:.6f}"
+                   for row in rows ]
+    if representation is not None:
+        validators.append(representation)
+    return f'W/"{resource}-{"-".join(validators)}"'
+
+
+def is_not_modified(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Matchヘッダに現在のETagが含まれるか(304を返却できるか)を返す。(弱い比較)
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == current for candidate in if_none_match.split(","))
+
+
+def reference_cache_headers(etag: str) -> dict[str, str]:
+    """
+    参照系APIのレスポンスに付与するヘッダを返す。
+    """
+    return {"ETag": etag, "Cache-Control": REFERENCE_CACHE_CONTROL}
+
+
+def warm_reference_etags() -> None:
+    """
+    全ての参照系データのETagを算出し、算出用のクエリ(SQLのコンパイル結果, DBのバッファ)を事前に読み込む。
+    (起動時に実行する)
+    """
+    for resource in REFERENCE_SOURCES:
+        compute_reference_etag(resource)
@@ -0,0 +1,106 @@
+# 標準モジュール
+import time
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections.abc import Callable
+
+# ref:
+#    - https://www.w3.org/TR/server-timing/
+
+# Server-Timingヘッダに出力する処理段階と説明 (出力順)
+REQUEST_STAGES: dict[str, str] = {
+    "auth": "JWT検証",
+    "db": "SQL実行",
+    "convert": "行・DataFrameの変換",
+    "endpoint": "エンドポイント全体",
+    "validate": "レスポンスモデルの検証",
+    "encode": "JSONエンコード",
+}
+
+
+class RequestTiming:
+    """
+    1リクエスト分の処理段階ごとの所要時間
+    """
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.endpoint_finished_at: float | None = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def to_server_timing(self) -> str:
+        """
+        Server-Timingヘッダの値を作成する。(SQLは実行回数も出力する)
+
+        Returns
+        -------
+        server_timing: str
+            例: auth;dur=0.4, db;dur=35.2;desc="12 queries", total;dur=48.1
+        """
+        metrics = []
+        for stage in REQUEST_STAGES:
+            if stage not in self.durations:
+                continue
+            metric = f"{stage};dur={self.durations[stage] * 1000:.1f}"
+            if stage == "db":
+                metric += f';desc="{self.counts[stage]} queries"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def to_dict(self) -> dict:
+        """
+        ログ出力用に所要時間(ミリ秒)を返す。
+        """
+        return {
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "stages_ms": { stage: round(seconds * 1000, 3) for stage, seconds in self.durations.items() },
+            "db_queries": self.counts.get("db", 0),
+        }
+
+
+# 処理中のリクエストの所要時間 (ServerTimingMiddlewareで設定する。スレッドプールで実行する処理にも引き継がれる)
+current_request_timing: ContextVar[RequestTiming | None] = ContextVar("current_request_timing", default=None)
+
+
+def add_stage_time(stage: str, seconds: float) -> None:
+    """
+    処理中のリクエストに処理段階の所要時間を加算する。(リクエスト外の場合は何もしない)
+    """
+    timing = current_request_timing.get()
+    if timing is not None:
+        timing.add(stage, seconds)
+
+
+@contextmanager
+def measure_stage(stage: str):
+    """
+    withブロックの所要時間を処理段階の時間として加算する。
+    (SQLの実行時間は別途dbとして計測するため、SQLを実行する処理は含めないこと)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(stage, time.perf_counter() - start)
+
+
+def timed_stage(stage: str) -> Callable:
+    """
+    関数の所要時間を処理段階の時間として加算するデコレータ
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,211 @@
+# 標準モジュール
+import os
+import re
+import time
+import random
+import logging
+import threading
+import traceback
+import datetime as dt
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+# サードパーティ製モジュール
+from sqlalchemy import event, Engine
+
+# ref:
+#    - https://docs.sqlalchemy.org/en/20/core/events.html#sqlalchemy.events.ConnectionEvents
+#    - https://www.postgresql.org/docs/current/sql-explain.html
+
+# 遅いSQLとして記録する実行時間(ミリ秒) (0の場合は記録しない)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+# 遅いSELECTのうち、EXPLAIN (ANALYZE, BUFFERS)を実行する割合 (0〜1)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+# 保持する遅いSQLの件数 (ワーカーごと)
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+# EXPLAIN ANALYZEの実行時間の上限(ミリ秒)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+# ログに出力するパラメータ値の最大文字数
+SLOW_QUERY_PARAM_MAX_LENGTH = 64
+# 値を伏せるパラメータ名
+SENSITIVE_PARAM_PATTERN = re.compile(r"password|passwd|token|secret|hash|email", re.IGNORECASE)
+# 値を伏せるパラメータ値 (メールアドレスを含む値。ログイン試行回数制限のキー"email:..."等、名前で判別できないもの)
+SENSITIVE_VALUE_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# EXPLAINの実行中であることを示す接続情報のキー (EXPLAIN自体を記録しないため)
+EXPLAIN_CONNECTION_FLAG = "slow_query_explain"
+# 呼び出し元を探す範囲 (appディレクトリ)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    SQLのリテラル・パラメータを?に置き換え、空白を詰めて同種のSQLを同じ文字列にする。
+    (IN句等で展開されたパラメータの並びは(...)にまとめる)
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    sql = re.sub(r"%\(\w+\)s|%s|\$\d+", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(...)", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def redact_parameters(parameters) -> dict | list | None:
+    """
+    ログ出力用にパラメータを加工する。
+    パスワード・トークン・メールアドレス等の値(パラメータ名で判定)と、メールアドレスを含む値は伏せ、長い値は切り詰める。
+    """
+    def redact_value(name, value):
+        if name is not None and SENSITIVE_PARAM_PATTERN.search(str(name)):
+            return "<redacted>"
+        text = repr(value)
+        if SENSITIVE_VALUE_PATTERN.search(text):
+            return "<redacted>"
+        if len(text) > SLOW_QUERY_PARAM_MAX_LENGTH:
+            return text[:SLOW_QUERY_PARAM_MAX_LENGTH] + "..."
+        return text
+
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return { key: redact_value(key, value) for key, value in parameters.items() }
+    if isinstance(parameters, (list, tuple)):
+        # executemanyの場合は先頭行のみ
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return redact_parameters(parameters[0])
+        return [ redact_value(None, value) for value in parameters ]
+    return redact_value(None, parameters)
+
+
+def find_call_site() -> str | None:
+    """
+    SQLを実行したアプリ内の呼び出し元(ファイル:行 関数名)を返す。
+    """
+    for frame in reversed(traceback.extract_stack()):
+        if not frame.filename.startswith(APP_DIR) or frame.filename == __file__:
+            continue
+        if os.sep + "site-packages" + os.sep in frame.filename:
+            continue
+        return f"{os.path.relpath(frame.filename, APP_DIR)}:{frame.lineno} {frame.name}"
+    return None
+
+
+def is_explainable(statement: str) -> bool:
+    """
+    EXPLAIN ANALYZEで再実行しても副作用が無いSQL(SELECT)かを返す。
+    """
+    sql = statement.lstrip().upper()
+    if sql.startswith("SELECT"):
+        return True
+    return sql.startswith("WITH") and not re.search(r"\b(INSERT|UPDATE|DELETE)\b", sql)
+
+
+class SlowQueryLog:
+    """
+    遅いSQLを記録する。
+
+    閾値を超えたSQLは正規化したSQL・パラメータ(一部を伏せたもの)・呼び出し元をログに出力して保持する。
+    SELECTの一部(sample_rateの割合)は、別スレッド・別接続の読み取り専用トランザクションで
+    EXPLAIN (ANALYZE, BUFFERS)を実行して実行計画を保持する。(リクエストの処理時間には影響しない)
+    """
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE, max_entries: int = SLOW_QUERY_LOG_SIZE):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.entries: deque[dict] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._random = random.Random()
+
+    def record(self, engine: Engine | None, statement: str, parameters, elapsed_ms: float,
+               executemany: bool = False) -> dict:
+        """
+        遅いSQLを記録し、必要に応じてEXPLAINの実行を予約する。
+
+        Returns
+        -------
+        entry: dict
+            key: timestamp, duration_ms, sql, parameters, call_site, explain
+        """
+        entry = {
+            "timestamp": dt.datetime.now(), "duration_ms": round(elapsed_ms, 3),
+            "sql": normalize_sql(statement), "parameters": redact_parameters(parameters),
+            "call_site": find_call_site(), "explain": None,
+        }
+        logger.warning(
+            f"遅いSQLを検出しました。({entry['duration_ms']}ms, {entry['call_site']}): "
+            f"{entry['sql']} parameters={entry['parameters']}")
+        with self._lock:
+            self.entries.append(entry)
+
+        if engine is not None and not executemany and is_explainable(statement) \
+                and self._random.random() < self.sample_rate:
+            self._explain_executor.submit(self.explain, engine, entry, statement, parameters)
+        return entry
+
+    def explain(self, engine: Engine, entry: dict, statement: str, parameters) -> None:
+        """
+        EXPLAIN (ANALYZE, BUFFERS)を実行し、結果をentryに格納する。
+        """
+        try:
+            with engine.connect() as conn:
+                conn.info[EXPLAIN_CONNECTION_FLAG] = True
+                try:
+                    conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+                    result = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters or ())
+                    entry["explain"] = "\n".join(row[0] for row in result)
+                finally:
+                    conn.info.pop(EXPLAIN_CONNECTION_FLAG, None)
+                    conn.rollback()
+            logger.warning(f"遅いSQLの実行計画 ({entry['call_site']}):\n{entry['explain']}")
+        except Exception as e:
+            logger.warning(f"遅いSQLの実行計画の取得に失敗しました。: {e}")
+
+    def recent(self) -> list[dict]:
+        """
+        保持している遅いSQLを新しい順に返す。
+        """
+        with self._lock:
+            return list(reversed(self.entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+
+def instrument_slow_queries(engine: Engine, query_log: SlowQueryLog | None = None) -> None:
+    """
+    エンジンで実行したSQLのうち、閾値を超えたものを記録する。(閾値が0の場合は何もしない)
+
+    Attributes
+    ----------
+    engine: Engine
+    query_log: SlowQueryLog | None
+        記録先 (未指定の場合はアプリ全体で共有するslow_query_log)
+    """
+    query_log = query_log or slow_query_log
+    if query_log.threshold_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["slow_query_start_time"].pop()) * 1000
+        if elapsed_ms < query_log.threshold_ms or conn.info.get(EXPLAIN_CONNECTION_FLAG):
+            return
+        query_log.record(engine, statement, parameters, elapsed_ms, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        start_times = context.connection.info.get("slow_query_start_time") if context.connection is not None else None
+        if start_times:
+            start_times.pop()
+
+
+# アプリ全体で共有する遅いSQLの記録
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,245 @@
+# 標準モジュール
+import random
+import datetime as dt
+from collections.abc import Iterator
+# サードパーティ製モジュール
+from sqlalchemy import insert, delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+# プロジェクトモジュール
+from db.models import Project, Issue, User, Workload, WorkloadFact, WorkloadDailySummary
+from db.engine import get_workload_db_engine
+from services.password_hashing import password_hasher
+from services.workload_partitions import ensure_workload_partitions
+from services.workload_facts import rebuild_workload_facts
+from services.workload_summaries import rebuild_workload_daily_summary
+from services.workload_search_cache import workload_search_cache
+from services.user_cache import user_cache
+
+# 合成データのID (project, issue, user) の開始値 (Jiraから取り込んだデータと重複させず、IDの範囲で削除するため)
+SYNTHETIC_ID_BASE = 9_000_000_000
+# 1回のINSERTで登録する行数
+SYNTHETIC_INSERT_BATCH_SIZE = 10000
+# 合成データの規模
+#   - projects: プロジェクト数
+#   - issue_depth: subtask以外のissueの階層数 (エピック → ストーリー → タスク)
+#   - issue_branching: 1つのissueが持つ子issueの数 (最上位はプロジェクトあたりの数)
+#   - subtasks_per_issue: 最下層のissueが持つsubtaskの数
+#   - users: ユーザ数
+#   - years: 工数を登録する年数 (終了日から遡る)
+#   - workloads_per_user_day: ユーザ1人の1営業日あたりの工数件数
+#   - subtasks_per_user: ユーザ1人が工数を登録するsubtaskの数
+SYNTHETIC_SCALES: dict[str, dict[str, int]] = {
+    "small": { "projects": 5, "issue_depth": 2, "issue_branching": 5, "subtasks_per_issue": 4,
+               "users": 20, "years": 1, "workloads_per_user_day": 2, "subtasks_per_user": 10 },
+    "medium": { "projects": 20, "issue_depth": 2, "issue_branching": 8, "subtasks_per_issue": 5,
+                "users": 100, "years": 2, "workloads_per_user_day": 2, "subtasks_per_user": 20 },
+    "large": { "projects": 50, "issue_depth": 3, "issue_branching": 6, "subtasks_per_issue": 5,
+               "users": 300, "years": 3, "workloads_per_user_day": 2, "subtasks_per_user": 30 },
+}
+# 合成データのユーザのパスワード (全ユーザ共通。先頭のユーザは管理者)
+SYNTHETIC_USER_PASSWORD = "synthetic"
+ISSUE_TYPES_BY_DEPTH = ["エピック", "ストーリー", "タスク", "タスク", "タスク"]
+ISSUE_STATUSES = ["未着手", "進行中", "完了"]
+
+# ローカルとみなすDBのホスト
+LOCAL_DATABASE_HOSTS = (None, "", "localhost", "127.0.0.1", "::1")
+
+
+def is_local_database_url(url: str) -> bool:
+    """
+    DBの接続先がローカルかを返す。(合成データの登録・削除を誤って共有DBに行わないため)
+    """
+    return make_url(url).host in LOCAL_DATABASE_HOSTS
+
+
+def synthetic_user_email(idx: int) -> str:
+    """
+    合成データのidx番目のユーザのメールアドレスを返す。
+    """
+    return f"synthetic_user_{idx}@example.com"
+
+
+def generate_projects(scale: dict, now: dt.datetime) -> list[dict]:
+    """
+    合成データのプロジェクトを作成する。
+    """
+    return [
+        { "id": SYNTHETIC_ID_BASE + idx, "name": f"合成プロジェクト{idx}", "jira_key": f"SYN{idx}",
+          "description": f"合成データのプロジェクト{idx}", "is_target": idx % 5 != 4,
+          "update_timestamp": now, "create_timestamp": now }
+        for idx in range(scale["projects"]) ]
+
+
+def generate_issues(scale: dict, projects: list[dict], rnd: random.Random, now: dt.datetime) -> list[dict]:
+    """
+    合成データのissue, subtaskを作成する。(親issueが子issueより先に並ぶ)
+
+    Returns
+    -------
+    issues: list[dict]
+        issueテーブルの行
+    """
+    issues = []
+    next_id = SYNTHETIC_ID_BASE
+
+    def new_issue(project_id, parent_issue_id, issue_type, is_subtask):
+        nonlocal next_id
+        issue = {
+            "id": next_id, "name": f"{issue_type}{next_id - SYNTHETIC_ID_BASE}",
+            "project_id": project_id, "parent_issue_id": parent_issue_id,
+            "type": issue_type, "is_subtask": is_subtask, "status": rnd.choice(ISSUE_STATUSES),
+            "limit_date": (now + dt.timedelta(days=rnd.randint(-365, 180))).date(),
+            "description": f"合成データ({issue_type})", "update_timestamp": now, "create_timestamp": now }
+        next_id += 1
+        issues.append(issue)
+        return issue["id"]
+
+    for project in projects:
+        parents = [None]
+        for depth in range(scale["issue_depth"]):
+            parents = [ new_issue(project["id"], parent, ISSUE_TYPES_BY_DEPTH[depth], False)
+                        for parent in parents for _ in range(scale["issue_branching"]) ]
+        for parent in parents:
+            for _ in range(scale["subtasks_per_issue"]):
+                new_issue(project["id"], parent, "サブタスク", True)
+    return issues
+
+
+def generate_users(scale: dict, hashed_password: str, now: dt.datetime) -> list[dict]:
+    """
+    合成データのユーザを作成する。(パスワードは全ユーザ共通)
+    """
+    return [
+        { "id": SYNTHETIC_ID_BASE + idx, "name": f"synthetic_user_{idx}",
+          "family_name": "合成", "first_name": f"ユーザ{idx}",
+          "email": synthetic_user_email(idx), "hashed_password": hashed_password,
+          "is_superuser": idx == 0, "is_active": True,
+          "update_timestamp": now, "create_timestamp": now }
+        for idx in range(scale["users"]) ]
+
+
+def generate_workloads(scale: dict, users: list[dict], subtask_ids: list[int], end_date: dt.date,
+                       rnd: random.Random, now: dt.datetime) -> Iterator[dict]:
+    """
+    合成データの工数を作成する。(終了日からscale["years"]年分の営業日)
+
+    Returns
+    -------
+    workloads: Iterator[dict]
+        workloadテーブルの行 (idは採番されるため含まない)
+    """
+    start_date = end_date - dt.timedelta(days=365 * scale["years"])
+    work_dates = [ start_date + dt.timedelta(days=offset) for offset in range((end_date - start_date).days + 1) ]
+    work_dates = [ work_date for work_date in work_dates if work_date.weekday() < 5 ]
+
+    for user in users:
+        assigned = rnd.sample(subtask_ids, min(scale["subtasks_per_user"], len(subtask_ids)))
+        for work_date in work_dates:
+            for subtask_id in rnd.sample(assigned, min(scale["workloads_per_user_day"], len(assigned))):
+                yield {
+                    "subtask_id": subtask_id, "user_id": user["id"], "work_date": work_date,
+                    "workload_minute": rnd.randrange(15, 481, 15), "detail": "合成データの工数",
+                    "update_timestamp": now, "create_timestamp": now, "version": 1 }
+
+
+def insert_in_batches(session, model, rows, batch_size: int = SYNTHETIC_INSERT_BATCH_SIZE) -> int:
+    """
+    行をbatch_size件ずつINSERTし、登録件数を返す。
+    """
+    num_of_rows = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            session.execute(insert(model), batch)
+            num_of_rows += len(batch)
+            batch = []
+    if batch:
+        session.execute(insert(model), batch)
+        num_of_rows += len(batch)
+    return num_of_rows
+
+
+def load_synthetic_dataset(scale: dict, seed: int = 0, end_date: dt.date | None = None) -> dict:
+    """
+    合成データ(プロジェクト, issue, ユーザ, 工数)をDBに登録する。
+    登録済みの合成データは削除してから登録し、工数検索用・日次集計テーブルも再作成する。
+
+    Attributes
+    ----------
+    scale: dict
+        合成データの規模 (SYNTHETIC_SCALESの値の形式)
+    seed: int
+        乱数のシード (同じ値・規模であれば同じデータを作成する)
+    end_date: date | None
+        工数を登録する最終日 (既定値は今日)
+
+    Returns
+    -------
+    counts: dict
+        key: projects, issues, subtasks, users, workloads
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    rnd = random.Random(seed)
+    now = dt.datetime.now()
+    end_date = end_date or dt.date.today()
+
+    projects = generate_projects(scale, now)
+    issues = generate_issues(scale, projects, rnd, now)
+    subtask_ids = [ issue["id"] for issue in issues if issue["is_subtask"] ]
+    users = generate_users(scale, password_hasher.hash(SYNTHETIC_USER_PASSWORD), now)
+    start_date = end_date - dt.timedelta(days=365 * scale["years"])
+    ensure_workload_partitions([ start_date + dt.timedelta(days=offset)
+                                 for offset in range(0, (end_date - start_date).days + 32, 28) ])
+
+    clear_synthetic_dataset()
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        insert_in_batches(session, Project, projects)
+        insert_in_batches(session, Issue, issues)
+        insert_in_batches(session, User, users)
+        num_of_workloads = insert_in_batches(
+            session, Workload, generate_workloads(scale, users, subtask_ids, end_date, rnd, now))
+        session.commit()
+        session.close()
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
+
+    rebuild_workload_facts()
+    rebuild_workload_daily_summary()
+    return { "projects": len(projects), "issues": len(issues) - len(subtask_ids), "subtasks": len(subtask_ids),
+             "users": len(users), "workloads": num_of_workloads }
+
+
+def clear_synthetic_dataset() -> None:
+    """
+    合成データ(IDがSYNTHETIC_ID_BASE以上のもの)をDBから削除する。
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        session.execute(delete(WorkloadFact).where(WorkloadFact.user_id >= SYNTHETIC_ID_BASE))
+        session.execute(delete(WorkloadDailySummary).where(WorkloadDailySummary.user_id >= SYNTHETIC_ID_BASE))
+        session.execute(delete(Workload).where(Workload.user_id >= SYNTHETIC_ID_BASE))
+        session.execute(delete(Issue).where(Issue.id >= SYNTHETIC_ID_BASE))
+        session.execute(delete(Project).where(Project.id >= SYNTHETIC_ID_BASE))
+        session.execute(delete(User).where(User.id >= SYNTHETIC_ID_BASE))
+        session.commit()
+        session.close()
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
+    workload_search_cache.clear()
+    user_cache.clear()
@@ -0,0 +1,122 @@
+# 標準モジュール
+import os
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+# ユーザ情報のキャッシュ件数・有効期間(秒) (0の場合はキャッシュしない)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+# デコード済みJWTのキャッシュ件数 (0の場合はキャッシュしない)
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "4096"))
+
+
+class ExpiringCache:
+    """
+    有効期限付きのLRUキャッシュ
+
+    キャッシュはプロセス内でのみ共有されるため、複数プロセスで起動した場合に
+    他プロセスでの変更は有効期限が切れるまで反映されない。
+    """
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        キャッシュ済みの値を返す。無い(または有効期限切れの)場合はNoneを返す。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """
+        値をキャッシュする。
+
+        Attributes
+        ----------
+        key: Hashable
+        value: Any
+        expires_at: float
+            有効期限 (UNIX時間)
+        """
+        if self.max_entries <= 0 or expires_at <= self.clock():
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        指定したキーのキャッシュを破棄する。
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UserCache(ExpiringCache):
+    """
+    ユーザIDをキーとしたユーザ情報のキャッシュ
+
+    ユーザ情報の変更・無効化・管理者権限の付与時はinvalidate(user_id)で破棄すること。
+    """
+    def __init__(self, max_entries: int = USER_CACHE_SIZE, ttl_seconds: int = USER_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        super().__init__(max_entries, clock)
+        self.ttl_seconds = ttl_seconds
+
+    def get_or_fetch(self, user_id: int, fetch: Callable[[int], dict]) -> dict:
+        """
+        キャッシュ済みのユーザ情報を返す。無い場合はfetchで取得してキャッシュする。
+
+        Attributes
+        ----------
+        user_id: int
+        fetch: Callable[[int], dict]
+            DBからユーザ情報を取得する関数
+
+        Returns
+        -------
+        user_info: dict
+        """
+        user_id = int(user_id)
+        user_info = self.get(user_id)
+        if user_info is None:
+            user_info = fetch(user_id)
+            self.put(user_id, user_info)
+        return dict(user_info)
+
+    def put(self, user_id: int, user_info: dict) -> None:
+        """
+        ユーザ情報を有効期間(ttl_seconds)付きでキャッシュする。
+        """
+        self.set(int(user_id), user_info, self.clock() + self.ttl_seconds)
+
+
+# アプリ全体で共有するキャッシュ
+user_cache = UserCache()
+# JWTトークンをキーとしたsub(ユーザID)のキャッシュ (有効期限はトークンのexp)
+jwt_claims_cache = ExpiringCache(JWT_CLAIMS_CACHE_SIZE)
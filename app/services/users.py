@@ -1,27 +1,36 @@
 # 標準モジュール
-import os
+import io
+import csv
+import logging
 import datetime as dt
 # サードパーティ製モジュール
-from sqlalchemy import create_engine, select
+from sqlalchemy import select, update, or_
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert
-from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError, InvalidHashError
 # プロジェクトモジュール
 from db.models import User
+from db.engine import get_workload_db_engine
 from services.auth import Auth_Utils
 from services.custom_exceptions import LoginError, SignupError
+from services.user_cache import user_cache
+from services.password_hashing import password_hasher, user_import_hash_executor
 
 # ref
 #   - https://argon2-cffi.readthedocs.io/en/stable/
 
-# パスワードハッシャーのインスタンス化
-ph = PasswordHasher()
+# パスワードハッシャー (パラメータは環境変数ARGON2_*で指定)
+ph = password_hasher
 # Auth_Utilsのインスタンス化
 auth = Auth_Utils()
 
-# sql alchemyのエンジン作成
-workload_db_engine = create_engine(os.environ["WORKLOAD_DATABASE_URI"])
+logger = logging.getLogger(__name__)
+
+# 一括登録時の項目と最大文字数 (userテーブルの定義に合わせる)
+USER_IMPORT_FIELDS: dict[str, int | None] = {
+    "name": 60, "family_name": 30, "first_name": 30, "email": 100, "password": None }
+# 一括登録の最大件数
+USER_IMPORT_MAX_ROWS = 5000
 
 
 def convert_password_to_hashed_one(password: str) -> str:
@@ -110,7 +119,7 @@ def insert_new_user_into_app_db(user_info: dict) -> list[dict, str]:
         raise SignupError("emailが入力されていません。")
 
     # emailが登録済みかどうかを判定する
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     stmt = select(User.id).where(User.email == email)
     try:
@@ -160,6 +169,132 @@ def insert_new_user_into_app_db(user_info: dict) -> list[dict, str]:
     return [res_message, jwt_token]
 
 
+def parse_user_import_csv(text: str) -> list[dict]:
+    """
+    一括登録用のCSV(ヘッダ行: name, family_name, first_name, email, password)をdictのリストに変換する。
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    return [ { key.strip(): value for key, value in row.items() if key is not None } for row in reader ]
+
+
+def validate_user_import_row(row) -> str | None:
+    """
+    一括登録する1行分のユーザ情報を検証し、不正な場合はエラーメッセージを返す。
+    """
+    if not isinstance(row, dict):
+        return "ユーザ情報の形式が不正です。"
+    for field, max_length in USER_IMPORT_FIELDS.items():
+        value = row.get(field)
+        if not isinstance(value, str) or (field in ("name", "email", "password") and value.strip() == ""):
+            return f"{field}が入力されていません。"
+        if max_length is not None and len(value) > max_length:
+            return f"{field}は{max_length}文字以内で入力してください。"
+    if "@" not in row["email"]:
+        return "emailの形式が不正です。"
+    return None
+
+
+def import_users_into_app_db(users: list) -> dict:
+    """
+    ユーザの一括登録処理
+
+    登録済みのemail・nameは1回のクエリでまとめて確認し、パスワードはハッシュ化専用の
+    スレッドプールで並列にハッシュ化した上で、全ユーザを1トランザクション・1回のINSERTで登録する。
+    (ハッシュ化専用のスレッドプール上から呼び出さないこと)
+
+    Attributes
+    ----------
+    users: list[dict]
+        key: name, family_name, first_name, email, password
+
+    Returns
+    -------
+    result: dict
+        key: created, skipped, results (行ごとの結果。key: row, email, status, message, user_id)
+        statusはcreated, duplicate(登録済み・ファイル内で重複), invalid(入力不備)のいずれか
+
+    Exceptions
+    ----------
+    - 件数が上限を超えた場合
+    - DBへの登録に失敗した場合
+    """
+    if len(users) > USER_IMPORT_MAX_ROWS:
+        raise SignupError(f"一括登録できるのは{USER_IMPORT_MAX_ROWS}件までです。")
+
+    results = [ {"row": idx + 1, "email": row.get("email") if isinstance(row, dict) else None,
+                 "status": "invalid", "message": None, "user_id": None}
+                for idx, row in enumerate(users) ]
+
+    # 入力の検証とファイル内の重複確認
+    candidates: list[int] = []
+    seen_emails, seen_names = set(), set()
+    for idx, row in enumerate(users):
+        message = validate_user_import_row(row)
+        if message is not None:
+            results[idx]["message"] = message
+            continue
+        email, name = row["email"].strip(), row["name"].strip()
+        if email in seen_emails or name in seen_names:
+            results[idx].update(status="duplicate", message="ファイル内でemailまたはnameが重複しています。")
+            continue
+        seen_emails.add(email)
+        seen_names.add(name)
+        candidates.append(idx)
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        # 登録済みのemail, nameを1回のクエリで確認する
+        stmt = select(User.email, User.name)\
+                .where(or_(User.email.in_(seen_emails), User.name.in_(seen_names)))
+        registered = session.execute(stmt).all() if candidates else []
+    except Exception as e:
+        session.close()
+        raise SignupError(f"ユーザ一括登録時のemail検証作業に失敗しました。\nerror message: {e}")
+    registered_emails = { res.email for res in registered }
+    registered_names = { res.name for res in registered }
+    new_user_idxs = []
+    for idx in candidates:
+        if users[idx]["email"].strip() in registered_emails or users[idx]["name"].strip() in registered_names:
+            results[idx].update(status="duplicate", message="emailまたはnameが登録済みです。")
+        else:
+            new_user_idxs.append(idx)
+
+    # パスワードの並列ハッシュ化 (サインイン用とは別のスレッドプールで実行する)
+    hashed_passwords = list(user_import_hash_executor.map(
+        convert_password_to_hashed_one, [ users[idx]["password"] for idx in new_user_idxs ]))
+
+    new_users = [
+        { "name": users[idx]["name"].strip(), "email": users[idx]["email"].strip(),
+          "family_name": users[idx]["family_name"], "first_name": users[idx]["first_name"],
+          "hashed_password": hashed_password, "is_superuser": False, "update_timestamp": dt.datetime.now() }
+        for idx, hashed_password in zip(new_user_idxs, hashed_passwords) ]
+    try:
+        inserted = {}
+        if new_users:
+            # 検証後に他のリクエストで登録されたemail, nameは登録せずに重複として扱う
+            insert_stmt = insert(User).values(new_users)\
+                .on_conflict_do_nothing()\
+                .returning(User.id, User.email)
+            inserted = { res.email: res.id for res in session.execute(insert_stmt) }
+        session.commit()
+        session.close()
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(f"ユーザ一括登録に失敗しました。\nerror message: {e}")
+
+    for idx in new_user_idxs:
+        user_id = inserted.get(users[idx]["email"].strip())
+        if user_id is None:
+            results[idx].update(status="duplicate", message="emailまたはnameが登録済みです。")
+        else:
+            results[idx].update(status="created", user_id=user_id)
+
+    num_of_created = sum(1 for res in results if res["status"] == "created")
+    return {"created": num_of_created, "skipped": len(results) - num_of_created, "results": results}
+
+
 def verify_user_info_for_login(email: str, password: str) -> list[dict, str]:
     """
     ログイン処理
@@ -183,7 +318,7 @@ def verify_user_info_for_login(email: str, password: str) -> list[dict, str]:
     - 認証情報が間違っていた場合
     - 無効なアカウントでログインした場合
     """
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     stmt = select(User.id, User.email, User.name,
                   User.first_name, User.family_name, User.is_superuser,
@@ -192,6 +327,7 @@ def verify_user_info_for_login(email: str, password: str) -> list[dict, str]:
             .where(User.email == email)
     try:
         res = session.execute(stmt).first()
+        session.close()
     except Exception as e:
         session.close()
         raise Exception("ログイン処理に失敗しました。")
@@ -208,6 +344,10 @@ def verify_user_info_for_login(email: str, password: str) -> list[dict, str]:
     elif not is_active:
         raise LoginError("アカウントが無効になっているためログインできません。")
 
+    # ハッシュ化パラメータが変更されている場合は、現在のパラメータで再ハッシュ化する
+    if ph.check_needs_rehash(hashed_password):
+        rehash_user_password(res.id, password)
+
     # レスポンス用データ
     user_info = {
         "id": res.id, "name": res.name, "email": res.email,
@@ -219,6 +359,36 @@ def verify_user_info_for_login(email: str, password: str) -> list[dict, str]:
     return [user_info, jwt_token]
 
 
+def rehash_user_password(user_id: int, password: str) -> None:
+    """
+    ログイン時に検証済みのパスワードを現在のパラメータで再ハッシュ化して保存する。
+    (失敗してもログインは継続し、次回ログイン時に再度実行する)
+
+    Attributes
+    ----------
+    user_id: int
+    password: str
+        検証済みのパスワード
+
+    Returns
+    -------
+    None
+    """
+    stmt = update(User)\
+            .where(User.id == user_id)\
+            .values(hashed_password=convert_password_to_hashed_one(password))
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        session.execute(stmt)
+        session.commit()
+        session.close()
+    except Exception as e:
+        session.rollback()
+        session.close()
+        logger.warning(f"パスワードの再ハッシュ化に失敗しました。(user_id: {user_id}): {e}")
+
+
 def fetch_active_user_list():
     """
     有効なユーザ一覧を返却する
@@ -236,7 +406,7 @@ def fetch_active_user_list():
     ----------
     - DBからのデータ取得に失敗した場合
     """
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     stmt = select(User.id, User.name)\
             .where(User.is_active == True)
@@ -255,6 +425,7 @@ def fetch_active_user_list():
 def fetch_user_using_specify_id(user_id: str):
     """
     指定したidを持つユーザ情報を取得する。
+    (JWT検証のたびに呼ばれるため、キャッシュ済みの場合はDBを参照しない)
 
     Attributes
     ----------
@@ -270,12 +441,19 @@ def fetch_user_using_specify_id(user_id: str):
     ----------
     - DBからのデータ取得に失敗した場合
     """
+    return user_cache.get_or_fetch(user_id, _fetch_user_from_db)
+
+
+def _fetch_user_from_db(user_id: int) -> dict:
+    """
+    指定したidを持つユーザ情報をDBから取得する。
+    """
     stmt = select(
                 User.id, User.name, User.first_name, User.family_name,
                 User.is_superuser, User.email, User.is_superuser,
                 User.update_timestamp, User.create_timestamp)\
             .where(User.id == user_id)
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
     try:
@@ -295,3 +473,40 @@ def fetch_user_using_specify_id(user_id: str):
         "is_superuser": res.is_superuser,
         "create_timestamp": res.create_timestamp, "update_timestamp": res.update_timestamp, }
     return user_info
+
+
+def prime_user_cache() -> int:
+    """
+    有効なユーザ情報を1回のクエリでまとめて取得し、ユーザ情報のキャッシュに格納する。
+    (起動時に実行し、起動直後のJWT検証でDBを参照しないようにする)
+
+    Returns
+    -------
+    num_of_users: int
+        キャッシュしたユーザ数
+    """
+    if user_cache.max_entries <= 0:
+        return 0
+    stmt = select(
+                User.id, User.name, User.first_name, User.family_name,
+                User.is_superuser, User.email,
+                User.update_timestamp, User.create_timestamp)\
+            .where(User.is_active == True)\
+            .order_by(User.update_timestamp.desc())\
+            .limit(user_cache.max_entries)
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        res = session.execute(stmt).all()
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
+
+    for row in res:
+        user_cache.put(row.id, {
+            "id": row.id, "name": row.name, "family_name": row.family_name,
+            "first_name": row.first_name, "email": row.email,
+            "is_superuser": row.is_superuser,
+            "create_timestamp": row.create_timestamp, "update_timestamp": row.update_timestamp, })
+    return len(res)
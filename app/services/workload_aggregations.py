@@ -0,0 +1,290 @@
+# 標準モジュール
+import datetime as dt
+# サードパーティ製モジュール
+import numpy as np
+from sqlalchemy import select, func, cast, tuple_, Date, BigInteger
+from sqlalchemy.orm import sessionmaker, aliased
+# プロジェクトモジュール
+from db.models import Workload, WorkloadDailySummary, SubtaskWithPathView, Project, Issue, User
+from db.engine import get_workload_db_engine
+
+
+# 集約軸の並び順 (リクエストの指定順に関わらずこの順で集計する)
+AGGREGATE_DIMENSIONS: list[str] = [
+    "project", "root_issue", "subtask", "user", "month", "week", "day"]
+# 日次工数集計テーブルでは絞り込めない(工数1件単位の)条件
+SUMMARY_UNSUPPORTED_CONDITIONS: set[str] = { "workload_id", "detail" }
+# 工数行列で指定できる期間の最大日数 (行列は日数分の領域を確保するため上限を設ける)
+WORKLOAD_MATRIX_MAX_DAYS = 366
+
+
+def can_use_daily_summary(condition: dict) -> bool:
+    """
+    指定条件の集計を日次工数集計テーブルから行えるかどうかを判定する。
+    (ユーザ・subtask・作業日の粒度で表現できない条件が指定された場合は工数テーブルを参照する)
+    """
+    return all(condition.get(key) is None for key in SUMMARY_UNSUPPORTED_CONDITIONS)
+
+
+def build_workload_aggregate_stmt(condition: dict, use_summary: bool | None = None):
+    """
+    工数集計用のSELECT文を作成する。
+    集約軸に必要なテーブルのみを結合し、集計は全てDB側(GROUP BY / ROLLUP)で行う。
+
+    Attributes
+    ----------
+    condition: dict
+        key: lower_date, upper_date, group_by, specify_user_id,
+             project_id, is_target_project, workload_id, detail, with_rollup
+    use_summary: bool | None
+        日次工数集計テーブルを参照するかどうか (Noneの場合は条件から判定)
+
+    Returns
+    -------
+    stmt: Select
+        集計用のSELECT文
+    columns: list[str]
+        SELECT結果のカラム名
+    """
+    group_by = [ dim for dim in AGGREGATE_DIMENSIONS if dim in condition["group_by"] ]
+    if len(group_by) == 0:
+        raise ValueError("集約軸(group_by)が指定されていません。")
+
+    # 集計元テーブル
+    if use_summary is None:
+        use_summary = can_use_daily_summary(condition)
+    elif use_summary and not can_use_daily_summary(condition):
+        raise ValueError("日次工数集計テーブルでは絞り込めない条件が指定されています。")
+    Source = WorkloadDailySummary if use_summary else Workload
+
+    Subtask = aliased(Issue)
+    RootIssue = aliased(Issue)
+
+    # 集約軸ごとのSELECT対象 (ID, 名称)
+    # root issueはsubtaskのpath ("/{root id}>...>{subtask id}.") の先頭要素から取得する
+    root_issue_id = cast(
+        func.nullif(func.split_part(func.substr(SubtaskWithPathView.path, 2), ">", 1), ""),
+        BigInteger)
+    dimension_columns = {
+        "project": [ (Project.id, "project_id"), (Project.name, "project_name") ],
+        "root_issue": [ (RootIssue.id, "root_issue_id"), (RootIssue.name, "root_issue_name") ],
+        "subtask": [ (Subtask.id, "subtask_id"), (Subtask.name, "subtask_name") ],
+        "user": [ (User.id, "user_id"), (User.name, "user_name") ],
+        "month": [ (cast(func.date_trunc("month", Source.work_date), Date), "month") ],
+        "week": [ (cast(func.date_trunc("week", Source.work_date), Date), "week") ],
+        "day": [ (Source.work_date, "day") ],
+    }
+
+    rollup_units = []
+    group_exprs = []
+    select_exprs = []
+    columns = []
+    for dim in group_by:
+        exprs = [ expr for expr, _ in dimension_columns[dim] ]
+        # ROLLUPではID, 名称をまとめて1つの集約単位とする
+        rollup_units.append(tuple_(*exprs) if len(exprs) > 1 else exprs[0])
+        group_exprs += exprs
+        select_exprs += [ expr.label(name) for expr, name in dimension_columns[dim] ]
+        columns += [ name for _, name in dimension_columns[dim] ]
+
+    workload_count = func.sum(Source.workload_count) if use_summary else func.count(Workload.id)
+    select_exprs += [ func.sum(Source.workload_minute).label("workload_minute"),
+                      workload_count.label("workload_count") ]
+    columns += [ "workload_minute", "workload_count" ]
+    if condition.get("with_rollup"):
+        # 小計行かどうか (いずれかの集約軸がROLLUPで集約されている行)
+        grouping_targets = [ dimension_columns[dim][0][0] for dim in group_by ]
+        select_exprs.append((func.grouping(*grouping_targets) != 0).label("is_subtotal"))
+        columns.append("is_subtotal")
+
+    stmt = select(*select_exprs).select_from(Source)
+
+    # 必要なテーブルのみを結合する
+    project_id = condition.get("project_id")
+    is_target_project = condition.get("is_target_project")
+    need_project = ("project" in group_by) or (is_target_project is not None)
+    need_subtask = need_project or ("subtask" in group_by) or (project_id is not None)
+    if need_subtask:
+        stmt = stmt.join(Subtask, Subtask.id == Source.subtask_id)
+    if need_project:
+        stmt = stmt.join(Project, Project.id == Subtask.project_id)
+    if "root_issue" in group_by:
+        stmt = stmt.join(SubtaskWithPathView, SubtaskWithPathView.id == Source.subtask_id, isouter=True)\
+                   .join(RootIssue, RootIssue.id == root_issue_id, isouter=True)
+    if "user" in group_by:
+        stmt = stmt.join(User, User.id == Source.user_id)
+
+    # 絞り込み条件
+    stmt = stmt.where(Source.work_date >= condition["lower_date"],
+                      Source.work_date <= condition["upper_date"])
+    user_id = condition.get("specify_user_id")
+    if user_id is not None:
+        stmt = stmt.where(Source.user_id == int(user_id))
+    if project_id is not None:
+        stmt = stmt.where(Subtask.project_id == int(project_id))
+    if is_target_project is not None:
+        stmt = stmt.where(Project.is_target == is_target_project)
+    # 工数1件単位の条件 (工数テーブルを参照する場合のみ)
+    if condition.get("workload_id") is not None:
+        stmt = stmt.where(Workload.id == int(condition["workload_id"]))
+    if condition.get("detail") is not None:
+        stmt = stmt.where(Workload.detail.contains(condition["detail"], autoescape=True))
+
+    # 集約
+    if condition.get("with_rollup"):
+        stmt = stmt.group_by(func.rollup(*rollup_units))
+    else:
+        stmt = stmt.group_by(*group_exprs)
+    order_exprs = [ expr.asc().nulls_last() for dim in group_by for expr, _ in dimension_columns[dim] ]
+    stmt = stmt.order_by(*order_exprs)
+
+    return stmt, columns
+
+
+def aggregate_workloads_from_db(condition: dict) -> dict:
+    """
+    指定期間の工数を指定した集約軸(ユーザ, プロジェクト, root issue, subtask, 日, 週, 月)で集計する。
+
+    Attributes
+    ----------
+    condition: dict
+        key: lower_date, upper_date, group_by, specify_user_id,
+             project_id, is_target_project, workload_id, detail (部分一致), with_rollup
+
+    Returns
+    -------
+    result: dict
+        key: group_by, columns, rows (カラム順に並べた値のリスト)
+
+    Exception
+    ---------
+    - 集約軸の指定なし
+    - DB接続失敗
+    """
+    stmt, columns = build_workload_aggregate_stmt(condition)
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        res = session.execute(stmt).all()
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
+
+    group_by = [ dim for dim in AGGREGATE_DIMENSIONS if dim in condition["group_by"] ]
+    rows = [ list(row) for row in res ]
+
+    return { "group_by": group_by, "columns": columns, "rows": rows }
+
+
+def build_workload_matrix(rows: list, lower_date: dt.date, upper_date: dt.date, by_project: bool = False) -> dict:
+    """
+    (ユーザ, 作業日[, プロジェクト])毎に集計済みのレコードから、ユーザ × 日 (× プロジェクト)の密な行列を作成する。
+
+    Attributes
+    ----------
+    rows: list[tuple]
+        (user_id, user_name, work_date, workload_minute) or
+        (user_id, user_name, work_date, project_id, project_name, workload_minute)
+    lower_date: date
+    upper_date: date
+    by_project: bool
+        プロジェクト軸を含めるかどうか
+
+    Returns
+    -------
+    matrix: dict
+        key: lower_date, upper_date, shape, users, days, projects, values
+    """
+    num_of_days = (upper_date - lower_date).days + 1
+    days = [ lower_date + dt.timedelta(days=idx) for idx in range(num_of_days) ]
+
+    if len(rows) == 0:
+        shape = [0, num_of_days, 0] if by_project else [0, num_of_days]
+        return { "lower_date": lower_date, "upper_date": upper_date, "shape": shape,
+                 "users": [], "days": days, "projects": [] if by_project else None, "values": [] }
+
+    columns = list(zip(*rows))
+    # ユーザ軸 (ID順)
+    user_ids, user_first_idx, user_idx = np.unique(
+        np.asarray(columns[0], dtype=np.int64), return_index=True, return_inverse=True)
+    users = [ {"id": int(user_ids[i]), "name": columns[1][first]} for i, first in enumerate(user_first_idx) ]
+    # 日付軸 (期間の開始日からの経過日数)
+    day_idx = (np.asarray(columns[2], dtype="datetime64[D]") - np.datetime64(lower_date, "D")).astype(np.int64)
+    minutes = np.asarray(columns[-1], dtype=np.int64)
+
+    if by_project:
+        project_ids, project_first_idx, project_idx = np.unique(
+            np.asarray(columns[3], dtype=np.int64), return_index=True, return_inverse=True)
+        projects = [ {"id": int(project_ids[i]), "name": columns[4][first]}
+                     for i, first in enumerate(project_first_idx) ]
+        matrix = np.zeros((len(users), num_of_days, len(projects)), dtype=np.int64)
+        np.add.at(matrix, (user_idx, day_idx, project_idx), minutes)
+    else:
+        projects = None
+        matrix = np.zeros((len(users), num_of_days), dtype=np.int64)
+        np.add.at(matrix, (user_idx, day_idx), minutes)
+
+    return { "lower_date": lower_date, "upper_date": upper_date, "shape": list(matrix.shape),
+             "users": users, "days": days, "projects": projects, "values": matrix.ravel().tolist() }
+
+
+def fetch_workload_matrix_from_db(condition: dict) -> dict:
+    """
+    指定期間のユーザ × 日 (× プロジェクト)の工数行列を取得する。
+    日次工数集計テーブルを1回のGROUP BYで集計し、行列への展開はNumPyで行う。
+
+    Attributes
+    ----------
+    condition: dict
+        key: lower_date, upper_date, by_project, project_id, is_target_project
+
+    Returns
+    -------
+    matrix: dict
+        key: lower_date, upper_date, shape, users, days, projects, values
+
+    Exception
+    ---------
+    - 不正な期間指定 (開始日が終了日より後、またはWORKLOAD_MATRIX_MAX_DAYSを超える期間)
+    - DB接続失敗
+    """
+    lower_date = dt.date.fromisoformat(str(condition["lower_date"]))
+    upper_date = dt.date.fromisoformat(str(condition["upper_date"]))
+    if lower_date > upper_date:
+        raise ValueError("期間の開始日が終了日より後になっています。")
+    if (upper_date - lower_date).days + 1 > WORKLOAD_MATRIX_MAX_DAYS:
+        raise ValueError(f"期間は{WORKLOAD_MATRIX_MAX_DAYS}日以内で指定してください。")
+    by_project = bool(condition.get("by_project"))
+    project_id = condition.get("project_id")
+    is_target_project = condition.get("is_target_project")
+
+    Summary = WorkloadDailySummary
+    Subtask = aliased(Issue)
+    group_exprs = [ Summary.user_id, User.name, Summary.work_date ]
+    if by_project:
+        group_exprs += [ Project.id, Project.name ]
+    stmt = select(*group_exprs, func.sum(Summary.workload_minute))\
+        .select_from(Summary)\
+        .join(User, User.id == Summary.user_id)
+    if by_project or (project_id is not None) or (is_target_project is not None):
+        stmt = stmt.join(Subtask, Subtask.id == Summary.subtask_id)\
+                   .join(Project, Project.id == Subtask.project_id)
+    stmt = stmt.where(Summary.work_date >= lower_date, Summary.work_date <= upper_date)
+    if project_id is not None:
+        stmt = stmt.where(Project.id == int(project_id))
+    if is_target_project is not None:
+        stmt = stmt.where(Project.is_target == is_target_project)
+    stmt = stmt.group_by(*group_exprs)
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        rows = session.execute(stmt).all()
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
+
+    return build_workload_matrix(rows, lower_date, upper_date, by_project)
@@ -0,0 +1,206 @@
+# 標準モジュール
+import os
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from collections.abc import AsyncIterator
+# サードパーティ製モジュール
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy.engine import make_url
+
+# 工数変更通知のチャンネル名 (workload_factのトリガーからpg_notifyされる)
+WORKLOAD_EVENT_CHANNEL = "workload_changes"
+# 購読者ごとに保持する未送信イベント数の上限 (超えた場合はresyncを通知する)
+WORKLOAD_EVENT_QUEUE_SIZE = int(os.getenv("WORKLOAD_EVENT_QUEUE_SIZE", "100"))
+# LISTEN用接続が切断された場合の再接続間隔(秒)
+WORKLOAD_EVENT_RECONNECT_SECONDS = 5
+# 購読者のキューが溢れた場合に送信するイベント (クライアントは検索APIで再取得する)
+RESYNC_EVENT = json.dumps({"op": "resync"})
+
+logger = logging.getLogger(__name__)
+
+
+def listen_dsn() -> str:
+    """
+    WORKLOAD_DATABASE_URI(SQLAlchemy形式)からpsycopg2の接続文字列を作成する。
+    """
+    url = make_url(os.environ["WORKLOAD_DATABASE_URI"]).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class WorkloadSubscription:
+    """
+    工数変更イベントの購読 (user_ids, project_idsが空の場合は全件を対象とする)
+    """
+    def __init__(self, user_ids: list[int] | None = None, project_ids: list[int] | None = None,
+                 maxsize: int = WORKLOAD_EVENT_QUEUE_SIZE):
+        self.user_ids = set(user_ids or [])
+        self.project_ids = set(project_ids or [])
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def matches(self, event: dict) -> bool:
+        """
+        イベントが購読条件に該当するかを返す。
+        (イベントは(ユーザ, 月)ごとに通知され、その月に変更された工数のプロジェクトをproject_idsに含む。
+         変更が多くまとめて通知される場合のresyncは全ての購読者が対象)
+        """
+        if (not self.user_ids and not self.project_ids) or event.get("op") == "resync":
+            return True
+        return event.get("user_id") in self.user_ids or bool(self.project_ids & set(event.get("project_ids") or []))
+
+    def put(self, payload: str) -> None:
+        """
+        イベントをキューに追加する。溢れた場合は以降のイベントを破棄し、resyncのみを送信する。
+        """
+        if self.lagged:
+            return
+        if self.queue.full():
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+            return
+        self.queue.put_nowait(payload)
+
+    async def get(self) -> str:
+        payload = await self.queue.get()
+        if payload == RESYNC_EVENT:
+            self.lagged = False
+        return payload
+
+
+class WorkloadEventBroker:
+    """
+    PostgreSQLのLISTEN/NOTIFYで受信した工数変更イベントを、プロセス内の購読者へ配信する。
+
+    LISTEN用の接続はプロセスごとに1本のみ作成し、イベントループのreaderとして監視する。
+    (接続・LISTENはブロッキング処理のため、イベントループを止めないよう別スレッドで実行する)
+    通知はDB経由のため、どのワーカーで工数が更新されても全ワーカーの購読者へ配信される。
+    """
+    def __init__(self, channel: str = WORKLOAD_EVENT_CHANNEL):
+        self.channel = channel
+        self.subscriptions: set[WorkloadSubscription] = set()
+        self._conn = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connect_lock: asyncio.Lock | None = None
+
+    def _open_listen_connection(self):
+        conn = psycopg2.connect(listen_dsn())
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel};")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    async def _connect(self) -> None:
+        # 同時に購読が開始された場合も接続は1本のみ作成する
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._conn is not None:
+                return
+            conn = await self._loop.run_in_executor(None, self._open_listen_connection)
+            self._conn = conn
+            self._loop.add_reader(conn.fileno(), self._on_readable)
+
+    def _disconnect(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def _schedule_reconnect(self) -> None:
+        self._loop.call_later(WORKLOAD_EVENT_RECONNECT_SECONDS, lambda: self._loop.create_task(self._reconnect()))
+
+    async def _reconnect(self) -> None:
+        if self._conn is not None or not self.subscriptions:
+            return
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.warning(f"工数変更通知の購読に失敗しました。再接続します。: {e}")
+            self._schedule_reconnect()
+            return
+        # 接続中に購読者がいなくなった場合は切断する
+        if not self.subscriptions:
+            self._disconnect()
+            return
+        # 切断中のイベントは受信できないため、購読者に再取得を促す
+        for subscription in self.subscriptions:
+            subscription.put(RESYNC_EVENT)
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except Exception as e:
+            logger.warning(f"工数変更通知の接続が切断されました。: {e}")
+            self._disconnect()
+            self._schedule_reconnect()
+            return
+        while self._conn.notifies:
+            self.dispatch(self._conn.notifies.pop(0).payload)
+
+    def dispatch(self, payload: str) -> None:
+        """
+        受信したイベント(JSON文字列)を、条件に該当する購読者へ配信する。
+        """
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        if event.get("op") == "resync":
+            payload = RESYNC_EVENT
+        for subscription in self.subscriptions:
+            if subscription.matches(event):
+                subscription.put(payload)
+
+    async def _ensure_listening(self) -> None:
+        if self._conn is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        await self._connect()
+
+    @asynccontextmanager
+    async def subscribe(self, user_ids: list[int] | None = None,
+                        project_ids: list[int] | None = None) -> AsyncIterator[WorkloadSubscription]:
+        """
+        工数変更イベントを購読する。最初の購読時にLISTENを開始し、購読者がいなくなったら停止する。
+
+        Attributes
+        ----------
+        user_ids: list[int] | None
+            対象のユーザID
+        project_ids: list[int] | None
+            対象のproject ID
+
+        Returns
+        -------
+        subscription: WorkloadSubscription
+
+        Exception
+        ---------
+        - LISTEN用の接続失敗
+        """
+        subscription = WorkloadSubscription(user_ids, project_ids)
+        await self._ensure_listening()
+        self.subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.subscriptions.discard(subscription)
+            if not self.subscriptions:
+                self._disconnect()
+
+
+# アプリ全体で共有するブローカー
+workload_event_broker = WorkloadEventBroker()
@@ -0,0 +1,167 @@
+# 標準モジュール
+import os
+import io
+import csv
+import tempfile
+from collections.abc import Iterable, Iterator
+# サードパーティ製モジュール
+from sqlalchemy.orm import sessionmaker
+# XLSX出力は任意 (pip install XlsxWriter)
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+# プロジェクトモジュール
+from db.engine import get_workload_db_engine
+from services.workloads import build_workload_search_query, convert_workload_search_row
+
+# サーバサイドカーソルから1回に取得する件数
+WORKLOAD_EXPORT_FETCH_SIZE = int(os.getenv("WORKLOAD_EXPORT_FETCH_SIZE", "2000"))
+# CSVを送信する単位 (行数)
+WORKLOAD_EXPORT_CSV_CHUNK_ROWS = 500
+
+# 出力カラム (検索APIのレスポンスと同一)
+EXPORT_COLUMNS: list[str] = [
+    "project_id", "project_name", "issue_id_1", "issue_name_1", "issue_id_2", "issue_name_2",
+    "subtask_id", "subtask_name", "workload_id", "user_id", "user_name",
+    "work_date", "workload_minute", "detail", "update_timestamp", "create_timestamp" ]
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def is_xlsx_export_available() -> bool:
+    """
+    XLSX出力が可能か(XlsxWriterがインストールされているか)を返す。
+    """
+    return xlsxwriter is not None
+
+
+def iter_workload_rows_from_db(condition: dict) -> Iterator[dict]:
+    """
+    指定条件の登録済み工数をサーバサイドカーソルで1件ずつ取得する。
+    (全件をメモリに載せないため、大きな期間でもメモリ使用量は一定)
+
+    Attributes
+    ----------
+    condition: dict
+        工数検索条件 (fetch_specify_condition_workloads_from_dbと同じ)
+
+    Returns
+    -------
+    workloads: Iterator[dict]
+        工数情報
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        query = build_workload_search_query(session, condition)\
+                    .yield_per(WORKLOAD_EXPORT_FETCH_SIZE)
+        for info in query:
+            yield convert_workload_search_row(info)
+    finally:
+        session.close()
+
+
+def iter_csv_chunks(workloads: Iterable[dict]) -> Iterator[bytes]:
+    """
+    工数情報をCSVに変換し、一定行数ごとにbytesで返す。
+    (Excelで文字化けしないようBOM付きUTF-8とする)
+
+    Attributes
+    ----------
+    workloads: Iterable[dict]
+
+    Returns
+    -------
+    chunks: Iterator[bytes]
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    # ヘッダは即座に送信し、ダウンロードをすぐに開始させる
+    yield buffer.getvalue().encode("utf-8-sig")
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    num_of_rows = 0
+    for workload in workloads:
+        writer.writerow([ workload.get(column) for column in EXPORT_COLUMNS ])
+        num_of_rows += 1
+        if num_of_rows % WORKLOAD_EXPORT_CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx_chunks(workloads: Iterable[dict], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    工数情報をXLSXに変換してbytesで返す。
+    XlsxWriterのconstant_memoryモードで1行ずつ一時ファイルに書き出すため、メモリ使用量は一定。
+    (XLSXはzip形式のため、送信は全行の書き出し完了後に開始される)
+
+    Attributes
+    ----------
+    workloads: Iterable[dict]
+    chunk_size: int
+        送信単位 (byte)
+
+    Returns
+    -------
+    chunks: Iterator[bytes]
+
+    Exception
+    ---------
+    - XlsxWriterが未インストール
+    """
+    if xlsxwriter is None:
+        raise RuntimeError("XLSX出力にはXlsxWriterのインストールが必要です。")
+
+    with tempfile.TemporaryFile() as tmp_file:
+        workbook = xlsxwriter.Workbook(tmp_file, {"constant_memory": True, "remove_timezone": True})
+        worksheet = workbook.add_worksheet("workload")
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        datetime_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        column_formats = { "work_date": date_format,
+                           "update_timestamp": datetime_format, "create_timestamp": datetime_format }
+
+        worksheet.write_row(0, 0, EXPORT_COLUMNS)
+        for row_idx, workload in enumerate(workloads, start=1):
+            for col_idx, column in enumerate(EXPORT_COLUMNS):
+                value = workload.get(column)
+                if value is None:
+                    continue
+                if column in column_formats:
+                    worksheet.write_datetime(row_idx, col_idx, value, column_formats[column])
+                else:
+                    worksheet.write(row_idx, col_idx, value)
+        workbook.close()
+
+        tmp_file.seek(0)
+        while chunk := tmp_file.read(chunk_size):
+            yield chunk
+
+
+def export_workloads(condition: dict, file_format: str = "csv") -> Iterator[bytes]:
+    """
+    指定条件の登録済み工数を指定形式(csv, xlsx)で出力する。
+
+    Attributes
+    ----------
+    condition: dict
+        工数検索条件
+    file_format: str
+        csv or xlsx
+
+    Returns
+    -------
+    chunks: Iterator[bytes]
+        StreamingResponseにそのまま渡せるイテレータ
+    """
+    workloads = iter_workload_rows_from_db(condition)
+    if file_format == "xlsx":
+        return iter_xlsx_chunks(workloads)
+    return iter_csv_chunks(workloads)
@@ -0,0 +1,157 @@
+# 標準モジュール
+import datetime as dt
+# サードパーティ製モジュール
+from sqlalchemy import select, delete, func, cast, tuple_, BigInteger
+from sqlalchemy.orm import sessionmaker, aliased
+from sqlalchemy.dialects.postgresql import insert
+# プロジェクトモジュール
+from db.models import Workload, WorkloadFact, SubtaskWithPathView, Project, Issue, User
+from db.engine import get_workload_db_engine
+from services.workload_search_cache import workload_search_cache
+
+
+# 工数以外(Jira, ユーザ)由来のカラム
+DENORMALIZED_COLUMNS: list[str] = [
+    "user_name", "subtask_name", "path", "project_id", "project_name", "project_is_target",
+    "issue_id_1", "issue_name_1", "issue_id_2", "issue_name_2" ]
+# 工数由来のカラム
+WORKLOAD_COLUMNS: list[str] = [
+    "work_date", "workload_minute", "detail", "user_id", "subtask_id",
+    "update_timestamp", "create_timestamp" ]
+
+
+def build_workload_fact_source_stmt(workload_ids: list[int] | None = None,
+                                    project_ids: list[int] | None = None,
+                                    lower_date: dt.date | None = None, upper_date: dt.date | None = None):
+    """
+    工数と関連するproject, issue(第1, 第2階層), subtask, userを結合し、workload_factの行を作成するSELECT文を作成する。
+
+    issue(第1階層)はsubtaskのpath ("/{第1階層}>{第2階層}>...>{subtask id}.") の1番目の要素、
+    issue(第2階層)は2番目の要素とする。
+
+    Attributes
+    ----------
+    workload_ids: list[int] | None
+        対象の工数ID (Noneの場合は全件)
+    project_ids: list[int] | None
+        対象のproject ID (Noneの場合は全件)
+    lower_date: date | None
+    upper_date: date | None
+
+    Returns
+    -------
+    stmt: Select
+    """
+    ParentIssue = aliased(Issue)
+    ChildIssue = aliased(Issue)
+    path_elements = func.substr(SubtaskWithPathView.path, 2)
+    issue_id_1 = cast(func.nullif(func.split_part(path_elements, ">", 1), ""), BigInteger)
+    issue_id_2 = cast(func.nullif(func.rtrim(func.split_part(path_elements, ">", 2), "."), ""), BigInteger)
+
+    stmt = select(
+            Workload.id.label("workload_id"),
+            Workload.work_date, Workload.workload_minute, Workload.detail,
+            Workload.user_id, User.name.label("user_name"),
+            Workload.subtask_id, SubtaskWithPathView.name.label("subtask_name"), SubtaskWithPathView.path,
+            Project.id.label("project_id"), Project.name.label("project_name"),
+            Project.is_target.label("project_is_target"),
+            ParentIssue.id.label("issue_id_1"), ParentIssue.name.label("issue_name_1"),
+            ChildIssue.id.label("issue_id_2"), ChildIssue.name.label("issue_name_2"),
+            Workload.update_timestamp, Workload.create_timestamp )\
+        .select_from(Workload)\
+        .join(SubtaskWithPathView, SubtaskWithPathView.id == Workload.subtask_id, isouter=True)\
+        .join(Project, Project.id == SubtaskWithPathView.project_id, isouter=True)\
+        .join(ParentIssue, ParentIssue.id == issue_id_1, isouter=True)\
+        .join(ChildIssue, ChildIssue.id == issue_id_2, isouter=True)\
+        .join(User, Workload.user_id == User.id)
+
+    if workload_ids is not None:
+        stmt = stmt.where(Workload.id.in_(workload_ids))
+    if project_ids is not None:
+        stmt = stmt.where(Project.id.in_(project_ids))
+    if lower_date is not None:
+        stmt = stmt.where(Workload.work_date >= lower_date)
+    if upper_date is not None:
+        stmt = stmt.where(Workload.work_date <= upper_date)
+
+    return stmt
+
+
+def refresh_workload_facts(session, workload_ids: list[int] | None = None,
+                           project_ids: list[int] | None = None) -> None:
+    """
+    workload_factを工数テーブル等の最新の内容で更新(upsert)する。
+    内容に変更がない行は更新しない。commitは呼び出し元で行う。
+
+    Attributes
+    ----------
+    session: Session
+    workload_ids: list[int] | None
+        対象の工数ID (Noneの場合は全件)
+    project_ids: list[int] | None
+        対象のproject ID (Noneの場合は全件)
+
+    Returns
+    -------
+    None
+    """
+    if workload_ids is not None and len(workload_ids) == 0:
+        return
+
+    source = build_workload_fact_source_stmt(workload_ids=workload_ids, project_ids=project_ids).subquery()
+    columns = [ "workload_id", *WORKLOAD_COLUMNS, *DENORMALIZED_COLUMNS ]
+    source_stmt = select(*[ source.c[column] for column in columns ])
+    insert_stmt = insert(WorkloadFact).from_select(columns, source_stmt)
+    update_columns = [ *WORKLOAD_COLUMNS, *DENORMALIZED_COLUMNS ]
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=["workload_id"],
+        set_={ column: insert_stmt.excluded[column] for column in update_columns },
+        where=tuple_(*[ WorkloadFact.__table__.c[column] for column in update_columns ])
+                .is_distinct_from(tuple_(*[ insert_stmt.excluded[column] for column in update_columns ]))
+    )
+    session.execute(upsert_stmt)
+
+
+def delete_workload_facts(session, workload_ids: list[int]) -> None:
+    """
+    削除された工数のworkload_factを削除する。commitは呼び出し元で行う。
+    """
+    if len(workload_ids) == 0:
+        return
+    session.execute(delete(WorkloadFact).where(WorkloadFact.workload_id.in_(workload_ids)))
+
+
+def rebuild_workload_facts() -> dict:
+    """
+    工数テーブルからworkload_factを再作成する。
+
+    Attributes
+    ----------
+    None
+
+    Returns
+    -------
+    message: dict
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+
+    # 工数テーブルに存在しない行の削除
+    orphan_stmt = delete(WorkloadFact)\
+        .where(~select(Workload.id).where(Workload.id == WorkloadFact.workload_id).exists())
+    try:
+        session.execute(orphan_stmt)
+        refresh_workload_facts(session)
+        num_of_facts = session.execute(select(func.count()).select_from(WorkloadFact)).scalar()
+        session.commit()
+        session.close()
+        workload_search_cache.clear()
+        return {"message": f"workload_factを再作成しました。({num_of_facts}件)"}
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
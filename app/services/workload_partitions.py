@@ -0,0 +1,171 @@
+# 標準モジュール
+import os
+import datetime as dt
+import threading
+# サードパーティ製モジュール
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
+# プロジェクトモジュール
+from db.engine import get_workload_db_engine
+from services.custom_exceptions import WorkloadDateOutOfRangeError
+from services.workload_summaries import to_date
+from services.workload_facts import build_workload_fact_source_stmt
+
+# 事前に作成しておくパーティションの月数 (現在月から何か月先まで作成するか)
+WORKLOAD_PARTITION_MONTHS_AHEAD = int(os.getenv("WORKLOAD_PARTITION_MONTHS_AHEAD", "3"))
+# 工数登録時にパーティションを自動作成する過去の月数 (現在月から何か月前まで作成するか)
+WORKLOAD_PARTITION_MONTHS_BACK = int(os.getenv("WORKLOAD_PARTITION_MONTHS_BACK", "24"))
+
+# 作成済みであることを確認したパーティション(月初日) (プロセス内で共有)
+_known_partition_months: set[dt.date] = set()
+_partition_lock = threading.Lock()
+
+
+def partition_name_of(work_date: dt.date) -> str:
+    """
+    作業日が格納されるパーティション名を返す。 (workload_YYYYMM)
+    """
+    return f"workload_{work_date.year:04d}{work_date.month:02d}"
+
+
+def add_months(month: dt.date, offset: int) -> dt.date:
+    """
+    月初日に指定月数を加算した月初日を返す。
+    """
+    year, month_idx = divmod(month.month - 1 + offset, 12)
+    return dt.date(month.year + year, month_idx + 1, 1)
+
+
+def workload_partition_window(today: dt.date | None = None) -> tuple[dt.date, dt.date]:
+    """
+    工数登録時にパーティションを自動作成できる期間(最初の月初日, 最後の月初日)を返す。
+    (現在月のWORKLOAD_PARTITION_MONTHS_BACKか月前からWORKLOAD_PARTITION_MONTHS_AHEADか月先まで)
+    """
+    current_month = (today or dt.date.today()).replace(day=1)
+    return (add_months(current_month, -WORKLOAD_PARTITION_MONTHS_BACK),
+            add_months(current_month, WORKLOAD_PARTITION_MONTHS_AHEAD))
+
+
+def ensure_workload_partitions(work_dates: list) -> list[str]:
+    """
+    指定した作業日を格納するパーティションが存在しない場合は作成する。
+    工数の登録・更新前に呼び出す。確認済みの月はDBに問い合わせない。
+
+    パーティション作成は親テーブルのロックを取得するため、工数更新とは別の短いトランザクションで行う。
+    自動作成はworkload_partition_windowの期間内の月のみとし、期間外の月は作成済みのパーティションのみ許可する。
+    (リクエストで指定された任意の作業日に対してパーティションが作成されないようにする)
+
+    Attributes
+    ----------
+    work_dates: list[date | str]
+        登録・更新する工数の作業日
+
+    Returns
+    -------
+    partition_names: list[str]
+        新たに確認(作成)したパーティション名
+
+    Exception
+    ---------
+    - 期間外の作業日でパーティションが未作成 (WorkloadDateOutOfRangeError)
+    - DB接続失敗
+    """
+    months = { to_date(work_date).replace(day=1) for work_date in work_dates }
+    if len(months - _known_partition_months) == 0:
+        return []
+
+    first_month, last_month = workload_partition_window()
+    with _partition_lock:
+        new_months = sorted(months - _known_partition_months)
+        outside_months = [ month for month in new_months if not first_month <= month <= last_month ]
+        with get_workload_db_engine().begin() as conn:
+            for month in outside_months:
+                exists = conn.execute(text("SELECT to_regclass(:partition_name) IS NOT NULL"),
+                                      {"partition_name": partition_name_of(month)}).scalar()
+                if not exists:
+                    last_date = add_months(last_month, 1) - dt.timedelta(days=1)
+                    raise WorkloadDateOutOfRangeError(
+                        f"作業日は{first_month}から{last_date}までの期間で指定してください。(指定月: {month:%Y-%m})")
+            partition_names = create_workload_partitions(
+                conn, [ month for month in new_months if month not in outside_months ])
+        _known_partition_months.update(new_months)
+
+    return partition_names
+
+
+def create_workload_partitions(conn, months: list[dt.date]) -> list[str]:
+    """
+    指定した月(月初日)のパーティションを作成する。(作成済みの場合は何もしない)
+    """
+    return [ conn.execute(text("SELECT create_workload_partition(:target_month)"),
+                          {"target_month": month}).scalar()
+             for month in months ]
+
+
+def create_future_workload_partitions(months_ahead: int = WORKLOAD_PARTITION_MONTHS_AHEAD) -> list[str]:
+    """
+    現在月から指定月数先までのパーティションを作成する。
+
+    Attributes
+    ----------
+    months_ahead: int
+        現在月から何か月先まで作成するか
+
+    Returns
+    -------
+    partition_names: list[str]
+        確認(作成)したパーティション名
+    """
+    current_month = dt.date.today().replace(day=1)
+    months = [ add_months(current_month, offset) for offset in range(months_ahead + 1) ]
+    # 管理コマンドからの作成のため、自動作成の期間(workload_partition_window)に関わらず作成する
+    with _partition_lock:
+        with get_workload_db_engine().begin() as conn:
+            create_workload_partitions(conn, months)
+        _known_partition_months.update(months)
+
+    return [ partition_name_of(month) for month in months ]
+
+
+def explain_workload_fact_source_partitions(condition: dict) -> list[str]:
+    """
+    期間を指定したworkload_factの再作成時に、作成元の工数テーブル参照クエリがスキャンするパーティションを実行計画から取得する。
+    (再作成時にパーティションプルーニングが効いているかどうかの確認用。工数検索はworkload_factを参照するため対象外)
+
+    Attributes
+    ----------
+    condition: dict
+        key: target_date, lower_date, upper_date
+
+    Returns
+    -------
+    partition_names: list[str]
+        実行計画上でスキャンされるworkloadのパーティション名
+    """
+    lower_date = condition.get("target_date") or condition.get("lower_date")
+    upper_date = condition.get("target_date") or condition.get("upper_date")
+    stmt = build_workload_fact_source_stmt(lower_date=lower_date, upper_date=upper_date)
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+    try:
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
+
+    def collect_relations(node: dict) -> list[str]:
+        relations = [ node["Relation Name"] ] if "Relation Name" in node else []
+        for child in node.get("Plans", []):
+            relations += collect_relations(child)
+        return relations
+
+    relations = collect_relations(plan[0]["Plan"])
+    partition_names = sorted({ name for name in relations
+                               if name.startswith("workload_") and name[len("workload_"):].isdigit() })
+
+    return partition_names
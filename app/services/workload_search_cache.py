@@ -0,0 +1,177 @@
+# 標準モジュール
+import os
+import threading
+import datetime as dt
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+# プロジェクトモジュール
+from services.workload_summaries import to_date
+
+# キャッシュする検索結果の最大件数 (0の場合はキャッシュしない)
+WORKLOAD_SEARCH_CACHE_SIZE = int(os.getenv("WORKLOAD_SEARCH_CACHE_SIZE", "256"))
+# 月単位で無効化を判定する期間の上限 (これを超える期間の検索は全月を対象として扱う)
+WORKLOAD_SEARCH_CACHE_MAX_MONTHS = 24
+
+# 検索条件のうちキャッシュキーに含める項目
+CONDITION_KEYS: list[str] = [
+    "specify_user_id", "target_date", "lower_date", "upper_date", "workload_id", "is_target_project" ]
+# 全ユーザ・全月を表すワイルドカード
+ANY = "*"
+
+
+def month_of(value) -> dt.date:
+    """
+    日付(またはISO形式の文字列)の月初日を返す。
+    """
+    return to_date(value).replace(day=1)
+
+
+def normalize_workload_condition(condition: dict) -> tuple:
+    """
+    工数検索条件をキャッシュキーに変換する。
+    (日付は文字列/date型どちらでも同じキーになり、未指定の項目は無視する)
+
+    Attributes
+    ----------
+    condition: dict
+        工数検索条件
+
+    Returns
+    -------
+    key: tuple
+    """
+    normalized = {}
+    for key in CONDITION_KEYS:
+        value = condition.get(key)
+        if value is None:
+            continue
+        if key.endswith("_date"):
+            value = to_date(value)
+        elif key in ("specify_user_id", "workload_id"):
+            value = int(value)
+        normalized[key] = value
+
+    # target_dateは同日のlower_date, upper_date指定と同じ検索になる
+    target_date = normalized.pop("target_date", None)
+    if target_date is not None:
+        normalized["lower_date"] = max(normalized.get("lower_date", target_date), target_date)
+        normalized["upper_date"] = min(normalized.get("upper_date", target_date), target_date)
+
+    return tuple(sorted(normalized.items()))
+
+
+def dependent_scopes_of(key: tuple) -> list[tuple]:
+    """
+    検索条件(キャッシュキー)の結果が依存する(ユーザ, 月)の組を返す。
+    ユーザ未指定の場合はユーザを、期間未指定(または長期間)の場合は月をワイルドカードとする。
+    """
+    condition = dict(key)
+    user_scope = condition.get("specify_user_id", ANY)
+    lower_date = condition.get("lower_date")
+    upper_date = condition.get("upper_date")
+    if lower_date is None or upper_date is None or lower_date > upper_date:
+        return [(user_scope, ANY)]
+
+    months = []
+    month = month_of(lower_date)
+    while month <= upper_date:
+        months.append(month)
+        if len(months) > WORKLOAD_SEARCH_CACHE_MAX_MONTHS:
+            return [(user_scope, ANY)]
+        year, month_idx = divmod(month.month, 12)
+        month = dt.date(month.year + year, month_idx + 1, 1)
+
+    return [ (user_scope, month) for month in months ]
+
+
+class WorkloadSearchCache:
+    """
+    工数検索結果のLRUキャッシュ
+
+    工数の登録・更新・削除時に(ユーザ, 月)単位のバージョンを更新し、
+    キャッシュ作成時から依存する(ユーザ, 月)のバージョンが変わった結果のみを無効とする。
+    バージョンは(ユーザ, 月), (ユーザ, 全月), (全ユーザ, 月), (全ユーザ, 全月)の4階層で管理する。
+
+    キャッシュ・バージョンはプロセス内でのみ共有されるため、
+    複数プロセスで起動する場合はWORKLOAD_SEARCH_CACHE_SIZE=0で無効化すること。(server.pyで複数ワーカー起動時は自動で無効化する)
+    """
+    def __init__(self, max_entries: int = WORKLOAD_SEARCH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[tuple, list[dict]]] = OrderedDict()
+        self._versions: dict[tuple, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _snapshot(self, scopes: list[tuple]) -> tuple:
+        return (self._generation, { scope: self._versions.get(scope, 0) for scope in scopes })
+
+    def get_or_fetch(self, condition: dict, fetch: Callable[[dict], list[dict]]) -> list[dict]:
+        """
+        キャッシュ済みの検索結果を返す。無い(または無効な)場合はfetchで取得してキャッシュする。
+
+        Attributes
+        ----------
+        condition: dict
+            工数検索条件
+        fetch: Callable[[dict], list[dict]]
+            DBから検索結果を取得する関数
+
+        Returns
+        -------
+        workloads: list[dict]
+        """
+        if self.max_entries <= 0:
+            return fetch(condition)
+
+        key = normalize_workload_condition(condition)
+        scopes = dependent_scopes_of(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == self._snapshot(scopes):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+            # 取得中に工数が更新された場合は次回の参照で無効と判定されるよう、取得前のバージョンを保持する
+            snapshot = self._snapshot(scopes)
+
+        workloads = fetch(condition)
+
+        with self._lock:
+            self._entries[key] = (snapshot, workloads)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return list(workloads)
+
+    def invalidate(self, scopes: Iterable[tuple]) -> None:
+        """
+        指定した(ユーザID, 作業日)の工数に依存する検索結果を無効にする。
+
+        Attributes
+        ----------
+        scopes: Iterable[tuple[int, date | str]]
+            登録・更新・削除した工数の(ユーザID, 作業日)
+        """
+        with self._lock:
+            for user_id, work_date in { (int(user_id), month_of(work_date)) for user_id, work_date in scopes }:
+                for scope in [(user_id, work_date), (user_id, ANY), (ANY, work_date), (ANY, ANY)]:
+                    self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def clear(self) -> None:
+        """
+        全ての検索結果を破棄する。(Jira情報の同期等、工数以外の変更時に使用)
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# アプリ全体で共有するキャッシュ
+workload_search_cache = WorkloadSearchCache()
@@ -0,0 +1,139 @@
+# 標準モジュール
+import datetime as dt
+# サードパーティ製モジュール
+from sqlalchemy import select, delete, func, tuple_, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects.postgresql import insert
+# プロジェクトモジュール
+from db.models import Workload, WorkloadDailySummary
+from db.engine import get_workload_db_engine
+
+
+def to_date(value) -> dt.date:
+    """
+    jsonable_encoderで文字列化された日付をdateに戻す。
+    """
+    return dt.date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def workload_summary_delta(workload: dict, sign: int = 1) -> dict:
+    """
+    工数1件分の集計テーブルへの差分を作成する。 (登録時はsign=1, 削除時はsign=-1)
+
+    Attributes
+    ----------
+    workload: dict
+        key: user_id, subtask_id, work_date, workload_minute
+    sign: int
+        1 or -1
+
+    Returns
+    -------
+    delta: dict
+        key: user_id, subtask_id, work_date, workload_minute, workload_count
+    """
+    return { "user_id": int(workload["user_id"]), "subtask_id": int(workload["subtask_id"]),
+             "work_date": to_date(workload["work_date"]),
+             "workload_minute": sign * int(workload["workload_minute"]),
+             "workload_count": sign }
+
+
+def apply_workload_summary_delta(session, deltas: list[dict]) -> None:
+    """
+    工数の差分を日次工数集計テーブルへ反映する。
+    commitは呼び出し元で行い、工数の更新と同一トランザクションで反映させる。
+
+    Attributes
+    ----------
+    session: Session
+        工数を更新しているセッション
+    deltas: list[dict]
+        workload_summary_deltaで作成した差分
+
+    Returns
+    -------
+    None
+    """
+    # 同一キーの差分をまとめる (ON CONFLICTは1文内で同一行を2回更新できないため)
+    merged: dict[tuple, dict] = {}
+    for delta in deltas:
+        key = (delta["user_id"], delta["subtask_id"], delta["work_date"])
+        if key not in merged:
+            merged[key] = {**delta}
+            continue
+        merged[key]["workload_minute"] += delta["workload_minute"]
+        merged[key]["workload_count"] += delta["workload_count"]
+    rows = [ {**row, "update_timestamp": dt.datetime.now()}
+             for row in merged.values()
+             if row["workload_minute"] != 0 or row["workload_count"] != 0 ]
+    if len(rows) == 0:
+        return
+
+    insert_stmt = insert(WorkloadDailySummary).values(rows)
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=["user_id", "subtask_id", "work_date"],
+        set_={ "workload_minute": WorkloadDailySummary.workload_minute + insert_stmt.excluded.workload_minute,
+               "workload_count": WorkloadDailySummary.workload_count + insert_stmt.excluded.workload_count,
+               "update_timestamp": insert_stmt.excluded.update_timestamp }
+    )
+    session.execute(upsert_stmt)
+
+    # 工数が無くなった行は削除する
+    keys = [ (row["user_id"], row["subtask_id"], row["work_date"]) for row in rows ]
+    cleanup_stmt = delete(WorkloadDailySummary)\
+        .where(tuple_(WorkloadDailySummary.user_id, WorkloadDailySummary.subtask_id,
+                      WorkloadDailySummary.work_date).in_(keys),
+               WorkloadDailySummary.workload_count <= 0)
+    session.execute(cleanup_stmt)
+
+
+def rebuild_workload_daily_summary(lower_date: dt.date | None = None, upper_date: dt.date | None = None) -> dict:
+    """
+    工数テーブルから日次工数集計テーブルを再作成する。(期間指定時はその期間のみ)
+
+    Attributes
+    ----------
+    lower_date: date | None
+        再作成する期間の開始日
+    upper_date: date | None
+        再作成する期間の終了日
+
+    Returns
+    -------
+    message: dict
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+
+    delete_stmt = delete(WorkloadDailySummary)
+    aggregate_stmt = select(
+            Workload.user_id, Workload.subtask_id, Workload.work_date,
+            func.sum(Workload.workload_minute), func.count(Workload.id), func.now() )\
+        .group_by(Workload.user_id, Workload.subtask_id, Workload.work_date)
+    if lower_date is not None:
+        delete_stmt = delete_stmt.where(WorkloadDailySummary.work_date >= lower_date)
+        aggregate_stmt = aggregate_stmt.where(Workload.work_date >= lower_date)
+    if upper_date is not None:
+        delete_stmt = delete_stmt.where(WorkloadDailySummary.work_date <= upper_date)
+        aggregate_stmt = aggregate_stmt.where(Workload.work_date <= upper_date)
+    insert_stmt = insert(WorkloadDailySummary).from_select(
+        ["user_id", "subtask_id", "work_date", "workload_minute", "workload_count", "update_timestamp"],
+        aggregate_stmt)
+
+    try:
+        # 再作成中に工数更新による差分が反映されないよう集計テーブルをロックする
+        # (未コミットの工数更新はロック取得時点で完了しているため、再作成結果に含まれる)
+        session.execute(text("LOCK TABLE workload_daily_summary IN EXCLUSIVE MODE"))
+        session.execute(delete_stmt)
+        res = session.execute(insert_stmt)
+        session.commit()
+        session.close()
+        return {"message": f"日次工数集計テーブルを再作成しました。({res.rowcount}件)"}
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
@@ -1,20 +1,25 @@
 # 標準モジュール
-import os
 import re
 import json
 import requests
 import datetime as dt
 from requests.auth import HTTPBasicAuth
 # サードパーティ製モジュール
-from sqlalchemy import create_engine, select, update, and_, delete
-from sqlalchemy.orm import sessionmaker, aliased
+from sqlalchemy import (
+    select, update, delete, values, column, or_, tuple_,
+    BigInteger, Integer, Date, Text)
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert
 # プロジェクトモジュール
-from db.models import Workload, SubtaskWithPathView, Project, Issue, User
+from db.models import Workload, WorkloadFact, User
+from db.engine import get_workload_db_engine
 from models.auth import ResponseMessage
-
-# SQLAlchemyのエンジン
-workload_db_engine = create_engine(os.environ["WORKLOAD_DATABASE_URI"])
+from services.custom_exceptions import WorkloadConflictError
+from services.workload_summaries import workload_summary_delta, apply_workload_summary_delta
+from services.workload_partitions import ensure_workload_partitions
+from services.workload_facts import refresh_workload_facts, delete_workload_facts
+from services.workload_search_cache import workload_search_cache
+from services.request_timing import measure_stage
 
 
 def insert_workload_info_into_db(workload_info: dict) -> dict:
@@ -33,18 +38,24 @@ def insert_workload_info_into_db(workload_info: dict) -> dict:
     ---------
     - DB接続失敗
     - JIRAからの情報取得失敗
+    - パーティションを自動作成できない作業日 (WorkloadDateOutOfRangeError)
     """
+    # 作業日のパーティションが無ければ作成
+    ensure_workload_partitions([workload_info["work_date"]])
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
     # 登録用のSQL作成
-    insert_stmt = insert(Workload).values(workload_info)
-    # DBへの登録処理
+    insert_stmt = insert(Workload).values(workload_info).returning(Workload.id)
+    # DBへの登録処理 (日次工数集計, 検索用テーブルも同一トランザクションで更新)
     try:
-        session.execute(insert_stmt)
+        workload_id = session.execute(insert_stmt).scalar()
+        apply_workload_summary_delta(session, [workload_summary_delta(workload_info, 1)])
+        refresh_workload_facts(session, [workload_id])
         session.commit()
         session.close()
+        workload_search_cache.invalidate([(workload_info["user_id"], workload_info["work_date"])])
         return {"message": "工数登録に成功しました"}
     except Exception as e:
         session.close()
@@ -70,7 +81,7 @@ def fetch_specify_workload(workload_id: int) -> dict:
     - DB接続失敗
     """
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
     stmt = select(Workload).\
             where(Workload.id == workload_id)
@@ -89,7 +100,8 @@ def fetch_specify_workload(workload_id: int) -> dict:
                      "workload_minute": workload_obj[0].workload_minute,
                      "detail": workload_obj[0].detail,
                      "update_timestamp": workload_obj[0].update_timestamp,
-                     "create_timestamp": workload_obj[0].create_timestamp, }
+                     "create_timestamp": workload_obj[0].create_timestamp,
+                     "version": workload_obj[0].version, }
         session.close()
         return workload
     except Exception as e:
@@ -97,9 +109,91 @@ def fetch_specify_workload(workload_id: int) -> dict:
         raise Exception(e)
 
 
-def update_specify_workload(workload_id: int , form_value: dict) -> dict:
+def workload_etag(workload_id: int, version: int) -> str:
+    """
+    工数情報のETagを作成する。 ("{工数ID}-{バージョン}")
+    """
+    return f'"{workload_id}-{version}"'
+
+
+def parse_workload_if_match(if_match: str | None, workload_id: int) -> int | None:
     """
-    指定したIDの工数情報をフォームで登録した内容で修正する。
+    If-Matchヘッダから、指定工数のバージョンを取得する。
+
+    Attributes
+    ----------
+    if_match: str | None
+        If-Matchヘッダの値
+    workload_id: int
+        工数情報ID
+
+    Returns
+    -------
+    version: int | None
+        指定されたバージョン (未指定または"*"の場合はNone)
+
+    Exception
+    ---------
+    - 指定工数のETagが含まれない場合 (WorkloadConflictError)
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    for etag in if_match.split(","):
+        etag = etag.strip().removeprefix("W/").strip('"')
+        matched = re.fullmatch(rf"{workload_id}-(\d+)", etag)
+        if matched:
+            return int(matched.group(1))
+    raise WorkloadConflictError("If-Matchに対象工数のETagが含まれていません。")
+
+
+def is_owner_or_superuser(owner_user_id, request_user_id: int):
+    """
+    工数の所有者または管理者であることを判定するSQL条件式を作成する。
+    (UPDATE/DELETEのWHERE句に含め、権限確認のための事前のSELECTを不要にする)
+    """
+    is_superuser = select(User.is_superuser)\
+        .where(User.id == request_user_id)\
+        .scalar_subquery()
+    return or_(owner_user_id == request_user_id, is_superuser.is_(True))
+
+
+def diagnose_workload_mutation_failure(session, workload_id: int, request_user_id: int,
+                                       expected_version: int | None) -> str:
+    """
+    工数の更新・削除で対象行が0件だった場合に、その理由を確認する。
+
+    Returns
+    -------
+    reason: str
+        not_found, forbidden
+
+    Exception
+    ---------
+    - バージョン不一致 (WorkloadConflictError)
+    """
+    stored = session.execute(
+        select(Workload.user_id, Workload.version).where(Workload.id == workload_id)).first()
+    if stored is None:
+        return "not_found"
+    if expected_version is not None and stored.version != expected_version:
+        raise WorkloadConflictError(
+            f"工数情報ID {workload_id}は他で更新されています。最新の内容を取得してください。")
+    is_superuser = session.execute(
+        select(User.is_superuser).where(User.id == request_user_id)).scalar()
+    if not (is_superuser or stored.user_id == request_user_id):
+        return "forbidden"
+    # 権限・バージョンに問題がない場合は、同時に更新されたものとする
+    raise WorkloadConflictError(
+        f"工数情報ID {workload_id}は他で更新されています。再度実行してください。")
+
+
+def update_specify_workload(workload_id: int , form_value: dict,
+                            request_user_id: int, expected_version: int | None = None) -> dict:
+    """
+    指定したIDの工数情報をフォームで登録した内容で修正する。(所有者か、管理者でないと修正できない)
+
+    存在確認・権限確認・バージョン確認はUPDATE文のWHERE句で行い、
+    日次工数集計の差分計算に使用する更新前の値はRETURNINGで取得する。
 
     Attributes
     ----------
@@ -107,118 +201,256 @@ def update_specify_workload(workload_id: int , form_value: dict) -> dict:
         登録済み工数情報のID
     form_value: dict
         フォームで入力した修正内容
+    request_user_id: int
+        JWTから入手したユーザID
+    expected_version: int | None
+        If-Matchで指定されたバージョン (Noneの場合は確認しない)
 
     Returns
     -------
     message: dict
+        key: message, version (更新後のバージョン。失敗時はNone)
 
     Exception
     ---------
-    None
+    - バージョン不一致 (WorkloadConflictError)
+    - パーティションを自動作成できない作業日 (WorkloadDateOutOfRangeError)
     """
+    # 作業日のパーティションが無ければ作成
+    ensure_workload_partitions([form_value["work_date"]])
     # セッションの作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
-    # 有効IDかどうかを確認するクエリ作成
-    check_stmt = select(Workload.id).where(Workload.id == workload_id)
-    # 更新用クエリ作成
+
+    # 更新前の行を自己結合し、更新前の値を返却する
+    # (同時更新された場合は更新前の行とバージョンが一致しなくなるため更新されない)
+    old_workload_table = Workload.__table__.alias("old_workload")
+    conditions = [ Workload.id == workload_id,
+                   old_workload_table.c.id == Workload.id,
+                   old_workload_table.c.work_date == Workload.work_date,
+                   old_workload_table.c.version == Workload.version,
+                   is_owner_or_superuser(old_workload_table.c.user_id, request_user_id) ]
+    if expected_version is not None:
+        conditions.append(Workload.version == expected_version)
     update_stmt = update(Workload)\
-            .where(Workload.id == workload_id)\
+            .where(*conditions)\
             .values( subtask_id = form_value["subtask_id"],
                      user_id = form_value["user_id"],
                      work_date = form_value["work_date"],
                      workload_minute = form_value["workload_minute"],
                      detail = form_value["detail"],
-                     update_timestamp = dt.datetime.now() )
+                     update_timestamp = dt.datetime.now(),
+                     version = Workload.version + 1 )\
+            .returning(old_workload_table.c.user_id, old_workload_table.c.subtask_id,
+                       old_workload_table.c.work_date, old_workload_table.c.workload_minute,
+                       Workload.version)
 
     try:
-        # 存在するIDかどうかを確認。
-        check_data = session.execute(check_stmt).first()
-        if check_data is None:
-            raise Exception(f"工数情報ID {workload_id}は登録されていません。\nIDを確認してください。")
-        # updateの実行
-        session.execute(update_stmt)
+        old_workload = session.execute(update_stmt).first()
+        if old_workload is None:
+            reason = diagnose_workload_mutation_failure(session, workload_id, request_user_id, expected_version)
+            session.close()
+            if reason == "not_found":
+                return {"message": f"工数情報ID {workload_id}は登録されていません。\nIDを確認してください。",
+                        "version": None}
+            return {"message": "工数情報修正に失敗しました。\n所有者または管理者でない場合修正できません。",
+                    "version": None}
+        apply_workload_summary_delta(session, [
+            workload_summary_delta(old_workload._asdict(), -1),
+            workload_summary_delta(form_value, 1) ])
+        refresh_workload_facts(session, [workload_id])
         session.commit()
         session.close()
-        return {"message": "工数情報を修正しました。"}
+        workload_search_cache.invalidate([(old_workload.user_id, old_workload.work_date),
+                                          (form_value["user_id"], form_value["work_date"])])
+        return {"message": "工数情報を修正しました。", "version": old_workload.version}
+    except WorkloadConflictError:
+        session.close()
+        raise
     except Exception as e:
         session.close()
-        return {"message": f"工数情報修正に失敗しました。\nerror message: {e}"}
+        return {"message": f"工数情報修正に失敗しました。\nerror message: {e}", "version": None}
 
 
-def delete_workload(workload_id: int, user_id: int):
+def delete_workload(workload_id: int, user_id: int, expected_version: int | None = None):
     """
     指定されたIDの工数を削除する機能 (所有者か、管理者でないと削除できない)
 
+    存在確認・権限確認・バージョン確認はDELETE文のWHERE句で行い、
+    日次工数集計の差分計算に使用する削除した値はRETURNINGで取得する。
+
     Attributes
     ----------
     workload_id: int
         登録済み工数情報のID
     user_id: int
         JWTから入手したユーザID
+    expected_version: int | None
+        If-Matchで指定されたバージョン (Noneの場合は確認しない)
 
     Returns
     -------
     message: dict
 
+    Exception
+    ---------
+    - 無効な工数情報ID
+    - バージョン不一致 (WorkloadConflictError)
     """
     # セッション作成
-    Session = sessionmaker(bind=workload_db_engine)
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
-    # ユーザ取得
-    user_stmt = select(User.id, User.is_superuser).where(User.id == user_id)
+    # 削除処理
+    conditions = [ Workload.id == workload_id, is_owner_or_superuser(Workload.user_id, user_id) ]
+    if expected_version is not None:
+        conditions.append(Workload.version == expected_version)
+    del_stmt = delete(Workload)\
+        .where(*conditions)\
+        .returning(Workload.id, Workload.user_id, Workload.subtask_id,
+                   Workload.work_date, Workload.workload_minute)
+
     try:
-        # DBからデータを取得
-        user_obj = session.execute(user_stmt).first()
-        # IDが存在しない場合
-        if user_obj is None:
-            raise Exception("無効なユーザIDが指定されました。")
-        # ユーザIDの取得
-        user_info = { "id": user_obj.id, "is_superuser": user_obj.is_superuser }
+        workload = session.execute(del_stmt).first()
+        if workload is None:
+            reason = diagnose_workload_mutation_failure(session, workload_id, user_id, expected_version)
+            session.close()
+            # IDが存在しない場合
+            if reason == "not_found":
+                raise Exception("無効な工数情報IDが指定されました。")
+            # 対象工数が自身が所有もしくはユーザが管理者でなければ、削除できないというメッセージを返却
+            return {"message": "削除に失敗しました。\n所有者または管理者でない場合削除できません。"}
+        workload = workload._asdict()
+        apply_workload_summary_delta(session, [workload_summary_delta(workload, -1)])
+        delete_workload_facts(session, [workload["id"]])
+        session.commit()
+    except WorkloadConflictError:
+        session.close()
+        raise
     except Exception as e:
         session.close()
         raise Exception(e)
 
-    # 工数取得
-    workload_stmt = select(Workload.id, Workload.user_id)\
-                        .where(Workload.id == workload_id)
+    # セッションの終了
+    session.close()
+    workload_search_cache.invalidate([(workload["user_id"], workload["work_date"])])
 
-    try:
-        # DBからデータを取得
-        workload_obj = session.execute(workload_stmt).first()
-        # IDが存在しない場合
-        if workload_obj is None:
-            raise Exception("無効な工数情報IDが指定されました。")
-        # idとuser_idのみを取得
-        workload = { "id": workload_obj.id,
-                     "user_id": workload_obj.user_id }
-    except Exception as e:
-        raise Exception(e)
+    return {"message": "削除にしました。"}
 
-    # 対象工数が自身が所有もしくはユーザが管理者でなければ、削除できないというメッセージを返却
-    if not (user_info["is_superuser"] or workload.user_id == user_id):
-        return {"message": "削除に失敗しました。\n所有者または管理者でない場合削除できません。"}
 
-    # 削除処理
-    del_stmt = delete(Workload).where(Workload.id == workload["id"])
+def build_workload_search_query(session, condition: dict):
+    """
+    指定条件の登録済み工数を取得するクエリを作成する。
+    (工数とproject, issue, subtask, userを非正規化したworkload_factのみを参照する)
+
+    Attributes
+    ----------
+    session: Session
+    condition: dict
+        条件
+
+    Returns
+    -------
+    res: Query
+        workload_factのクエリ
+    """
+    res = session.query(WorkloadFact)\
+        .order_by(WorkloadFact.work_date, WorkloadFact.project_id, WorkloadFact.issue_id_1,
+                  WorkloadFact.issue_id_2, WorkloadFact.subtask_id, WorkloadFact.workload_id)
+
+    target_date = condition.get("target_date")
+    lower_date = condition.get("lower_date")
+    upper_date = condition.get("upper_date")
+    user_id = condition.get("specify_user_id")
+    workload_id = condition.get("workload_id")
+    is_target_project = condition.get("is_target_project")
+
+    if target_date is not None:
+        res = res.filter(WorkloadFact.work_date == target_date)
+    if lower_date is not None:
+        res = res.filter(WorkloadFact.work_date >= lower_date)
+    if upper_date is not None:
+        res = res.filter(WorkloadFact.work_date <= upper_date)
+    if user_id is not None:
+        res = res.filter(WorkloadFact.user_id == int(user_id))
+    if workload_id is not None:
+        res = res.filter(WorkloadFact.workload_id == int(workload_id))
+    if is_target_project is not None:
+        res = res.filter(WorkloadFact.project_is_target == is_target_project)
+
+    return res
+
+
+# 工数検索結果のカラム (workload_factのカラム名と同一)
+WORKLOAD_SEARCH_COLUMNS: list[str] = [
+    "project_id", "project_name", "path", "issue_id_1", "issue_name_1", "issue_id_2", "issue_name_2",
+    "subtask_id", "subtask_name", "workload_id", "user_id", "user_name",
+    "work_date", "workload_minute", "detail", "update_timestamp", "create_timestamp" ]
+
+
+def convert_workload_search_row(fact) -> dict:
+    """
+    工数検索クエリの1レコード(workload_fact)をdictに変換する。
+    """
+    return { "project_id": fact.project_id,
+             "project_name": fact.project_name,
+             "path": fact.path,
+             "issue_id_1": fact.issue_id_1,
+             "issue_name_1": fact.issue_name_1,
+             "issue_id_2": fact.issue_id_2,
+             "issue_name_2": fact.issue_name_2,
+             "subtask_id": fact.subtask_id,
+             "subtask_name": fact.subtask_name,
+             "workload_id": fact.workload_id,
+             "user_id": fact.user_id, "user_name": fact.user_name,
+             "work_date": fact.work_date,
+             "workload_minute": fact.workload_minute,
+             "detail": fact.detail,
+             "update_timestamp": fact.update_timestamp,
+             "create_timestamp": fact.create_timestamp
+           }
+
+
+def fetch_specify_condition_workload_columns_from_db(condition: dict) -> tuple[list[str], list[tuple]]:
+    """
+    指定条件の登録済み工数を、dictに変換せずにカラム名と行(タプル)で取得する。
+    (Arrow/Parquet出力用。キャッシュは使用しない)
+
+    Attributes
+    ----------
+    condition: dict
+        条件
+
+    Returns
+    -------
+    columns: list[str]
+        カラム名 (検索APIのレスポンスと同一)
+    rows: list[tuple]
+
+    Exception
+    ---------
+    - DB接続失敗
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+
+    res = build_workload_search_query(session, condition)\
+            .with_entities(*[ getattr(WorkloadFact, column) for column in WORKLOAD_SEARCH_COLUMNS ])
 
     try:
-        session.execute(del_stmt)
-        session.commit()
+        rows = [ tuple(row) for row in res.all() ]
+        session.close()
     except Exception as e:
         session.close()
         raise Exception(e)
 
-    # セッションの終了
-    session.close()
-
-    return {"message": "削除にしました。"}
+    return WORKLOAD_SEARCH_COLUMNS, rows
 
 
 def fetch_specify_condition_workloads_from_db(condition: dict) -> list[dict]:
     """
     指定条件の登録済み工数をを取得
+    (同一条件の検索結果はキャッシュし、対象の工数が更新されるまでDBへ問い合わせない)
 
     Attributes
     ----------
@@ -234,59 +466,254 @@ def fetch_specify_condition_workloads_from_db(condition: dict) -> list[dict]:
     ---------
     - DB接続失敗
     """
+    return workload_search_cache.get_or_fetch(condition, _fetch_condition_workloads)
+
 
-    Session = sessionmaker(bind=workload_db_engine)
+def _fetch_condition_workloads(condition: dict) -> list[dict]:
+    """
+    指定条件の登録済み工数をDBから取得する。(キャッシュを介さない)
+    """
+    Session = sessionmaker(bind=get_workload_db_engine())
     session = Session()
 
-    # エイリアスを関数内で定義
-    ParentIssue = aliased(Issue)
-    ChildIssue = aliased(Issue)
+    res = build_workload_search_query(session, condition)
 
-    res = session.query(Workload, SubtaskWithPathView, Project, ParentIssue, ChildIssue, User)\
-        .join(SubtaskWithPathView, SubtaskWithPathView.id == Workload.subtask_id, isouter=True)\
-        .join(Project, Project.id == SubtaskWithPathView.project_id, isouter=True)\
-        .join(ParentIssue, and_(SubtaskWithPathView.path.contains(ParentIssue.id), ParentIssue.parent_issue_id.is_(None) ), isouter=True)\
-        .join(ChildIssue, and_(SubtaskWithPathView.path.contains(ChildIssue.id), ChildIssue.parent_issue_id == ParentIssue.id), isouter=True)\
-        .join(User, Workload.user_id == User.id)\
-        .order_by(Workload.work_date, Project.id, ParentIssue.id, ChildIssue.id, SubtaskWithPathView.id, Workload.id)
+    try:
+        with measure_stage("convert"):
+            workloads = [ convert_workload_search_row(info) for info in res.all() ]
+        session.close()
+    except Exception as e:
+        session.close()
+        raise Exception(e)
 
-    target_date = condition.get("target_date")
-    lower_date = condition.get("lower_date")
-    upper_date = condition.get("upper_date")
-    user_id = condition.get("specify_user_id")
-    workload_id = condition.get("workload_id")
-    is_target_project = condition.get("is_target_project")
+    return workloads
 
-    if target_date is not None:
-        res = res.filter(Workload.work_date == target_date)
-    if lower_date is not None:
-        res = res.filter(Workload.work_date >= lower_date)
-    if upper_date is not None:
-        res = res.filter(Workload.work_date <= upper_date)
-    if user_id is not None:
-        res = res.filter(Workload.user_id == int(user_id))
-    if workload_id is not None:
-        res = res.filter(Workload.id == int(workload_id))
-    if is_target_project is not None:
-        res = res.filter(Project.is_target == is_target_project)
-
-    workloads = [ { "project_id": info[2].id,
-                    "project_name": info[2].name,
-                    "path": info[1].path,
-                    "issue_id_1": info[3].id if info[3] else None,
-                    "issue_name_1": info[3].name if info[3] else None,
-                    "issue_id_2": info[4].id if info[4] else None,
-                    "issue_name_2": info[4].name if info[4] else None,
-                    "subtask_id": info[0].subtask_id if info[0] else None,
-                    "subtask_name": info[1].name if info[1] else None,
-                    "workload_id": info[0].id,
-                    "user_id": info[0].user_id, "user_name": info[5].name,
-                    "work_date": info[0].work_date,
-                    "workload_minute": info[0].workload_minute,
-                    "detail": info[0].detail,
-                    "update_timestamp": info[0].update_timestamp,
-                    "create_timestamp": info[0].create_timestamp
-                  } for info in res.all()
-                ]
 
-    return workloads
+def classify_workload_batch(stored_workloads: dict[int, dict], batch: dict) -> tuple[list, list, list, list]:
+    """
+    一括保存リクエストをDB登録済みの工数と比較し、実行すべき登録・更新・削除に振り分ける。
+
+    Attributes
+    ----------
+    stored_workloads: dict[int, dict]
+        対象ユーザ・期間の登録済み工数 (key: workload id)
+    batch: dict
+        key: user_id, lower_date, upper_date, inserts, updates, deletes
+
+    Returns
+    -------
+    to_insert: list[tuple[int, dict]]
+        (リクエスト内index, 登録内容)
+    to_update: list[tuple[int, dict]]
+        (リクエスト内index, 更新内容)
+    to_delete: list[tuple[int, int]]
+        (リクエスト内index, workload id)
+    results: list[dict]
+        DB操作前に確定する結果 (失敗, 変更なし)
+    """
+    lower_date = batch["lower_date"]
+    upper_date = batch["upper_date"]
+    to_insert, to_update, to_delete, results = [], [], [], []
+
+    def is_in_period(work_date) -> bool:
+        return lower_date <= work_date <= upper_date
+
+    for idx, entry in enumerate(batch.get("inserts", [])):
+        if not is_in_period(entry["work_date"]):
+            results.append({ "operation": "insert", "index": idx, "workload_id": None,
+                             "status": "failed", "message": "指定期間外の作業日です。" })
+            continue
+        to_insert.append((idx, entry))
+
+    # 同一IDへの重複操作は先勝ちとする
+    touched_ids = set()
+    for idx, entry in enumerate(batch.get("updates", [])):
+        stored = stored_workloads.get(entry["id"])
+        if stored is None or entry["id"] in touched_ids:
+            results.append({ "operation": "update", "index": idx, "workload_id": entry["id"],
+                             "status": "failed", "message": "対象期間内に更新可能な工数情報が存在しません。" })
+            continue
+        if not is_in_period(entry["work_date"]):
+            results.append({ "operation": "update", "index": idx, "workload_id": entry["id"],
+                             "status": "failed", "message": "指定期間外の作業日です。" })
+            continue
+        if entry.get("version") is not None and entry["version"] != stored.get("version"):
+            results.append({ "operation": "update", "index": idx, "workload_id": entry["id"],
+                             "status": "failed", "message": "他で更新されています。最新の内容を取得してください。" })
+            continue
+        touched_ids.add(entry["id"])
+        # 登録済みの内容と同一の場合は更新しない
+        if all(stored[key] == entry[key] for key in ("subtask_id", "work_date", "workload_minute", "detail")):
+            results.append({ "operation": "update", "index": idx, "workload_id": entry["id"],
+                             "status": "unchanged", "message": None })
+            continue
+        to_update.append((idx, entry))
+
+    for idx, workload_id in enumerate(batch.get("deletes", [])):
+        if workload_id not in stored_workloads or workload_id in touched_ids:
+            results.append({ "operation": "delete", "index": idx, "workload_id": workload_id,
+                             "status": "failed", "message": "対象期間内に削除可能な工数情報が存在しません。" })
+            continue
+        touched_ids.add(workload_id)
+        to_delete.append((idx, workload_id))
+
+    return to_insert, to_update, to_delete, results
+
+
+def save_workload_batch(batch: dict, request_user_id: int) -> dict:
+    """
+    1ユーザ・1期間分の工数の登録、更新、削除を1トランザクションでまとめて反映する。
+    (週単位の工数入力画面の一括保存用)
+
+    Attributes
+    ----------
+    batch: dict
+        key: user_id, lower_date, upper_date, inserts, updates, deletes
+    request_user_id: int
+        JWTから入手したユーザID
+
+    Returns
+    -------
+    result: dict
+        key: message, results (各操作の結果)
+
+    Exception
+    ---------
+    - DB接続失敗
+    - DB更新失敗 (全ての操作がロールバックされる)
+    - パーティションを自動作成できない作業日 (WorkloadDateOutOfRangeError)
+    """
+    user_id = int(batch["user_id"])
+    lower_date = batch["lower_date"]
+    upper_date = batch["upper_date"]
+    if isinstance(lower_date, str):
+        lower_date = dt.date.fromisoformat(lower_date)
+        upper_date = dt.date.fromisoformat(upper_date)
+    for entry in [*batch.get("inserts", []), *batch.get("updates", [])]:
+        if isinstance(entry["work_date"], str):
+            entry["work_date"] = dt.date.fromisoformat(entry["work_date"])
+    batch = {**batch, "lower_date": lower_date, "upper_date": upper_date}
+    # 期間内の作業日のパーティションが無ければ作成
+    ensure_workload_partitions([
+        entry["work_date"] for entry in [*batch.get("inserts", []), *batch.get("updates", [])]
+        if lower_date <= entry["work_date"] <= upper_date ])
+
+    Session = sessionmaker(bind=get_workload_db_engine())
+    session = Session()
+
+    try:
+        # 本人以外の工数は管理者のみ編集可能
+        if user_id != request_user_id:
+            is_superuser = session.execute(
+                select(User.is_superuser).where(User.id == request_user_id)).scalar()
+            if not is_superuser:
+                session.close()
+                return {"message": "一括保存に失敗しました。\n所有者または管理者でない場合保存できません。",
+                        "results": []}
+
+        # 対象期間の登録済み工数を1回で取得して差分を取る
+        stored_stmt = select(Workload.id, Workload.subtask_id, Workload.work_date,
+                             Workload.workload_minute, Workload.detail, Workload.version)\
+                        .where(Workload.user_id == user_id,
+                               Workload.work_date >= lower_date,
+                               Workload.work_date <= upper_date)
+        stored_workloads = { row.id: { "subtask_id": row.subtask_id, "work_date": row.work_date,
+                                       "workload_minute": row.workload_minute, "detail": row.detail,
+                                       "version": row.version }
+                             for row in session.execute(stored_stmt) }
+        to_insert, to_update, to_delete, results = classify_workload_batch(stored_workloads, batch)
+
+        now = dt.datetime.now()
+        summary_deltas = []
+        # 登録 (複数行INSERT ... RETURNING)
+        if to_insert:
+            insert_rows = [ { "subtask_id": entry["subtask_id"], "user_id": user_id,
+                              "work_date": entry["work_date"], "workload_minute": entry["workload_minute"],
+                              "detail": entry["detail"], "update_timestamp": now }
+                            for _, entry in to_insert ]
+            insert_stmt = insert(Workload).returning(Workload.id, sort_by_parameter_order=True)
+            inserted_ids = session.execute(insert_stmt, insert_rows).scalars().all()
+            results += [ { "operation": "insert", "index": idx, "workload_id": workload_id,
+                           "status": "inserted", "message": None }
+                         for (idx, _), workload_id in zip(to_insert, inserted_ids) ]
+            summary_deltas += [ workload_summary_delta(row, 1) for row in insert_rows ]
+
+        # 更新 (UPDATE ... FROM (VALUES ...) で1文にまとめる)
+        # 取得時からバージョンが変わった行は更新されないため、件数が一致しない場合は全体をロールバックする
+        if to_update:
+            update_values = values(
+                column("id", BigInteger), column("subtask_id", BigInteger), column("work_date", Date),
+                column("workload_minute", Integer), column("detail", Text), column("version", Integer),
+                name="batch_values",
+            ).data([ (entry["id"], entry["subtask_id"], entry["work_date"],
+                      entry["workload_minute"], entry["detail"], stored_workloads[entry["id"]]["version"])
+                     for _, entry in to_update ])
+            update_stmt = update(Workload)\
+                .where(Workload.id == update_values.c.id, Workload.user_id == user_id,
+                       Workload.version == update_values.c.version)\
+                .values( subtask_id = update_values.c.subtask_id,
+                         work_date = update_values.c.work_date,
+                         workload_minute = update_values.c.workload_minute,
+                         detail = update_values.c.detail,
+                         update_timestamp = now,
+                         version = Workload.version + 1 )\
+                .returning(Workload.id)
+            updated_ids = session.execute(update_stmt).scalars().all()
+            if len(updated_ids) != len(to_update):
+                raise WorkloadConflictError("一括保存中に他で更新された工数があります。再度実行してください。")
+            results += [ { "operation": "update", "index": idx, "workload_id": entry["id"],
+                           "status": "updated", "message": None }
+                         for idx, entry in to_update ]
+            for _, entry in to_update:
+                summary_deltas.append(workload_summary_delta(
+                    {**stored_workloads[entry["id"]], "user_id": user_id}, -1))
+                summary_deltas.append(workload_summary_delta({**entry, "user_id": user_id}, 1))
+
+        # 削除
+        if to_delete:
+            delete_ids = [ workload_id for _, workload_id in to_delete ]
+            del_stmt = delete(Workload)\
+                .where(tuple_(Workload.id, Workload.version).in_(
+                           [ (workload_id, stored_workloads[workload_id]["version"]) for workload_id in delete_ids ]),
+                       Workload.user_id == user_id)\
+                .returning(Workload.id)
+            deleted_ids = session.execute(del_stmt).scalars().all()
+            if len(deleted_ids) != len(delete_ids):
+                raise WorkloadConflictError("一括保存中に他で更新された工数があります。再度実行してください。")
+            results += [ { "operation": "delete", "index": idx, "workload_id": workload_id,
+                           "status": "deleted", "message": None }
+                         for idx, workload_id in to_delete ]
+            summary_deltas += [ workload_summary_delta({**stored_workloads[workload_id], "user_id": user_id}, -1)
+                                for workload_id in delete_ids ]
+
+        # 日次工数集計, 検索用テーブルの更新
+        apply_workload_summary_delta(session, summary_deltas)
+        refresh_workload_facts(session, [
+            *[ r["workload_id"] for r in results if r["status"] == "inserted" ],
+            *[ entry["id"] for _, entry in to_update ] ])
+        delete_workload_facts(session, [ workload_id for _, workload_id in to_delete ])
+
+        session.commit()
+        session.close()
+    except WorkloadConflictError:
+        session.rollback()
+        session.close()
+        raise
+    except Exception as e:
+        session.rollback()
+        session.close()
+        raise Exception(e)
+
+    # 変更した工数の(ユーザ, 作業日)に依存する検索結果を無効化
+    workload_search_cache.invalidate([
+        *[ (user_id, entry["work_date"]) for _, entry in [*to_insert, *to_update] ],
+        *[ (user_id, stored_workloads[entry["id"]]["work_date"]) for _, entry in to_update ],
+        *[ (user_id, stored_workloads[workload_id]["work_date"]) for _, workload_id in to_delete ] ])
+
+    operation_order = {"insert": 0, "update": 1, "delete": 2}
+    results.sort(key=lambda r: (operation_order[r["operation"]], r["index"]))
+    num_of_failed = len([r for r in results if r["status"] == "failed"])
+    message = "工数の一括保存に成功しました。" if num_of_failed == 0 \
+        else f"工数の一括保存を行いました。({num_of_failed}件は保存できませんでした)"
+
+    return {"message": message, "results": results}
@@ -0,0 +1,135 @@
+"""notify workload_fact changes
+
+Revision ID: 9e2b5d7c1a40
+Revises: c41f0e7a92d3
+Create Date: 2025-03-24 21:05:12.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations.operations.base import create_sp, drop_sp
+from app.db.migrations.operations.views import ReplaceableObject
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2b5d7c1a40'
+down_revision: Union[str, None] = 'c41f0e7a92d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 1文で変更された工数を(ユーザ, 月)ごとにまとめて1件ずつworkload_changesチャンネルへ通知する
+# (工数1件ごとに通知すると、再作成・合成データ登録等の一括更新で通知キューが溢れるため)
+#   - payload: op, user_id, month (月初日), project_ids, count, workload_ids (100件以下の場合のみ)
+#   - (ユーザ, 月)が100を超える場合は、個別の通知の代わりにresyncを1件だけ通知する
+NOTIFY_CHANGES_FUNCTION_TEXT: str = """
+RETURNS VOID AS $$
+DECLARE
+    num_of_groups INTEGER;
+    notification RECORD;
+BEGIN
+    IF workload_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    SELECT count(DISTINCT (c.user_id, date_trunc('month', c.work_date))) INTO num_of_groups
+    FROM unnest(user_ids, work_dates) AS c(user_id, work_date);
+    IF num_of_groups > 100 THEN
+        PERFORM pg_notify('workload_changes', jsonb_build_object('op', 'resync')::TEXT);
+        RETURN;
+    END IF;
+
+    FOR notification IN
+        SELECT jsonb_build_object(
+            'op', op,
+            'user_id', c.user_id,
+            'month', date_trunc('month', c.work_date)::DATE,
+            'project_ids', coalesce(array_agg(DISTINCT c.project_id) FILTER (WHERE c.project_id IS NOT NULL), '{}'),
+            'count', count(DISTINCT c.workload_id),
+            'workload_ids', CASE WHEN count(DISTINCT c.workload_id) <= 100
+                                 THEN array_agg(DISTINCT c.workload_id) END
+        ) AS payload
+        FROM unnest(workload_ids, user_ids, project_ids, work_dates) AS c(workload_id, user_id, project_id, work_date)
+        GROUP BY c.user_id, date_trunc('month', c.work_date)
+    LOOP
+        PERFORM pg_notify('workload_changes', notification.payload::TEXT);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+;
+"""
+
+# workload_factの変更を文単位(遷移テーブル)で受け取り、notify_workload_changesへ渡す
+# (Jira情報の同期のみによる更新(課題名の変更など)は通知しない。更新は変更前後の両方のユーザ・月に通知する)
+NOTIFY_FUNCTION_TEXT: str = """
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM notify_workload_changes('insert', array_agg(workload_id), array_agg(user_id),
+                                        array_agg(project_id), array_agg(work_date))
+        FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM notify_workload_changes('delete', array_agg(workload_id), array_agg(user_id),
+                                        array_agg(project_id), array_agg(work_date))
+        FROM old_rows;
+    ELSE
+        PERFORM notify_workload_changes('update', array_agg(side.workload_id), array_agg(side.user_id),
+                                        array_agg(side.project_id), array_agg(side.work_date))
+        FROM old_rows o
+        JOIN new_rows n USING (workload_id)
+        CROSS JOIN LATERAL (VALUES (o.workload_id, o.user_id, o.project_id, o.work_date),
+                                   (n.workload_id, n.user_id, n.project_id, n.work_date))
+            AS side(workload_id, user_id, project_id, work_date)
+        WHERE (o.work_date, o.workload_minute, o.detail, o.user_id, o.subtask_id, o.project_id)
+              IS DISTINCT FROM
+              (n.work_date, n.workload_minute, n.detail, n.user_id, n.subtask_id, n.project_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+;
+"""
+
+notify_changes_function = ReplaceableObject(
+    "notify_workload_changes(op TEXT, workload_ids BIGINT[], user_ids BIGINT[], project_ids BIGINT[], work_dates DATE[])",
+    NOTIFY_CHANGES_FUNCTION_TEXT
+)
+
+notify_function = ReplaceableObject(
+    "notify_workload_fact_change()",
+    NOTIFY_FUNCTION_TEXT
+)
+
+
+def upgrade() -> None:
+    op.create_sp(notify_changes_function)
+    op.create_sp(notify_function)
+    # 遷移テーブルはイベントごとにトリガーを分けて参照する
+    op.execute("""
+        CREATE TRIGGER workload_fact_insert_notify
+        AFTER INSERT ON workload_fact
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_workload_fact_change()
+    """)
+    op.execute("""
+        CREATE TRIGGER workload_fact_update_notify
+        AFTER UPDATE ON workload_fact
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_workload_fact_change()
+    """)
+    op.execute("""
+        CREATE TRIGGER workload_fact_delete_notify
+        AFTER DELETE ON workload_fact
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_workload_fact_change()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER workload_fact_delete_notify ON workload_fact")
+    op.execute("DROP TRIGGER workload_fact_update_notify ON workload_fact")
+    op.execute("DROP TRIGGER workload_fact_insert_notify ON workload_fact")
+    op.drop_sp(notify_function)
+    op.drop_sp(notify_changes_function)
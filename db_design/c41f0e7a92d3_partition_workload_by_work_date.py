@@ -0,0 +1,137 @@
+"""partition workload by work_date
+
+Revision ID: c41f0e7a92d3
+Revises: 6bd6e0fcfde7
+Create Date: 2025-03-10 20:12:44.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.db.migrations.operations.base import create_sp, drop_sp
+from app.db.migrations.operations.views import ReplaceableObject
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f0e7a92d3'
+down_revision: Union[str, None] = '6bd6e0fcfde7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 移行時に作成する、現在月以降のパーティション数
+MONTHS_AHEAD: int = 12
+
+
+CREATE_PARTITION_FUNCTION_TEXT: str = """
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', target_month)::DATE;
+    upper_bound DATE := (date_trunc('month', target_month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'workload_' || to_char(target_month, 'YYYYMM');
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF workload FOR VALUES FROM (%L) TO (%L)',
+            partition_name, lower_bound, upper_bound
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql
+;
+"""
+
+create_partition_function = ReplaceableObject(
+    "create_workload_partition(target_month DATE)",
+    CREATE_PARTITION_FUNCTION_TEXT
+)
+
+
+CREATE_PARTITIONED_TABLE_TEXT: str = """
+CREATE TABLE workload (
+    id BIGINT NOT NULL DEFAULT nextval('workload_id_seq'),
+    subtask_id BIGINT NOT NULL REFERENCES issue (id),
+    user_id BIGINT NOT NULL REFERENCES "user" (id),
+    work_date DATE NOT NULL,
+    workload_minute INTEGER NOT NULL,
+    detail TEXT NOT NULL,
+    update_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    create_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (id, work_date)
+) PARTITION BY RANGE (work_date)
+;
+"""
+
+CREATE_UNPARTITIONED_TABLE_TEXT: str = """
+CREATE TABLE workload (
+    id BIGINT NOT NULL DEFAULT nextval('workload_id_seq') PRIMARY KEY,
+    subtask_id BIGINT NOT NULL REFERENCES issue (id),
+    user_id BIGINT NOT NULL REFERENCES "user" (id),
+    work_date DATE NOT NULL,
+    workload_minute INTEGER NOT NULL,
+    detail TEXT NOT NULL,
+    update_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    create_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL
+)
+;
+"""
+
+WORKLOAD_COLUMNS: str = \
+    "id, subtask_id, user_id, work_date, workload_minute, detail, update_timestamp, create_timestamp"
+
+
+def rename_current_workload_table() -> None:
+    """
+    既存のworkloadテーブルと、名前が競合するインデックスを退避用の名前に変更する。
+    """
+    op.execute("ALTER TABLE workload RENAME TO workload_old")
+    op.execute("ALTER INDEX workload_pkey RENAME TO workload_old_pkey")
+    op.execute("ALTER INDEX ix_workload_id RENAME TO ix_workload_old_id")
+    op.execute("ALTER INDEX ix_workload_work_date RENAME TO ix_workload_old_work_date")
+
+
+def drop_old_workload_table() -> None:
+    """
+    シーケンスを新テーブルに付け替えてから、退避したworkloadテーブルを削除する。
+    """
+    op.execute("ALTER SEQUENCE workload_id_seq OWNED BY workload.id")
+    op.execute("DROP TABLE workload_old")
+
+
+def upgrade() -> None:
+    rename_current_workload_table()
+
+    # パーティションテーブルと各パーティション共通のインデックス
+    op.execute(CREATE_PARTITIONED_TABLE_TEXT)
+    op.create_index("ix_workload_id", "workload", ["id"])
+    op.create_index("ix_workload_work_date", "workload", ["work_date"])
+    op.create_index("ix_workload_user_id_work_date", "workload", ["user_id", "work_date"])
+
+    # 既存データの最古月から、現在月 + MONTHS_AHEADまでのパーティションを作成
+    op.create_sp(create_partition_function)
+    op.execute(f"""
+        SELECT create_workload_partition(month::DATE)
+        FROM generate_series(
+            date_trunc('month', LEAST((SELECT min(work_date) FROM workload_old), CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + INTERVAL '{MONTHS_AHEAD} month',
+            INTERVAL '1 month'
+        ) AS month
+    """)
+
+    # データ移行
+    op.execute(f"INSERT INTO workload ({WORKLOAD_COLUMNS}) SELECT {WORKLOAD_COLUMNS} FROM workload_old")
+    drop_old_workload_table()
+
+
+def downgrade() -> None:
+    rename_current_workload_table()
+
+    op.execute(CREATE_UNPARTITIONED_TABLE_TEXT)
+    op.create_index("ix_workload_id", "workload", ["id"])
+    op.create_index("ix_workload_work_date", "workload", ["work_date"])
+
+    # データ移行 (各パーティションは親テーブルと一緒に削除される)
+    op.execute(f"INSERT INTO workload ({WORKLOAD_COLUMNS}) SELECT {WORKLOAD_COLUMNS} FROM workload_old")
+    drop_old_workload_table()
+    op.drop_sp(create_partition_function)
@@ -0,0 +1,71 @@
+# サードバーティ製モジュール
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+# プロジェクトモジュール
+from app.middlewares.compression import CompressionMiddleware, select_encoding
+
+# テスト用アプリ
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+LARGE_PAYLOAD = [ {"id": idx, "name": f"subtask {idx}"} for idx in range(200) ]
+
+
+@app.get("/large")
+def large():
+    return JSONResponse(LARGE_PAYLOAD)
+
+
+@app.get("/small")
+def small():
+    return JSONResponse({"id": 1})
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((f"{idx},row\n".encode() for idx in range(1000)), media_type="text/csv")
+
+
+client = TestClient(app)
+
+
+class TestCompressionMiddleware:
+    """
+    レスポンス圧縮ミドルウェアについてのテスト
+    """
+    @pytest.mark.parametrize('accept_encoding, expected', [
+        ("gzip, deflate", "gzip"), ("br;q=0, gzip;q=0.5", "gzip"),
+        ("identity", None), ("gzip;q=0", None), ("*", "gzip"), ("", None) ])
+    def test_encoding_should_be_negotiated(self, accept_encoding, expected):
+        """
+        Accept-Encodingのq値に従って圧縮方式を選択する。
+        """
+        assert select_encoding(accept_encoding, ["gzip"]) == expected
+
+    def test_large_response_should_be_compressed(self):
+        """
+        最小サイズ以上のレスポンスは圧縮される。
+        """
+        res = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in res.headers["vary"]
+        assert int(res.headers["content-length"]) < len(res.content)
+        assert res.json() == LARGE_PAYLOAD
+
+    def test_small_response_should_not_be_compressed(self):
+        """
+        最小サイズ未満のレスポンスは圧縮されない。
+        """
+        res = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in res.headers
+        assert res.json() == {"id": 1}
+
+    def test_streaming_response_should_be_compressed(self):
+        """
+        ストリーミングレスポンスはチャンクごとに圧縮される。
+        """
+        res = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert "content-length" not in res.headers
+        assert res.text.splitlines()[999] == "999,row"
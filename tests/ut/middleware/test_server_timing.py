@@ -0,0 +1,60 @@
+# サードバーティ製モジュール
+from fastapi import FastAPI, APIRouter
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+# プロジェクトモジュール
+from app.middlewares.server_timing import (
+    ServerTimingMiddleware, TimedJSONResponse, TimedRoute, add_stage_time)
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+# テスト用アプリ
+app = FastAPI(default_response_class=TimedJSONResponse)
+app.add_middleware(ServerTimingMiddleware, enabled=True, log=False)
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/items", response_model=list[Item])
+def items():
+    add_stage_time("db", 0.010)
+    add_stage_time("db", 0.005)
+    return [ {"id": idx, "name": f"item {idx}"} for idx in range(100) ]
+
+
+@router.get("/items/{item_id}", response_model=Item)
+async def item(item_id: int):
+    return {"id": item_id, "name": "item"}
+
+
+app.include_router(router)
+client = TestClient(app)
+
+
+def parse_server_timing(header: str) -> dict[str, str]:
+    return { metric.split(";")[0].strip(): metric for metric in header.split(",") }
+
+
+class TestServerTimingMiddleware:
+    """
+    Server-Timingヘッダについてのテスト
+    """
+    def test_stages_should_be_reported(self):
+        """
+        同期エンドポイント(スレッドプールで実行)で加算した時間も含め、処理段階ごとの時間を返す。
+        """
+        response = client.get("/items")
+        metrics = parse_server_timing(response.headers["server-timing"])
+        assert metrics["db"].strip() == 'db;dur=15.0;desc="2 queries"'
+        assert { "endpoint", "validate", "encode", "total" } <= set(metrics)
+
+    def test_path_parameters_should_still_be_resolved(self):
+        """
+        計測用にラップした非同期エンドポイントでもパスパラメータを解析できる。
+        """
+        response = client.get("/items/3")
+        assert response.json() == {"id": 3, "name": "item"}
+        assert "db" not in parse_server_timing(response.headers["server-timing"])
@@ -0,0 +1,64 @@
+# 標準モジュール
+import random
+import datetime as dt
+# サードバーティ製モジュール
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services import benchmarks
+from app.services.benchmarks import measure, compare_benchmark_results, build_benchmark_cases
+from app.services.synthetic_data import generate_projects, generate_issues
+
+SCALE = { "projects": 2, "issue_depth": 2, "issue_branching": 3, "subtasks_per_issue": 2,
+          "users": 4, "years": 1, "workloads_per_user_day": 2, "subtasks_per_user": 5 }
+
+
+def result_of(cases: dict[str, float]) -> dict:
+    return { "revision": "abc", "scales": { "small": { "cases": {
+        name: { "median_ms": median_ms } for name, median_ms in cases.items() } } } }
+
+
+class TestBenchmarks:
+    """
+    性能計測についてのテスト
+    """
+    def test_setup_should_run_before_each_measurement(self, mocker: MockFixture):
+        """
+        setupは計測ごとに実行し、指定回数分の統計値を返す。
+        """
+        setup = mocker.Mock()
+        func = mocker.Mock()
+        stats = measure(func, 5, setup)
+
+        assert setup.call_count == 5 and func.call_count == 5
+        assert stats["runs"] == 5
+        assert stats["min_ms"] <= stats["median_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+
+    def test_regressions_should_be_detected(self):
+        """
+        中央値が閾値以上の比率で遅くなった処理を検出し、片方にのみ存在する処理は比較しない。
+        """
+        base = result_of({ "search": 100.0, "upsert": 200.0, "removed": 10.0 })
+        head = result_of({ "search": 130.0, "upsert": 190.0, "added": 10.0 })
+
+        rows = { row["case"]: row for row in compare_benchmark_results(base, head, threshold=1.2) }
+        assert set(rows) == { "search", "upsert" }
+        assert rows["search"]["is_regression"] and rows["search"]["ratio"] == 1.3
+        assert not rows["upsert"]["is_regression"]
+
+    def test_issue_sync_case_should_reuse_dataset_seed(self, mocker: MockFixture):
+        """
+        issue同期の計測は合成データ登録時と同じシードでissueを作成し、名称のみを1割ずつ変更する。
+        """
+        upsert = mocker.patch.object(benchmarks, "upsert_jira_issues_into_app_db")
+        setup, func = build_benchmark_cases(SCALE, dt.date(2025, 3, 31), seed=7)["upsert_jira_issues_into_app_db"]
+        setup()
+        func()
+
+        now = dt.datetime.now()
+        expected = generate_issues(SCALE, generate_projects(SCALE, now), random.Random(7), now)
+        issues = upsert.call_args.args[0]
+        keys = [ "id", "parent_issue_id", "status", "limit_date" ]
+        assert [ [ issue[key] for key in keys ] for issue in issues ] == \
+               [ [ issue[key] for key in keys ] for issue in expected ]
+        num_of_renamed = sum(1 for issue, base in zip(issues, expected) if issue["name"] != base["name"])
+        assert num_of_renamed == len(range(1, len(issues), 10))
@@ -0,0 +1,47 @@
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services import columnar_formats
+from app.services.columnar_formats import negotiate_columnar_format
+
+
+class TestNegotiateColumnarFormat:
+    """
+    レスポンス形式(JSON, Arrow, Parquet)の決定についてのテスト
+    """
+    @pytest.fixture
+    def with_pyarrow(self, mocker: MockFixture):
+        mocker.patch.object(columnar_formats, "pa", object())
+
+    @pytest.mark.parametrize(["accept", "expected"], [
+        (None, None),
+        ("application/json", None),
+        ("application/vnd.apache.arrow.stream", "arrow"),
+        ("application/vnd.apache.parquet", "parquet"),
+        ("application/json;q=0.5, application/vnd.apache.parquet", "parquet"),
+        ("application/vnd.apache.arrow.stream;q=0.5, application/json", None),
+        ("*/*, application/vnd.apache.arrow.stream", "arrow"),
+        ("text/html, */*;q=0.8", None),
+    ])
+    def test_accept_header(self, with_pyarrow, accept, expected):
+        """
+        Acceptヘッダのq値(同じ場合は具体的な指定、記載順)に従って形式を決定する。
+        """
+        assert negotiate_columnar_format(accept) == expected
+
+    def test_requested_format_takes_priority(self, with_pyarrow):
+        """
+        クエリパラメータの指定はAcceptヘッダより優先する。
+        """
+        assert negotiate_columnar_format("application/vnd.apache.arrow.stream", "json") is None
+        assert negotiate_columnar_format("application/json", "parquet") == "parquet"
+
+    def test_accept_header_is_ignored_without_pyarrow(self, mocker: MockFixture):
+        """
+        pyarrow未インストールの場合、Acceptヘッダによる指定はJSONとして扱う。
+        (クエリパラメータの指定はそのまま返し、API側で400とする)
+        """
+        mocker.patch.object(columnar_formats, "pa", None)
+        assert negotiate_columnar_format("application/vnd.apache.arrow.stream") is None
+        assert negotiate_columnar_format(None, "arrow") == "arrow"
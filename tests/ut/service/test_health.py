@@ -0,0 +1,65 @@
+# 標準モジュール
+import datetime as dt
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.health import (
+    CacheWarmState, workload_db_pool_status, threadpool_status, build_readiness_report)
+
+
+def pool_of(mocker: MockFixture, in_use: int, size: int = 5, max_overflow: int = 10):
+    pool = mocker.Mock(max_overflow=max_overflow, waiting=0)
+    pool.size.return_value = size
+    pool.checkedout.return_value = in_use
+    pool.checkedin.return_value = size - min(in_use, size)
+    return mocker.Mock(pool=pool)
+
+
+class TestHealth:
+    """
+    liveness, readinessについてのテスト
+    """
+    def test_pool_should_be_saturated_when_all_connections_are_in_use(self, mocker: MockFixture):
+        """
+        使用中の接続数がプールの上限(pool_size + max_overflow)に達した場合に飽和とみなす。(上限なしの場合は飽和しない)
+        """
+        assert not workload_db_pool_status(pool_of(mocker, 14))["saturated"]
+        assert workload_db_pool_status(pool_of(mocker, 15))["saturated"]
+        assert workload_db_pool_status(pool_of(mocker, 12), saturation_ratio=0.8)["saturated"]
+        assert not workload_db_pool_status(pool_of(mocker, 100, max_overflow=-1))["saturated"]
+
+    def test_cache_warm_state_should_record_failure_and_recovery(self, mocker: MockFixture):
+        """
+        事前読み込みの失敗時はエラーの1行目を保持し、再実行に成功した場合はwarmとする。
+        """
+        step = mocker.Mock(side_effect=[Exception("no such table: user\n[SQL: SELECT ...]"), None])
+        state = CacheWarmState([step])
+        with pytest.raises(Exception):
+            state.warm()
+        assert state.status == "failed" and state.detail == "no such table: user"
+
+        state.warm()
+        assert state.is_warm and state.warmed_at is not None and state.detail is None
+
+    def test_readiness_should_report_reasons_and_jira_sync_age(self, mocker: MockFixture):
+        """
+        DB接続の失敗・プールの飽和・キャッシュ未読み込みをnot_readyの理由とし、Jira同期からの経過時間を返す。
+        """
+        now = dt.datetime(2025, 3, 31, 12, 0, 0)
+        warm_state = CacheWarmState([])
+        warm_state.warm()
+        database = { "status": "ok", "latency_ms": 1.0, "detail": None,
+                     "jira_last_synced_at": now - dt.timedelta(hours=1) }
+        report = build_readiness_report(database, workload_db_pool_status(pool_of(mocker, 3)),
+                                        threadpool_status(40, 2), warm_state, now)
+        assert report["status"] == "ready" and report["reasons"] == []
+        assert report["jira_sync"]["age_seconds"] == 3600.0
+
+        report = build_readiness_report({ "status": "skipped", "latency_ms": None, "detail": None },
+                                        workload_db_pool_status(pool_of(mocker, 15)), threadpool_status(40, 40),
+                                        CacheWarmState([]), now)
+        assert report["status"] == "not_ready"
+        assert report["reasons"] == [
+            "database_skipped", "db_pool_saturated", "threadpool_saturated", "caches_pending"]
+        assert report["jira_sync"] == { "last_succeeded_at": None, "age_seconds": None }
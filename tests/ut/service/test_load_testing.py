@@ -0,0 +1,58 @@
+# 標準モジュール
+import random
+import datetime as dt
+# サードバーティ製モジュール
+from fastapi.testclient import TestClient
+# プロジェクトモジュール
+from app.services.load_testing import LoadTestStats, percentile, build_week_batch
+from app.services.jira_stand_in import create_jira_stand_in_app
+
+
+class TestLoadTest:
+    """
+    負荷試験についてのテスト
+    """
+    def test_summary_should_report_percentiles_and_error_rate(self):
+        """
+        処理ごとにパーセンタイル(nearest-rank法)とエラー率を集計する。
+        """
+        assert percentile([ float(value) for value in range(1, 101) ], 95) == 95.0
+        stats = LoadTestStats()
+        for idx in range(10):
+            stats.record("member", "save_week", (idx + 1) / 1000, "409" if idx < 2 else None)
+
+        row, = stats.summary()
+        assert row["requests"] == 10 and row["errors"] == 2 and row["error_rate"] == 0.2
+        assert row["p50_ms"] == 5.0 and row["max_ms"] == 10.0
+        assert row["errors_by_kind"] == { "409": 2 }
+
+    def test_week_batch_should_update_existing_and_fill_empty_days(self):
+        """
+        登録済みの工数は更新し、工数が無い平日にのみ登録する。
+        """
+        monday = dt.date(2025, 3, 3)
+        workloads = [
+            { "workload_id": 1, "subtask_id": 10, "work_date": "2025-03-04", "detail": "既存" },
+            { "workload_id": 2, "subtask_id": 10, "work_date": "2025-03-10", "detail": "翌週" } ]
+        batch = build_week_batch(5, monday, workloads, [10, 11], random.Random(0))
+
+        assert [ update["id"] for update in batch["updates"] ] == [1]
+        assert [ insert["work_date"] for insert in batch["inserts"] ] == [
+            "2025-03-03", "2025-03-05", "2025-03-06", "2025-03-07"]
+        assert batch["lower_date"] == "2025-03-03" and batch["upper_date"] == "2025-03-07"
+
+    def test_jira_stand_in_should_page_project_issues(self):
+        """
+        Jiraの代替アプリはプロジェクトごとのissueをページングして返す。
+        """
+        scale = { "projects": 2, "issue_depth": 1, "issue_branching": 2, "subtasks_per_issue": 2 }
+        client = TestClient(create_jira_stand_in_app(scale))
+        projects = client.get("/rest/api/3/project").json()
+        assert len(projects) == 2
+
+        project_id = projects[0]["id"]
+        first = client.get("/rest/api/3/search/jql", params={ "jql": f"project={project_id}", "maxResults": 4 }).json()
+        second = client.get("/rest/api/3/search/jql",
+                            params={ "jql": f"project={project_id}", "startAt": 4, "maxResults": 4 }).json()
+        assert first["total"] == 6 and len(first["issues"]) == 4 and len(second["issues"]) == 2
+        assert second["issues"][0]["fields"]["parent"]["id"] == first["issues"][1]["id"]
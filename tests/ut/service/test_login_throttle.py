@@ -0,0 +1,78 @@
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services import login_throttle
+from app.services.login_throttle import (
+    take_token, retry_after_seconds, LoginThrottle, MemoryLoginThrottleBackend,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTakeToken:
+    """
+    トークンバケットの計算についてのテスト
+    """
+    def test_tokens_should_refill_up_to_capacity(self):
+        """
+        経過時間分回復するが、連続試行可能回数を超えない。
+        """
+        assert take_token(0.0, 10, capacity=5, refill_per_second=0.1) == 0.0
+        assert take_token(0.0, 1000, capacity=5, refill_per_second=0.1) == 4.0
+
+    def test_denied_attempt_should_owe_at_most_one_token(self):
+        """
+        拒否された試行も消費するが、不足分は1回分までとする。
+        """
+        assert take_token(-1.0, 0, capacity=5, refill_per_second=0.1) == -1.0
+        assert retry_after_seconds(-1.0, refill_per_second=0.1) == 20
+
+
+class TestLoginThrottle:
+    """
+    ログイン試行回数制限についてのテスト
+    """
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def test_attempts_over_email_burst_should_be_throttled(self, clock):
+        """
+        同じemailで連続試行可能回数を超えた場合はRetry-After付きで拒否し、回復後は再度試行できる。
+        """
+        throttle = LoginThrottle(MemoryLoginThrottleBackend(clock=clock), email_rule=(3, 6), ip_rule=(100, 600))
+        for _ in range(3):
+            throttle.check("User@example.com", "10.0.0.1")
+        with pytest.raises(login_throttle.LoginThrottledError) as e:
+            throttle.check("user@example.com ", "10.0.0.2")
+        assert e.value.retry_after == 20
+        # 別のemailは制限されない
+        throttle.check("other@example.com", "10.0.0.1")
+        clock.now += 20
+        throttle.check("user@example.com", "10.0.0.1")
+
+    def test_attempts_over_ip_burst_should_be_throttled(self, clock):
+        """
+        同じ接続元IPから連続試行可能回数を超えた場合は、emailが異なっても拒否する。
+        """
+        throttle = LoginThrottle(MemoryLoginThrottleBackend(clock=clock), email_rule=(5, 5), ip_rule=(2, 60))
+        throttle.check("a@example.com", "10.0.0.1")
+        throttle.check("b@example.com", "10.0.0.1")
+        with pytest.raises(login_throttle.LoginThrottledError):
+            throttle.check("c@example.com", "10.0.0.1")
+        throttle.check("c@example.com", "10.0.0.2")
+
+    def test_backend_failure_should_not_block_login(self, mocker: MockFixture):
+        """
+        状態の保存先への接続に失敗した場合は制限しない。
+        """
+        backend = mocker.Mock(blocking=True)
+        backend.take.side_effect = Exception("connection refused")
+        LoginThrottle(backend).check("user@example.com", "10.0.0.1")
@@ -0,0 +1,76 @@
+# 標準モジュール
+import threading
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.metrics import MetricsRegistry, MultiprocessMetricsStore, statement_kind
+
+
+class TestMetricsRegistry:
+    """
+    メトリクスの集計・出力についてのテスト
+    """
+    @pytest.fixture
+    def registry(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "リクエスト数", ("status",))
+        registry.histogram("duration_seconds", "処理時間", ("route",), buckets=(0.1, 1.0))
+        return registry
+
+    def test_values_from_all_threads_should_be_merged(self, registry):
+        """
+        スレッドごとに記録した値を合算して出力する。
+        """
+        def record():
+            for _ in range(100):
+                registry.inc("requests_total", ("200",))
+        threads = [ threading.Thread(target=record) for _ in range(4) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.inc("requests_total", ("500",))
+
+        text = registry.render([registry.snapshot()])
+        assert 'requests_total{status="200"} 400' in text
+        assert 'requests_total{status="500"} 1' in text
+
+    def test_histogram_buckets_should_be_cumulative(self, registry):
+        """
+        ヒストグラムのバケットは累積値で出力し、+Infは件数と一致する。
+        """
+        for value in (0.05, 0.5, 5.0):
+            registry.observe("duration_seconds", ("/api",), value)
+
+        text = registry.render([registry.snapshot()])
+        assert 'duration_seconds_bucket{route="/api",le="0.1"} 1' in text
+        assert 'duration_seconds_bucket{route="/api",le="1.0"} 2' in text
+        assert 'duration_seconds_bucket{route="/api",le="+Inf"} 3' in text
+        assert 'duration_seconds_count{route="/api"} 3' in text
+        assert 'duration_seconds_sum{route="/api"} 5.55' in text
+
+    def test_gauges_of_exited_workers_should_be_ignored(self, registry, tmp_path, mocker: MockFixture):
+        """
+        複数ワーカーの場合、カウンタは終了したワーカー分も合算し、ゲージは稼働中のワーカー分のみ合算する。
+        """
+        registry.gauge("in_use", "使用中の接続数", (), lambda: [ ((), 2) ])
+        registry.inc("requests_total", ("200",), 3)
+        store = MultiprocessMetricsStore(str(tmp_path), registry)
+        (tmp_path / "999999.json").write_text(
+            '{"counters": [[["requests_total", ["200"]], 5]], "histograms": [],'
+            ' "gauges": [[["in_use", []], 7]]}')
+        mocker.patch("app.services.metrics.is_process_alive", side_effect=lambda pid: pid != 999999)
+
+        text = registry.render(store.collect())
+        assert 'requests_total{status="200"} 8' in text
+        assert "in_use 2" in text
+
+    def test_statement_kind(self):
+        """
+        SQLの先頭のキーワード(WITH句の場合は本体)で種類を判定する。
+        """
+        assert statement_kind("SELECT 1") == "SELECT"
+        assert statement_kind("  insert into users values (1)") == "INSERT"
+        assert statement_kind("WITH t AS (SELECT 1) UPDATE users SET name = 'a'") == "UPDATE"
+        assert statement_kind("BEGIN") == "OTHER"
@@ -0,0 +1,36 @@
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.password_hashing import calibrate_password_hasher, ARGON2_MIN_MEMORY_COST
+
+
+def fake_measure(time_cost: int, memory_cost: int, parallelism: int) -> float:
+    """
+    ハッシュ化時間がtime_cost, memory_costに比例するとみなした計測関数 (64MiB, time_cost=1で50ms)
+    """
+    return 50.0 * time_cost * memory_cost / 65536
+
+
+class TestCalibratePasswordHasher:
+    """
+    Argon2のパラメータ校正についてのテスト
+    """
+    @pytest.mark.parametrize(["target_ms", "expected_time_cost"], [ (50, 1), (160, 3), (1000, 20) ])
+    def test_largest_time_cost_within_target_should_be_selected(self, target_ms, expected_time_cost):
+        """
+        目標時間に収まる最大のtime_costを選択する。(上限は20)
+        """
+        params = calibrate_password_hasher(target_ms, memory_cost=65536, parallelism=4, measure=fake_measure)
+        assert params["time_cost"] == expected_time_cost
+        assert params["memory_cost"] == 65536
+        assert params["elapsed_ms"] <= target_ms
+
+    def test_memory_cost_should_be_reduced_when_too_slow(self):
+        """
+        time_cost=1でも目標時間を超える場合は、下限までメモリ使用量を減らす。
+        """
+        params = calibrate_password_hasher(30, memory_cost=65536, parallelism=4, measure=fake_measure)
+        assert params == { "time_cost": 1, "memory_cost": 32768, "parallelism": 4, "elapsed_ms": 25.0 }
+        params = calibrate_password_hasher(1, memory_cost=65536, parallelism=4, measure=fake_measure)
+        assert params["memory_cost"] >= ARGON2_MIN_MEMORY_COST
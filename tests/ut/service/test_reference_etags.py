@@ -0,0 +1,42 @@
+# 標準モジュール
+import datetime as dt
+from collections import namedtuple
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services import reference_etags
+from app.services.reference_etags import compute_reference_etag, is_not_modified
+
+Row = namedtuple("Row", ["idx", "num_of_rows", "last_updated"])
+
+
+class TestReferenceEtags:
+    """
+    参照系APIのETagについてのテスト
+    """
+    def test_etag_should_change_with_count_and_timestamp(self, mocker: MockFixture):
+        """
+        ETagは依存するテーブルの件数・最終更新日時が変わった場合のみ変わる。
+        """
+        mocker.patch.object(reference_etags, "get_workload_db_engine")
+        session = mocker.patch.object(reference_etags, "sessionmaker").return_value.return_value
+        session.execute.return_value.all.return_value = [
+            Row(0, 3, dt.datetime(2025, 3, 1, 9)), Row(1, 120, dt.datetime(2025, 3, 2, 9)) ]
+        etag_1 = compute_reference_etag("issues")
+        etag_2 = compute_reference_etag("issues")
+        session.execute.return_value.all.return_value = [
+            Row(0, 3, dt.datetime(2025, 3, 1, 9)), Row(1, 121, dt.datetime(2025, 3, 2, 9)) ]
+        etag_3 = compute_reference_etag("issues")
+        assert etag_1 == etag_2
+        assert etag_1 != etag_3
+
+    @pytest.mark.parametrize('if_none_match, expected', [
+        (None, False), ('*', True), ('W/"users-1-0.000000"', True),
+        ('"users-1-0.000000"', True), ('W/"users-2-0.000000", W/"users-1-0.000000"', True),
+        ('W/"users-2-0.000000"', False) ])
+    def test_if_none_match_should_be_compared_weakly(self, if_none_match, expected):
+        """
+        If-None-Matchは弱い比較で判定する。
+        """
+        assert is_not_modified(if_none_match, 'W/"users-1-0.000000"') is expected
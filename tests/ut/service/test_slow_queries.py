@@ -0,0 +1,63 @@
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.slow_queries import SlowQueryLog, normalize_sql, redact_parameters, is_explainable
+
+
+class TestSlowQueryLog:
+    """
+    遅いSQLの記録についてのテスト
+    """
+    def test_normalize_sql(self):
+        """
+        リテラル・パラメータを?に置き換え、展開されたIN句のパラメータはまとめる。
+        """
+        statement = """SELECT workload.id FROM workload
+            WHERE workload.user_id IN (%(user_id_1_1)s, %(user_id_1_2)s) AND path LIKE '%x%' AND hours > 1.5"""
+        assert normalize_sql(statement) == \
+            "SELECT workload.id FROM workload WHERE workload.user_id IN (...) AND path LIKE ? AND hours > ?"
+
+    def test_sensitive_parameters_should_be_redacted(self):
+        """
+        パスワード・メールアドレス等の値は伏せ、長い値は切り詰める。
+        """
+        redacted = redact_parameters({ "hashed_password_1": "xxx", "email_1": "a@example.com", "name_1": "a" * 100 })
+        assert redacted["hashed_password_1"] == "<redacted>"
+        assert redacted["email_1"] == "<redacted>"
+        assert redacted["name_1"].endswith("...") and len(redacted["name_1"]) < 100
+
+    def test_values_containing_email_should_be_redacted(self):
+        """
+        パラメータ名に関わらず、メールアドレスを含む値は伏せる。
+        """
+        redacted = redact_parameters({ "key_m0": "email:foo@example.com", "key_m1": "ip:192.0.2.1" })
+        assert redacted["key_m0"] == "<redacted>"
+        assert redacted["key_m1"] == "'ip:192.0.2.1'"
+        assert redact_parameters(( 1, ["a@example.com", "b"] )) == [ "1", "<redacted>" ]
+
+    @pytest.mark.parametrize("statement, expected", [
+        ("SELECT 1", True),
+        ("WITH t AS (SELECT 1) SELECT * FROM t", True),
+        ("WITH t AS (SELECT 1) DELETE FROM workload", False),
+        ("UPDATE workload SET hours = 1", False),
+    ])
+    def test_only_select_should_be_explained(self, statement, expected):
+        """
+        EXPLAIN ANALYZEはSQLを実行するため、SELECTのみを対象とする。
+        """
+        assert is_explainable(statement) is expected
+
+    def test_sampled_select_should_be_explained_in_background(self, mocker: MockFixture):
+        """
+        サンプリング対象のSELECTはEXPLAINを別スレッドで実行し、更新系は実行しない。
+        """
+        query_log = SlowQueryLog(threshold_ms=100, sample_rate=1.0, max_entries=10)
+        submit = mocker.patch.object(query_log._explain_executor, "submit")
+        engine = mocker.Mock()
+
+        entry = query_log.record(engine, "SELECT * FROM workload", {}, 150.0)
+        query_log.record(engine, "DELETE FROM workload", {}, 150.0)
+
+        submit.assert_called_once_with(query_log.explain, engine, entry, "SELECT * FROM workload", {})
+        assert [ e["sql"] for e in query_log.recent() ] == ["DELETE FROM workload", "SELECT * FROM workload"]
@@ -0,0 +1,84 @@
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.user_cache import ExpiringCache, UserCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestUserCache:
+    """
+    ユーザ情報キャッシュについてのテスト
+    """
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def test_cached_user_should_not_be_fetched_again(self, clock, mocker: MockFixture):
+        """
+        有効期間内は同じユーザの情報をDBから再取得しない。
+        """
+        cache = UserCache(max_entries=10, ttl_seconds=60, clock=clock)
+        fetch = mocker.Mock(return_value={"id": 1, "name": "user"})
+        assert cache.get_or_fetch("1", fetch) == {"id": 1, "name": "user"}
+        assert cache.get_or_fetch(1, fetch) == {"id": 1, "name": "user"}
+        assert fetch.call_count == 1
+
+    def test_expired_or_invalidated_user_should_be_fetched_again(self, clock, mocker: MockFixture):
+        """
+        有効期限切れ、または破棄したユーザ情報はDBから再取得する。
+        """
+        cache = UserCache(max_entries=10, ttl_seconds=60, clock=clock)
+        fetch = mocker.Mock(return_value={"id": 1, "is_superuser": False})
+        cache.get_or_fetch(1, fetch)
+        clock.now += 60
+        cache.get_or_fetch(1, fetch)
+        cache.invalidate(1)
+        cache.get_or_fetch(1, fetch)
+        assert fetch.call_count == 3
+
+    def test_returned_user_should_not_modify_cache(self, clock, mocker: MockFixture):
+        """
+        返却したユーザ情報を変更してもキャッシュは変わらない。
+        """
+        cache = UserCache(max_entries=10, ttl_seconds=60, clock=clock)
+        fetch = mocker.Mock(return_value={"id": 1, "name": "user"})
+        cache.get_or_fetch(1, fetch)["name"] = "changed"
+        assert cache.get_or_fetch(1, fetch)["name"] == "user"
+
+
+class TestExpiringCache:
+    """
+    有効期限付きキャッシュ(JWTのキャッシュ)についてのテスト
+    """
+    def test_entry_should_expire_at_specified_time(self):
+        """
+        指定した有効期限(JWTのexp)を過ぎた値は返さない。
+        """
+        clock = FakeClock()
+        cache = ExpiringCache(max_entries=10, clock=clock)
+        cache.set("token", "1", expires_at=clock.now + 30)
+        assert cache.get("token") == "1"
+        clock.now += 30
+        assert cache.get("token") is None
+
+    def test_least_recently_used_entry_should_be_evicted(self):
+        """
+        最大件数を超えた場合は最も参照されていない値を破棄する。
+        """
+        clock = FakeClock()
+        cache = ExpiringCache(max_entries=2, clock=clock)
+        cache.set("a", 1, clock.now + 60)
+        cache.set("b", 2, clock.now + 60)
+        cache.get("a")
+        cache.set("c", 3, clock.now + 60)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
@@ -1,11 +1,16 @@
 # サードバーティ製モジュール
 import pytest
 from pytest_mock import MockFixture
+from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError, InvalidHashError
 # プロジェクトモジュール
+from app.services import users
 from app.services.users import (
-    convert_password_to_hashed_one, verify_password_and_hashed_one
+    convert_password_to_hashed_one, verify_password_and_hashed_one,
+    verify_user_info_for_login, parse_user_import_csv, import_users_into_app_db,
+    prime_user_cache,
 )
+from app.services.user_cache import UserCache
 from tests.ut.service.constant import HashTestConst
 
 
@@ -84,3 +89,88 @@ class TestVerifyPassword:
         hashed_password: str = convert_password_to_hashed_one(password)
         with pytest.raises(Exception):
             _ = verify_password_and_hashed_one(hashed_password, password)
+
+
+class TestRehashOnLogin:
+    """
+    ログイン時のパスワード再ハッシュ化についてのテスト
+    """
+    def login_with_hash(self, hashed_password: str, mocker: MockFixture):
+        mocker.patch.object(users, "get_workload_db_engine")
+        session = mocker.patch.object(users, "sessionmaker").return_value.return_value
+        session.execute.return_value.first.return_value = mocker.Mock(
+            id=1, hashed_password=hashed_password, is_active=True)
+        rehash = mocker.patch.object(users, "rehash_user_password")
+        verify_user_info_for_login("user@example.com", HashTestConst.CORRECT_PASSWORD_LIST[0])
+        return rehash
+
+    def test_hash_with_old_parameters_should_be_rehashed(self, mocker: MockFixture):
+        """
+        現在と異なるパラメータでハッシュ化されたパスワードは、ログイン成功時に再ハッシュ化する。
+        """
+        old_hash = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1)\
+            .hash(HashTestConst.CORRECT_PASSWORD_LIST[0])
+        rehash = self.login_with_hash(old_hash, mocker)
+        rehash.assert_called_once_with(1, HashTestConst.CORRECT_PASSWORD_LIST[0])
+
+    def test_hash_with_current_parameters_should_not_be_rehashed(self, mocker: MockFixture):
+        """
+        現在のパラメータでハッシュ化されたパスワードは再ハッシュ化しない。
+        """
+        rehash = self.login_with_hash(convert_password_to_hashed_one(HashTestConst.CORRECT_PASSWORD_LIST[0]), mocker)
+        rehash.assert_not_called()
+
+
+class TestImportUsers:
+    """
+    ユーザ一括登録についてのテスト
+    """
+    def test_rows_should_be_classified_and_inserted_at_once(self, mocker: MockFixture):
+        """
+        入力不備・ファイル内重複・登録済みのユーザを除き、残りを1回のINSERTで登録する。
+        """
+        mocker.patch.object(users, "convert_password_to_hashed_one", side_effect=lambda password: f"hashed-{password}")
+        mocker.patch.object(users, "get_workload_db_engine")
+        session = mocker.patch.object(users, "sessionmaker").return_value.return_value
+        registered = mocker.Mock(all=mocker.Mock(return_value=[mocker.Mock(email="a@example.com", name="a")]))
+        inserted = [ mocker.Mock(id=10, email="b@example.com"), mocker.Mock(id=11, email="d@example.com") ]
+        session.execute.side_effect = [ registered, iter(inserted) ]
+        rows = parse_user_import_csv(
+            "\ufeffname,family_name,first_name,email,password\n"
+            "a,A,a,a@example.com,pass-a\n"
+            "b,B,b,b@example.com,pass-b\n"
+            "b2,B,b,b@example.com,pass-b\n"
+            "c,C,c,c.example.com,pass-c\n"
+            "d,D,d,d@example.com,pass-d\n")
+
+        result = import_users_into_app_db(rows)
+
+        assert [ res["status"] for res in result["results"] ] == [
+            "duplicate", "created", "duplicate", "invalid", "created" ]
+        assert (result["created"], result["skipped"]) == (2, 3)
+        assert session.execute.call_count == 2
+        insert_params = session.execute.call_args_list[1].args[0].compile().params
+        assert insert_params["hashed_password_m0"] == "hashed-pass-b"
+        assert insert_params["hashed_password_m1"] == "hashed-pass-d"
+        session.commit.assert_called_once()
+
+
+class TestPrimeUserCache:
+    """
+    起動時のユーザ情報の事前読み込みについてのテスト
+    """
+    def test_active_users_should_be_cached_with_one_query(self, mocker: MockFixture):
+        """
+        有効なユーザを1回のクエリで取得してキャッシュし、以降はDBを参照しない。
+        """
+        cache = mocker.patch.object(users, "user_cache", UserCache(max_entries=10, ttl_seconds=60))
+        mocker.patch.object(users, "get_workload_db_engine")
+        session = mocker.patch.object(users, "sessionmaker").return_value.return_value
+        rows = [ mocker.Mock(id=idx, is_superuser=False) for idx in (1, 2) ]
+        session.execute.return_value.all.return_value = rows
+
+        assert prime_user_cache() == 2
+        fetch = mocker.Mock()
+        assert cache.get_or_fetch(2, fetch)["id"] == 2
+        fetch.assert_not_called()
+        assert session.execute.call_count == 1
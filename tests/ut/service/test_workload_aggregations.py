@@ -0,0 +1,142 @@
+# 標準モジュール
+import datetime as dt
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+from sqlalchemy.dialects import postgresql
+# プロジェクトモジュール
+from app.services import workload_aggregations
+from app.services.workload_aggregations import (
+    build_workload_aggregate_stmt, build_workload_matrix, fetch_workload_matrix_from_db)
+
+
+def make_condition(**kwargs) -> dict:
+    return { "lower_date": dt.date(2025, 3, 1), "upper_date": dt.date(2025, 3, 31), **kwargs }
+
+
+def compile_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestBuildWorkloadAggregateStmt:
+    """
+    工数集計用SQL作成メソッドbuild_workload_aggregate_stmtについてのテスト
+    """
+    def test_empty_group_by_should_raise_error(self):
+        """
+        集約軸が指定されていない場合はValueErrorが発生する。
+        """
+        with pytest.raises(ValueError):
+            _ = build_workload_aggregate_stmt(make_condition(group_by=[]))
+
+    def test_columns_should_follow_dimension_order(self):
+        """
+        集約軸は指定順に関わらず規定の順で並び、合計と件数が末尾に付与される。
+        """
+        _, columns = build_workload_aggregate_stmt(make_condition(group_by=["day", "user"]))
+        assert columns == ["user_id", "user_name", "day", "workload_minute", "workload_count"]
+
+    def test_date_only_dimension_should_not_join_other_tables(self):
+        """
+        日付のみの集計では集計元テーブル以外を結合しない。
+        """
+        stmt, _ = build_workload_aggregate_stmt(make_condition(group_by=["month"]), use_summary=False)
+        sql = compile_sql(stmt)
+        assert "JOIN" not in sql
+        assert "GROUP BY CAST(date_trunc" in sql
+
+    def test_rollup_should_add_subtotal_column(self):
+        """
+        ROLLUP指定時は小計行判定用のカラムが付与される。
+        """
+        stmt, columns = build_workload_aggregate_stmt(
+            make_condition(group_by=["project", "month"], with_rollup=True))
+        assert columns[-1] == "is_subtotal"
+        assert "GROUP BY ROLLUP((project.id, project.name)" in compile_sql(stmt)
+
+    def test_supported_condition_should_use_daily_summary(self):
+        """
+        日次工数集計テーブルで対応可能な条件の場合は集計テーブルを参照する。
+        """
+        stmt, _ = build_workload_aggregate_stmt(
+            make_condition(group_by=["user"], specify_user_id=1, is_target_project=True))
+        sql = compile_sql(stmt)
+        assert "FROM workload_daily_summary" in sql
+        assert "sum(workload_daily_summary.workload_count)" in sql
+
+    def test_unsupported_condition_should_use_workload_table(self):
+        """
+        集計テーブルで対応できない条件が指定された場合は工数テーブルを参照する。
+        """
+        stmt, _ = build_workload_aggregate_stmt(
+            make_condition(group_by=["user"], workload_id=1))
+        sql = compile_sql(stmt)
+        assert "FROM workload JOIN" in sql
+        assert "workload.id = %(id_1)s" in sql
+
+    def test_detail_condition_should_fall_back_to_workload_table(self):
+        """
+        作業内容の絞り込みは工数テーブルで行い、集計テーブルの参照を指定した場合はValueErrorが発生する。
+        """
+        condition = make_condition(group_by=["month"], detail="レビュー")
+        stmt, _ = build_workload_aggregate_stmt(condition)
+        sql = compile_sql(stmt)
+        assert "FROM workload" in sql and "workload_daily_summary" not in sql
+        assert "workload.detail LIKE" in sql
+        with pytest.raises(ValueError):
+            _ = build_workload_aggregate_stmt(condition, use_summary=True)
+
+
+class TestBuildWorkloadMatrix:
+    """
+    工数行列作成メソッドbuild_workload_matrixについてのテスト
+    """
+    def test_rows_should_be_filled_into_dense_matrix(self):
+        """
+        ユーザ × 日の行列に集計値が埋められ、行優先で平坦化される。
+        """
+        rows = [ (2, "user2", dt.date(2025, 3, 3), 30),
+                 (1, "user1", dt.date(2025, 3, 1), 60),
+                 (1, "user1", dt.date(2025, 3, 3), 90) ]
+        matrix = build_workload_matrix(rows, dt.date(2025, 3, 1), dt.date(2025, 3, 3))
+        assert matrix["shape"] == [2, 3]
+        assert matrix["users"] == [{"id": 1, "name": "user1"}, {"id": 2, "name": "user2"}]
+        assert len(matrix["days"]) == 3
+        assert matrix["values"] == [60, 0, 90,
+                                    0, 0, 30]
+        assert matrix["projects"] is None
+
+    def test_project_axis_should_be_third_dimension(self):
+        """
+        プロジェクト軸を指定した場合は3次元目にプロジェクトが並ぶ。
+        """
+        rows = [ (1, "user1", dt.date(2025, 3, 1), 20, "p20", 15),
+                 (1, "user1", dt.date(2025, 3, 2), 10, "p10", 45) ]
+        matrix = build_workload_matrix(rows, dt.date(2025, 3, 1), dt.date(2025, 3, 2), by_project=True)
+        assert matrix["shape"] == [1, 2, 2]
+        assert matrix["projects"] == [{"id": 10, "name": "p10"}, {"id": 20, "name": "p20"}]
+        assert matrix["values"] == [0, 15, 45, 0]
+
+    def test_empty_rows_should_return_empty_matrix(self):
+        """
+        対象レコードが無い場合は値が空の行列を返す。
+        """
+        matrix = build_workload_matrix([], dt.date(2025, 3, 1), dt.date(2025, 3, 7))
+        assert matrix["shape"] == [0, 7]
+        assert matrix["values"] == []
+
+
+class TestFetchWorkloadMatrix:
+    """
+    工数行列取得メソッドfetch_workload_matrix_from_dbについてのテスト
+    """
+    @pytest.mark.parametrize('lower_date, upper_date', [
+        ("0001-01-01", "9999-12-31"), ("2025-01-01", "2026-01-02"), ("2025-03-02", "2025-03-01") ])
+    def test_invalid_period_should_be_rejected_before_query(self, lower_date, upper_date, mocker: MockFixture):
+        """
+        期間の上限(WORKLOAD_MATRIX_MAX_DAYS)を超える、または開始日が終了日より後の場合はDBを参照せずにエラーとする。
+        """
+        sessionmaker = mocker.patch.object(workload_aggregations, "sessionmaker")
+        with pytest.raises(ValueError):
+            _ = fetch_workload_matrix_from_db({"lower_date": lower_date, "upper_date": upper_date})
+        sessionmaker.assert_not_called()
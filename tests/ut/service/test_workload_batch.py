@@ -0,0 +1,126 @@
+# 標準モジュール
+import datetime as dt
+# サードバーティ製モジュール
+import pytest
+# プロジェクトモジュール
+from app.services.workloads import (
+    classify_workload_batch, workload_etag, parse_workload_if_match, WorkloadConflictError)
+
+
+def make_batch(inserts=None, updates=None, deletes=None) -> dict:
+    """
+    2025/03/03 ~ 2025/03/09 の一括保存リクエストを作成する。
+    """
+    return { "user_id": 1,
+             "lower_date": dt.date(2025, 3, 3), "upper_date": dt.date(2025, 3, 9),
+             "inserts": inserts or [], "updates": updates or [], "deletes": deletes or [] }
+
+
+STORED_WORKLOADS: dict[int, dict] = {
+    10: { "subtask_id": 100, "work_date": dt.date(2025, 3, 3), "workload_minute": 60, "detail": "a" },
+    11: { "subtask_id": 101, "work_date": dt.date(2025, 3, 4), "workload_minute": 30, "detail": "b" },
+}
+
+
+class TestClassifyWorkloadBatch:
+    """
+    一括保存リクエストの振り分けメソッドclassify_workload_batchについてのテスト
+    """
+    def test_insert_in_period_should_be_inserted(self):
+        """
+        期間内の作業日の登録は登録対象になる。
+        """
+        entry = { "subtask_id": 100, "work_date": dt.date(2025, 3, 5), "workload_minute": 15, "detail": "c" }
+        to_insert, to_update, to_delete, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(inserts=[entry]))
+        assert to_insert == [(0, entry)]
+        assert (to_update, to_delete, results) == ([], [], [])
+
+    @pytest.mark.parametrize('work_date', [dt.date(2025, 3, 2), dt.date(2025, 3, 10)])
+    def test_insert_out_of_period_should_fail(self, work_date):
+        """
+        期間外の作業日の登録は失敗として返却される。
+        """
+        entry = { "subtask_id": 100, "work_date": work_date, "workload_minute": 15, "detail": "c" }
+        to_insert, _, _, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(inserts=[entry]))
+        assert to_insert == []
+        assert results[0]["status"] == "failed"
+
+    def test_update_same_content_should_be_unchanged(self):
+        """
+        登録済みの内容と同一の更新はDBに反映しない。
+        """
+        entry = { "id": 10, **STORED_WORKLOADS[10] }
+        _, to_update, _, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(updates=[entry]))
+        assert to_update == []
+        assert results[0]["status"] == "unchanged"
+
+    def test_update_changed_content_should_be_updated(self):
+        """
+        内容が変わった更新は更新対象になる。
+        """
+        entry = { "id": 10, **STORED_WORKLOADS[10], "workload_minute": 90 }
+        _, to_update, _, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(updates=[entry]))
+        assert to_update == [(0, entry)]
+        assert results == []
+
+    def test_update_and_delete_unknown_id_should_fail(self):
+        """
+        対象ユーザ・期間に存在しないIDの更新、削除は失敗として返却される。
+        """
+        entry = { "id": 99, **STORED_WORKLOADS[10] }
+        _, to_update, to_delete, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(updates=[entry], deletes=[98]))
+        assert (to_update, to_delete) == ([], [])
+        assert [r["status"] for r in results] == ["failed", "failed"]
+
+    def test_delete_after_update_of_same_id_should_fail(self):
+        """
+        同一IDへの更新と削除が同時に指定された場合は、先に指定された更新のみ有効になる。
+        """
+        entry = { "id": 11, **STORED_WORKLOADS[11], "detail": "changed" }
+        _, to_update, to_delete, results = classify_workload_batch(
+            STORED_WORKLOADS, make_batch(updates=[entry], deletes=[11, 10]))
+        assert to_update == [(0, entry)]
+        assert to_delete == [(1, 10)]
+        assert results[0]["operation"] == "delete" and results[0]["status"] == "failed"
+
+    def test_update_with_stale_version_should_fail(self):
+        """
+        取得時のバージョンが登録済みのバージョンと異なる更新は失敗として返却される。
+        """
+        stored_workloads = { 10: { **STORED_WORKLOADS[10], "version": 3 } }
+        entry = { "id": 10, **STORED_WORKLOADS[10], "workload_minute": 90, "version": 2 }
+        _, to_update, _, results = classify_workload_batch(
+            stored_workloads, make_batch(updates=[entry]))
+        assert to_update == []
+        assert results[0]["status"] == "failed"
+
+
+class TestWorkloadIfMatch:
+    """
+    工数のETag/If-Matchの処理についてのテスト
+    """
+    def test_etag_should_be_parsed_to_version(self):
+        """
+        ETagから工数のバージョンを取得できる。(弱いETag, 複数指定も可)
+        """
+        assert parse_workload_if_match(workload_etag(5, 3), 5) == 3
+        assert parse_workload_if_match('W/"6-1", "5-4"', 5) == 4
+
+    @pytest.mark.parametrize('if_match', [None, "*"])
+    def test_unspecified_should_not_check_version(self, if_match):
+        """
+        If-Match未指定または"*"の場合はバージョンを確認しない。
+        """
+        assert parse_workload_if_match(if_match, 5) is None
+
+    def test_other_workload_etag_should_conflict(self):
+        """
+        対象工数のETagが含まれない場合は更新失敗とする。
+        """
+        with pytest.raises(WorkloadConflictError):
+            parse_workload_if_match('"6-1"', 5)
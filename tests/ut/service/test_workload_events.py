@@ -0,0 +1,104 @@
+# 標準モジュール
+import os
+import json
+import asyncio
+import threading
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.workload_events import WorkloadSubscription, WorkloadEventBroker, RESYNC_EVENT
+
+
+def make_event(**kwargs) -> str:
+    event = { "op": "insert", "user_id": 10, "month": "2025-03-01", "project_ids": [100],
+              "count": 1, "workload_ids": [1] }
+    return json.dumps({**event, **kwargs})
+
+
+class TestWorkloadEvents:
+    """
+    工数変更イベントの配信についてのテスト
+    """
+    def test_subscription_should_filter_by_user_or_project(self):
+        """
+        ユーザまたはプロジェクトが購読条件に該当するイベントのみを配信する。(条件未指定は全件)
+        """
+        broker = WorkloadEventBroker()
+        by_user = WorkloadSubscription(user_ids=[10])
+        by_project = WorkloadSubscription(project_ids=[200])
+        all_events = WorkloadSubscription()
+        broker.subscriptions = {by_user, by_project, all_events}
+
+        broker.dispatch(make_event())
+        broker.dispatch(make_event(op="update", user_id=11, project_ids=[300, 200]))
+
+        assert by_user.queue.qsize() == 1
+        assert by_project.queue.qsize() == 1
+        assert all_events.queue.qsize() == 2
+
+    def test_bulk_resync_should_be_sent_to_all_subscribers(self):
+        """
+        一括更新でまとめて通知されたresyncは購読条件に関わらず全ての購読者へ配信する。
+        """
+        broker = WorkloadEventBroker()
+        by_user = WorkloadSubscription(user_ids=[10])
+        by_project = WorkloadSubscription(project_ids=[200])
+        broker.subscriptions = {by_user, by_project}
+
+        broker.dispatch('{"op": "resync"}')
+        assert by_user.queue.get_nowait() == RESYNC_EVENT
+        assert by_project.queue.get_nowait() == RESYNC_EVENT
+
+    def test_overflow_should_be_replaced_with_resync(self):
+        """
+        未送信イベントが上限を超えた場合は、溜まったイベントを破棄してresyncのみを送信する。
+        """
+        subscription = WorkloadSubscription(maxsize=2)
+        for _ in range(5):
+            subscription.put(make_event())
+        assert subscription.queue.qsize() == 1
+        assert subscription.queue.get_nowait() == RESYNC_EVENT
+
+    def test_listen_connection_should_be_opened_off_the_event_loop(self, mocker: MockFixture):
+        """
+        LISTEN用の接続はイベントループ外のスレッドで作成し、購読者がいなくなったら切断する。
+        """
+        read_fd, write_fd = os.pipe()
+        conn = mocker.Mock()
+        conn.fileno.return_value = read_fd
+        connect_threads = []
+
+        def open_listen_connection():
+            connect_threads.append(threading.current_thread())
+            return conn
+
+        broker = WorkloadEventBroker()
+        mocker.patch.object(broker, "_open_listen_connection", side_effect=open_listen_connection)
+
+        async def subscribe():
+            async with broker.subscribe([10]):
+                assert broker._conn is conn
+                return threading.current_thread()
+
+        loop_thread = asyncio.run(subscribe())
+        os.close(read_fd)
+        os.close(write_fd)
+        assert connect_threads and connect_threads[0] is not loop_thread
+        assert broker._conn is None
+        conn.close.assert_called_once()
+
+    def test_failed_listen_connection_should_raise_before_subscribing(self, mocker: MockFixture):
+        """
+        LISTEN用の接続に失敗した場合は購読せずに例外を送出する。
+        """
+        broker = WorkloadEventBroker()
+        mocker.patch.object(broker, "_open_listen_connection", side_effect=OSError("connection refused"))
+
+        async def subscribe():
+            async with broker.subscribe([10]):
+                pass
+
+        with pytest.raises(OSError):
+            asyncio.run(subscribe())
+        assert broker.subscriptions == set()
@@ -0,0 +1,42 @@
+# 標準モジュール
+import csv
+import io
+import datetime as dt
+# プロジェクトモジュール
+from app.services import workload_exports
+from app.services.workload_exports import iter_csv_chunks, EXPORT_COLUMNS
+
+
+def make_workload(workload_id: int) -> dict:
+    return { "project_id": 1, "project_name": "project", "issue_id_1": 2, "issue_name_1": "epic",
+             "issue_id_2": None, "issue_name_2": None, "subtask_id": 3, "subtask_name": "subtask",
+             "workload_id": workload_id, "user_id": 4, "user_name": "user",
+             "work_date": dt.date(2025, 3, 1), "workload_minute": 60, "detail": "詳細, \"引用\"",
+             "update_timestamp": dt.datetime(2025, 3, 1, 9), "create_timestamp": dt.datetime(2025, 3, 1, 9) }
+
+
+class TestIterCsvChunks:
+    """
+    CSV出力メソッドiter_csv_chunksについてのテスト
+    """
+    def test_header_should_be_sent_first(self):
+        """
+        最初のチャンクはBOM付きのヘッダのみとなる。
+        """
+        first_chunk = next(iter_csv_chunks(iter([])))
+        assert first_chunk.startswith("﻿".encode("utf-8"))
+        assert first_chunk.decode("utf-8-sig").strip() == ",".join(EXPORT_COLUMNS)
+
+    def test_rows_should_be_split_into_chunks(self, mocker):
+        """
+        指定行数ごとにチャンクが分割され、結合するとCSVとして読み込める。
+        """
+        mocker.patch.object(workload_exports, "WORKLOAD_EXPORT_CSV_CHUNK_ROWS", 2)
+        chunks = list(iter_csv_chunks(make_workload(idx) for idx in range(5)))
+        # ヘッダ + 2行 + 2行 + 1行
+        assert len(chunks) == 4
+
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+        assert [ row["workload_id"] for row in rows ] == ["0", "1", "2", "3", "4"]
+        assert rows[0]["detail"] == "詳細, \"引用\""
+        assert rows[0]["issue_id_2"] == ""
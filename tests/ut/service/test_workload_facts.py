@@ -0,0 +1,77 @@
+# サードバーティ製モジュール
+from pytest_mock import MockFixture
+from sqlalchemy.dialects import postgresql
+# プロジェクトモジュール
+from app.services import jira_contents
+from app.services.workload_facts import build_workload_fact_source_stmt, refresh_workload_facts
+
+
+class TestWorkloadFacts:
+    """
+    工数検索用テーブル(workload_fact)の更新メソッドについてのテスト
+    """
+    def test_source_stmt_should_join_issue_by_path_element(self):
+        """
+        第1, 第2階層のissueは部分一致ではなくpathの要素で結合する。
+        """
+        sql = str(build_workload_fact_source_stmt(workload_ids=[1])
+                  .compile(dialect=postgresql.dialect()))
+        assert "split_part" in sql
+        assert "LIKE" not in sql
+
+    def test_refresh_should_skip_empty_ids(self, mocker: MockFixture):
+        """
+        対象の工数IDが空の場合はDBへ問い合わせない。
+        """
+        session = mocker.Mock()
+        refresh_workload_facts(session, workload_ids=[])
+        session.execute.assert_not_called()
+
+    def test_refresh_should_update_only_changed_rows(self, mocker: MockFixture):
+        """
+        upsertは内容に変更がある行のみを更新する。
+        """
+        session = mocker.Mock()
+        refresh_workload_facts(session, workload_ids=[1, 2])
+        sql = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (workload_id) DO UPDATE" in sql
+        assert "IS DISTINCT FROM" in sql
+        assert sql.count("FROM workload ") == 1
+
+
+class TestUpsertJiraIssues:
+    """
+    issueの同期時の工数検索用テーブル更新についてのテスト
+    """
+    ISSUES = [ { "id": 1, "name": "subtask", "project_id": 10, "parent_issue_id": None, "type": "サブタスク",
+                 "is_subtask": True, "status": "未着手", "limit_date": None, "description": "" } ]
+
+    def test_unchanged_issues_should_not_refresh_facts(self, mocker: MockFixture):
+        """
+        変更されたissueが無い場合は工数検索用テーブルの更新・検索結果キャッシュの破棄を行わない。
+        """
+        mocker.patch.object(jira_contents, "get_workload_db_engine")
+        session = mocker.patch.object(jira_contents, "sessionmaker").return_value.return_value
+        session.execute.return_value.all.return_value = []
+        refresh = mocker.patch.object(jira_contents, "refresh_workload_facts")
+        clear = mocker.patch.object(jira_contents.workload_search_cache, "clear")
+
+        jira_contents.upsert_jira_issues_into_app_db(self.ISSUES)
+        refresh.assert_not_called()
+        clear.assert_not_called()
+        session.commit.assert_called_once()
+
+    def test_changed_issues_should_refresh_only_their_projects(self, mocker: MockFixture):
+        """
+        変更されたissueのprojectの工数のみ工数検索用テーブルを更新する。
+        """
+        mocker.patch.object(jira_contents, "get_workload_db_engine")
+        session = mocker.patch.object(jira_contents, "sessionmaker").return_value.return_value
+        session.execute.return_value.all.return_value = [
+            mocker.Mock(id=1, project_id=20), mocker.Mock(id=2, project_id=10), mocker.Mock(id=3, project_id=20) ]
+        refresh = mocker.patch.object(jira_contents, "refresh_workload_facts")
+        clear = mocker.patch.object(jira_contents.workload_search_cache, "clear")
+
+        jira_contents.upsert_jira_issues_into_app_db(self.ISSUES)
+        refresh.assert_called_once_with(session, project_ids=[10, 20])
+        clear.assert_called_once()
@@ -0,0 +1,85 @@
+# 標準モジュール
+import datetime as dt
+# サードバーティ製モジュール
+import pytest
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services import workload_partitions
+from app.services.workload_partitions import (
+    partition_name_of, ensure_workload_partitions, workload_partition_window)
+
+
+class TestWorkloadPartitions:
+    """
+    工数テーブルのパーティション管理メソッドについてのテスト
+    """
+    def test_partition_name_should_be_year_and_month(self):
+        """
+        パーティション名はworkload_YYYYMMになる。
+        """
+        assert partition_name_of(dt.date(2025, 3, 31)) == "workload_202503"
+        assert partition_name_of(dt.date(2024, 12, 1)) == "workload_202412"
+
+    def test_known_month_should_not_access_db(self, mocker: MockFixture):
+        """
+        作成済みを確認した月はDBへ問い合わせない。
+        """
+        mocker.patch.object(workload_partitions, "_known_partition_months", {dt.date(2025, 3, 1)})
+        begin = mocker.patch.object(workload_partitions, "get_workload_db_engine").return_value.begin
+        assert ensure_workload_partitions(["2025-03-05", dt.date(2025, 3, 20)]) == []
+        begin.assert_not_called()
+
+    def test_new_month_should_create_partition_once(self, mocker: MockFixture):
+        """
+        未確認の月はパーティションを作成し、以降は作成済みとして扱う。
+        """
+        mocker.patch.object(workload_partitions, "_known_partition_months", set())
+        mocker.patch.object(workload_partitions, "workload_partition_window",
+                            return_value=(dt.date(2024, 4, 1), dt.date(2025, 7, 1)))
+        begin = mocker.patch.object(workload_partitions, "get_workload_db_engine").return_value.begin
+        conn = begin.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = "workload_202504"
+
+        assert ensure_workload_partitions([dt.date(2025, 4, 2), dt.date(2025, 4, 9)]) == ["workload_202504"]
+        assert ensure_workload_partitions([dt.date(2025, 4, 30)]) == []
+        assert conn.execute.call_count == 1
+
+    def test_window_should_span_months_back_and_ahead(self, mocker: MockFixture):
+        """
+        自動作成の期間は現在月のWORKLOAD_PARTITION_MONTHS_BACKか月前からWORKLOAD_PARTITION_MONTHS_AHEADか月先まで。
+        """
+        mocker.patch.object(workload_partitions, "WORKLOAD_PARTITION_MONTHS_BACK", 24)
+        mocker.patch.object(workload_partitions, "WORKLOAD_PARTITION_MONTHS_AHEAD", 3)
+        assert workload_partition_window(dt.date(2025, 11, 15)) == (dt.date(2023, 11, 1), dt.date(2026, 2, 1))
+
+    def test_missing_month_outside_window_should_be_rejected(self, mocker: MockFixture):
+        """
+        期間外の月はパーティションを作成せず、未作成の場合はエラーとする。
+        """
+        mocker.patch.object(workload_partitions, "_known_partition_months", set())
+        mocker.patch.object(workload_partitions, "workload_partition_window",
+                            return_value=(dt.date(2024, 4, 1), dt.date(2025, 7, 1)))
+        begin = mocker.patch.object(workload_partitions, "get_workload_db_engine").return_value.begin
+        conn = begin.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = False
+
+        with pytest.raises(workload_partitions.WorkloadDateOutOfRangeError):
+            _ = ensure_workload_partitions([dt.date(2025, 4, 2), dt.date(9999, 12, 31)])
+        assert conn.execute.call_count == 1
+        assert "create_workload_partition" not in str(conn.execute.call_args.args[0])
+        assert workload_partitions._known_partition_months == set()
+
+    def test_existing_month_outside_window_should_be_allowed(self, mocker: MockFixture):
+        """
+        期間外の月でもパーティションが作成済みの場合は許可する。(過去の工数の編集)
+        """
+        mocker.patch.object(workload_partitions, "_known_partition_months", set())
+        mocker.patch.object(workload_partitions, "workload_partition_window",
+                            return_value=(dt.date(2024, 4, 1), dt.date(2025, 7, 1)))
+        begin = mocker.patch.object(workload_partitions, "get_workload_db_engine").return_value.begin
+        conn = begin.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = True
+
+        assert ensure_workload_partitions([dt.date(2020, 1, 10)]) == []
+        assert conn.execute.call_count == 1
+        assert workload_partitions._known_partition_months == {dt.date(2020, 1, 1)}
@@ -0,0 +1,68 @@
+# 標準モジュール
+import datetime as dt
+# サードバーティ製モジュール
+from pytest_mock import MockFixture
+# プロジェクトモジュール
+from app.services.workload_search_cache import WorkloadSearchCache, normalize_workload_condition
+
+
+class TestWorkloadSearchCache:
+    """
+    工数検索結果キャッシュについてのテスト
+    """
+    def test_same_condition_should_be_same_key(self):
+        """
+        日付の型や未指定項目の有無が異なっても同じ条件は同じキーになる。
+        """
+        key_1 = normalize_workload_condition({"specify_user_id": "1", "target_date": "2025-03-05", "workload_id": None})
+        key_2 = normalize_workload_condition({"specify_user_id": 1, "lower_date": dt.date(2025, 3, 5),
+                                              "upper_date": dt.date(2025, 3, 5)})
+        assert key_1 == key_2
+
+    def test_repeated_search_should_not_fetch_again(self, mocker: MockFixture):
+        """
+        同一条件の再検索はDBへ問い合わせない。
+        """
+        cache = WorkloadSearchCache(max_entries=4)
+        fetch = mocker.Mock(return_value=[{"workload_id": 1}])
+        condition = {"specify_user_id": 1, "lower_date": "2025-03-01", "upper_date": "2025-03-31"}
+        assert cache.get_or_fetch(condition, fetch) == [{"workload_id": 1}]
+        assert cache.get_or_fetch(dict(condition), fetch) == [{"workload_id": 1}]
+        assert fetch.call_count == 1
+
+    def test_invalidate_should_affect_only_dependent_results(self, mocker: MockFixture):
+        """
+        工数の更新は同じユーザ・月を含む検索結果と、全ユーザ対象の同月の検索結果のみを無効にする。
+        """
+        cache = WorkloadSearchCache(max_entries=8)
+        fetch = mocker.Mock(return_value=[])
+        my_march = {"specify_user_id": 1, "lower_date": "2025-03-01", "upper_date": "2025-03-31"}
+        my_april = {"specify_user_id": 1, "lower_date": "2025-04-01", "upper_date": "2025-04-30"}
+        other_march = {"specify_user_id": 2, "lower_date": "2025-03-01", "upper_date": "2025-03-31"}
+        team_march = {"lower_date": "2025-03-01", "upper_date": "2025-03-31"}
+        conditions = [my_march, my_april, other_march, team_march]
+        for condition in conditions:
+            cache.get_or_fetch(condition, fetch)
+
+        cache.invalidate([(1, dt.date(2025, 3, 10))])
+        fetch.reset_mock()
+        for condition in conditions:
+            cache.get_or_fetch(condition, fetch)
+        assert [ call.args[0] for call in fetch.call_args_list ] == [my_march, team_march]
+
+    def test_least_recently_used_should_be_evicted(self, mocker: MockFixture):
+        """
+        最大件数を超えた場合は最も参照されていない結果を破棄する。
+        """
+        cache = WorkloadSearchCache(max_entries=2)
+        fetch = mocker.Mock(return_value=[])
+        conditions = [ {"specify_user_id": user_id} for user_id in (1, 2, 3) ]
+        cache.get_or_fetch(conditions[0], fetch)
+        cache.get_or_fetch(conditions[1], fetch)
+        cache.get_or_fetch(conditions[0], fetch)
+        cache.get_or_fetch(conditions[2], fetch)
+        fetch.reset_mock()
+        cache.get_or_fetch(conditions[0], fetch)
+        fetch.assert_not_called()
+        cache.get_or_fetch(conditions[1], fetch)
+        fetch.assert_called_once()